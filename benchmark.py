@@ -0,0 +1,212 @@
+#
+# Microbenchmarks for the GA primitives.
+#
+# Times each primitive on a bur26 instance and on synthetic instances of larger size, reporting
+# operations per second and the memory allocated per call. Results are stored as JSON, keyed by
+# git revision, and can be compared against a stored baseline to flag regressions.
+#
+# Usage:
+#   python benchmark.py                                  # run & store results in benchmarks/<revision>.json
+#   python benchmark.py --save-baseline                  # ... and store them as the baseline
+#   python benchmark.py --baseline benchmarks/baseline.json --filter crossover
+#
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from permutationsga.ga import (
+    crossover_pmx,
+    crossover_cx,
+    crossover_ox,
+    invperm,
+    tournament_selection,
+)
+from permutationsga.problem import Solution
+from permutationsga.qap import QAP, evaluate_qap, read_qaplib
+from new_fns import (
+    crossover_pmx_single_off,
+    crossover_pmx_predef_secs,
+    swap_mutation,
+    scramble_mutation,
+    insertion_mutation,
+)
+
+RESULTS_DIR = "benchmarks"
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        return revision + ("-dirty" if dirty.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def synthetic_qap(l: int, rng: np.random.Generator):
+    A = rng.integers(0, 100, size=(l, l)).astype(np.float64)
+    B = rng.integers(0, 100, size=(l, l)).astype(np.float64)
+    return l, A, B
+
+
+def benchmarks_for(name: str, l: int, A, B, rng: np.random.Generator):
+    """
+    Yield (benchmark name, function without arguments) for an instance.
+    """
+    problem = QAP(l, A, B)
+    s0 = Solution(rng.permutation(l))
+    s1 = Solution(rng.permutation(l))
+    indices = np.flatnonzero(rng.random(l) < 0.5)
+    population = [Solution(rng.permutation(l)) for _ in range(256)]
+    for solution in population:
+        solution.f = rng.random()
+    perms = np.stack([s.e for s in population])
+
+    def evaluate():
+        solution = Solution(s0.e)
+        solution.s = s0.e
+        problem.evaluate(solution)
+
+    yield f"invperm[{name}]", lambda: invperm(s0.e)
+    yield f"evaluate_qap[{name}]", lambda: evaluate_qap(l, A, B, s0.e)
+    yield f"QAP.evaluate[{name}]", evaluate
+    yield f"QAP.evaluate_batch/256[{name}]", lambda: problem.evaluate_batch(perms)
+    yield f"QAP.swap_delta[{name}]", lambda: problem.swap_delta(s0.e, 0, l - 1)
+    yield f"crossover_pmx[{name}]", lambda: crossover_pmx(indices, s0, s1)
+    yield f"crossover_cx[{name}]", lambda: crossover_cx(indices, s0, s1)
+    yield f"crossover_ox[{name}]", lambda: crossover_ox(indices, s0, s1)
+    yield f"crossover_pmx_single_off[{name}]", lambda: crossover_pmx_single_off(indices, s0, s1)
+    if l == 26:
+        # Sections are defined for a keyboard of 26 keys.
+        yield f"crossover_pmx_predef_secs[{name}]", lambda: crossover_pmx_predef_secs(s0, s1, rng)
+    yield f"swap_mutation[{name}]", lambda: swap_mutation(s0, 1.0, rng)
+    yield f"scramble_mutation[{name}]", lambda: scramble_mutation(s0, 1.0, rng)
+    yield f"insertion_mutation[{name}]", lambda: insertion_mutation(s0, 1.0, rng)
+    yield f"tournament_selection/256[{name}]", lambda: tournament_selection(rng, population, 256)
+
+
+def time_function(fn, min_time: float, repeats: int = 3) -> float:
+    """
+    Operations per second, the best of a few repeats that each take at least min_time seconds.
+    """
+    # Determine the number of calls needed per repeat.
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10:
+            break
+        number *= 2
+    number = max(1, int(number * min_time / max(elapsed, 1e-9) / 10) * 10)
+
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return 1.0 / best
+
+
+def allocated_per_call(fn, number: int = 10) -> float:
+    """
+    Peak number of bytes allocated (and traced by tracemalloc) during a call, averaged over a few calls.
+    """
+    total = 0
+    for _ in range(number):
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        total += peak
+    return total / number
+
+
+def run(sizes, name_filter: str, min_time: float):
+    rng = np.random.default_rng(seed=42)
+    instances = [("bur26a", *read_qaplib("./instances/qap/bur26a.dat"))]
+    instances += [(f"n={l}", *synthetic_qap(l, rng)) for l in sizes]
+
+    results = {}
+    for name, l, A, B in instances:
+        for benchmark_name, fn in benchmarks_for(name, l, A, B, rng):
+            if name_filter not in benchmark_name:
+                continue
+            ops = time_function(fn, min_time)
+            alloc = allocated_per_call(fn)
+            results[benchmark_name] = {"ops_per_sec": ops, "alloc_bytes_per_call": alloc}
+            print(f"{benchmark_name:<45} {ops:>14,.1f} ops/s {alloc:>12,.0f} B/call")
+    return results
+
+
+def compare(results, baseline, tolerance: float) -> int:
+    """
+    Print a comparison against the baseline, returns the number of regressions.
+    """
+    regressions = 0
+    print(f"\nComparison against baseline {baseline['revision']} (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["ops_per_sec"] / baseline["results"][name]["ops_per_sec"]
+        regressed = ratio < 1 - tolerance
+        regressions += regressed
+        print(f"{name:<45} {ratio:>7.2f}x {'REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the GA primitives.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100, 256, 512], help="sizes of the synthetic instances")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this string")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum time (s) per measurement")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--baseline", default=None, help="results (JSON) to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline as well")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown considered a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    revision = git_revision()
+    results = run(args.sizes, args.filter, args.min_time)
+    record = {
+        "revision": revision,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, f"{revision}.json"), "w") as f:
+        json.dump(record, f, indent=2)
+    if args.save_baseline:
+        with open(os.path.join(args.output_dir, "baseline.json"), "w") as f:
+            json.dump(record, f, indent=2)
+
+    if baseline is not None:
+        if compare(results, baseline, args.tolerance) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
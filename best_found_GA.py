@@ -1,8 +1,9 @@
 # Imports
 import pandas as pd
-from tqdm import tqdm # progress bar
 
-from permutationsga.qap import QAP, read_qaplib
+from permutationsga.qap import QAP
+from permutationsga.instances import load_qaplib
+from permutationsga.runner import run_experiment
 
 from permutationsga.ga import (
     ConfigurableGA,
@@ -22,7 +23,7 @@ from new_fns import *
 ## Setup GA
 def setup_ga(seed: int, inst):
     # QAP
-    problem_base = QAP(*read_qaplib(f"./instances/qap/bur26{inst}.dat"))
+    problem_base = QAP(*load_qaplib(f"./instances/qap/bur26{inst}.dat"))
     problem = problem_base
 
     # Add the decoder - permutation encoding
@@ -65,21 +66,13 @@ def setup_ga(seed: int, inst):
 
     return problem_tracker, ga
 
-instances = ['a', 'b']
+if __name__ == "__main__":
+    instances = ['a', 'b']
 
-for inst in instances:
-    dfs = []
-    for seed in tqdm(range(42, 42+10)):
-        tracker, ga = setup_ga(seed, inst)
-        # run a few generations
-        for _ in tqdm(range(25), leave=False):
-            ga.generation()
-        # copy the elitist run data
-        run_data = tracker.elitist_history.copy()
-        # append metadata (e.g. seed, configuration, ..., anything that makes a run unique)
-        run_data["seed"] = seed
-
-        dfs.append(run_data)
-
-    pd.concat(dfs).to_csv(f"Results\example_experiment_data_{inst}.csv.gz", index=False)
+    # Run all seeds of all instances in parallel
+    jobs = [(inst, seed) for inst in instances for seed in range(42, 42+10)]
+    data = run_experiment(setup_ga, jobs, num_generations=25)
 
+    for inst in instances:
+        run_data = data[data["instance"] == inst].drop(columns="instance")
+        run_data.to_csv(f"Results\example_experiment_data_{inst}.csv.gz", index=False)
@@ -1,6 +1,5 @@
 # Imports
 import gzip  # as some instance files may have been compressed
-from tqdm import tqdm # progress bar
 
 # Re-import dependencies (in case earlier import was skipped)
 import numpy as np
@@ -22,6 +21,7 @@ from permutationsga.ga import (
     generate_uniform_indices,
     generate_sequential_indices,
     generate_sequential_wrapping_indices,
+    generate_uniform_masks,
     RandomUniformInitialization,
     DifferentialEvolutionRecombinator,
 )
@@ -34,14 +34,19 @@ from permutationsga.problem import (
 
 from new_fns import *
 
-from permutationsga.tsp import TSP
-from permutationsga.qap import QAP, read_qaplib
+from permutationsga.tsp import TSP, DenseTSP
+from permutationsga.qap import QAP
+from permutationsga.instances import load_qaplib
+from permutationsga.local_search import SwapLocalSearch
+from permutationsga.runner import run_experiment
 
 def setup_ga(seed: int, inst):
     # TSP
     # problem_base = TSP(tsp.parse(gzip.open("./instances/tsp/berlin52.tsp.gz").read().decode('utf8')))
+    # or, much faster, using a dense distance matrix:
+    # problem_base = DenseTSP.from_tsplib(tsp.parse(gzip.open("./instances/tsp/berlin52.tsp.gz").read().decode('utf8')))
     # QAP
-    problem_base = QAP(*read_qaplib(f"./instances/qap/bur26{inst}.dat"))
+    problem_base = QAP(*load_qaplib(f"./instances/qap/bur26{inst}.dat"))
 
     problem = problem_base
 
@@ -65,9 +70,12 @@ def setup_ga(seed: int, inst):
     l = problem.get_length()
 
     ## Choose crossover function
+    mask_gen = None
     # crossover_fn = crossover_pmx; indices_gen = lambda: generate_uniform_indices(rng, l, 0.5)
     # crossover_fn = crossover_pmx_single_off; indices_gen = lambda: generate_uniform_indices(rng, l, 0.5)
     crossover_fn = crossover_pmx_predef_secs; indices_gen = None
+    # Alternatively, generate the masks for all pairs of a generation at once (e.g. generate_uniform_masks):
+    # crossover_fn = crossover_pmx_single_off; indices_gen = None; mask_gen = lambda k: generate_keyboard_section_masks(rng, k)
 
     ## Choose mutation function
     mutation_fn = swap_mutation
@@ -83,30 +91,27 @@ def setup_ga(seed: int, inst):
         crossover_fn,
         parent_selection,
         population_size * 2, # Note: double as we are including the previous population
-        include_what="population"
+        include_what="population",
+        mask_function=mask_gen,
     )
     selection = TournamentSelection()
+    ## Optionally, improve (a fraction of the) offspring using local search (QAP only): a memetic algorithm
+    local_search = None
+    # local_search = SwapLocalSearch(problem, seed + 2, strategy="first", fraction=0.25, budget=10)
     ga = ConfigurableGA(
-        seed, population_size, problem, initialization, recombinator, selection, mutation_fn
+        seed, population_size, problem, initialization, recombinator, selection, mutation_fn,
+        local_search=local_search,
     )
 
     return problem_tracker, ga
 
-instances = ['a']
+if __name__ == "__main__":
+    instances = ['a']
 
-for inst in instances:
-    dfs = []
-    for seed in tqdm(range(42, 42+10)):
-        tracker, ga = setup_ga(seed, inst)
-        # run a few generations
-        for _ in tqdm(range(50), leave=False):
-            ga.generation()
-        # copy the elitist run data
-        run_data = tracker.elitist_history.copy()
-        # append metadata (e.g. seed, configuration, ..., anything that makes a run unique)
-        run_data["seed"] = seed
-
-        dfs.append(run_data)
-
-    pd.concat(dfs).to_csv(f"Results\example_experiment_data_{inst}.csv.gz", index=False)
+    # Run all seeds of all instances in parallel
+    jobs = [(inst, seed) for inst in instances for seed in range(42, 42+10)]
+    data = run_experiment(setup_ga, jobs, num_generations=50)
 
+    for inst in instances:
+        run_data = data[data["instance"] == inst].drop(columns="instance")
+        run_data.to_csv(f"Results\example_experiment_data_{inst}.csv.gz", index=False)
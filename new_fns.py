@@ -3,9 +3,20 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import string
 
-from typing import List
-from permutationsga.problem import Solution
-from permutationsga.qap import QAP, read_qaplib
+from typing import List, Optional
+from permutationsga.problem import Solution, copy_solution, swapped_solution, invperm_batch, permutation_dtype
+from permutationsga.qap import QAP, read_qaplib, wide_dtype
+
+# Random number generator used by the functions below that are not given one.
+# Replace it (e.g. per run, see permutationsga.runner) using set_rng for reproducible runs.
+_rng = np.random.default_rng()
+
+def set_rng(rng: np.random.Generator):
+    global _rng
+    _rng = rng
+
+def get_rng() -> np.random.Generator:
+    return _rng
 
 ## Initialization functions
 
@@ -28,7 +39,7 @@ class QWERTYRandom(Initialization):
         letterpos = {i: letter for i, letter in enumerate(qwerty)}
         letterinv = {letter: i for i, letter in enumerate(qwerty)}
 
-        sol = rng.permutation(self.length)
+        sol = rng.permutation(self.length).astype(permutation_dtype(self.length))
         for i in range(26):
             # if random < prob, swap letter at index with its correct letter
             if rng.uniform(0,1) < self.prob:
@@ -56,7 +67,7 @@ class AZERTYRandom(Initialization):
         letterpos = {i: letter for i, letter in enumerate(qwerty)}
         letterinv = {letter: i for i, letter in enumerate(qwerty)}
 
-        sol = rng.permutation(self.length)
+        sol = rng.permutation(self.length).astype(permutation_dtype(self.length))
         for i in range(26):
             # if random < prob, swap letter at index with its correct letter
             if rng.uniform(0,1) < self.prob:
@@ -84,7 +95,7 @@ class ColemakRandom(Initialization):
         letterpos = {i: letter for i, letter in enumerate(qwerty)}
         letterinv = {letter: i for i, letter in enumerate(qwerty)}
 
-        sol = rng.permutation(self.length)
+        sol = rng.permutation(self.length).astype(permutation_dtype(self.length))
         for i in range(26):
             # if random < prob, swap letter at index with its correct letter
             if rng.uniform(0,1) < self.prob:
@@ -112,7 +123,7 @@ class DvorakRandom(Initialization):
         letterpos = {i: letter for i, letter in enumerate(qwerty)}
         letterinv = {letter: i for i, letter in enumerate(qwerty)}
 
-        sol = rng.permutation(self.length)
+        sol = rng.permutation(self.length).astype(permutation_dtype(self.length))
         for i in range(26):
             # if random < prob, swap letter at index with its correct letter
             if rng.uniform(0,1) < self.prob:
@@ -134,7 +145,7 @@ class BetterPermutationInitialization(Initialization):
         self.length = length
         
         usage_matrix = problem.B
-        self.usage_per_letter = np.sum(usage_matrix, axis=0)
+        self.usage_per_letter = np.sum(usage_matrix, axis=0, dtype=wide_dtype(usage_matrix))
 
     def initialize(self, rng: np.random.Generator, population: List[Solution]):
 
@@ -144,14 +155,14 @@ class BetterPermutationInitialization(Initialization):
 
         for solution in population:
             # Shuffle both lists
-            np.random.shuffle(least_used)
-            np.random.shuffle(most_used)
+            rng.shuffle(least_used)
+            rng.shuffle(most_used)
             sol = np.concatenate([
                 least_used[:10], 
                 most_used, 
                 least_used[10:],
                 ])
-            solution.e = sol
+            solution.e = sol.astype(permutation_dtype(self.length))
 
 class QwertyPermutationInitialization(Initialization):
     """
@@ -166,19 +177,19 @@ class QwertyPermutationInitialization(Initialization):
         azerty = [0, 25, 4, 17, 19, 24, 20, 8, 14, 15, 16, 18, 3, 5, 6, 7, 9, 10, 11, 12, 22, 23, 2, 21, 1, 13]
         # colemak = [16, 22, 5, 15, 6, 9, 11, 20, 24, 0, 17, 18, 19, 3, 7, 13, 4, 8, 14, 25, 23, 2, 21, 1, 10, 12]
         # dvorak = [15, 24, 5, 6, 2, 17, 11, 0, 14, 4, 20, 8, 3, 7, 19, 13, 18, 16, 9, 10, 23, 1, 12, 22, 21, 25]
+        dtype = permutation_dtype(self.length)
         for solution in population:
-            np.random.seed = 42
-            x = np.random.random(size=1)
+            x = rng.random(size=1)
             if (x < 0.1):
-                solution.e = qwerty
+                solution.e = np.array(qwerty, dtype=dtype)
             elif (x >= 0.1 and x < 0.2):
-                solution.e = azerty
+                solution.e = np.array(azerty, dtype=dtype)
             # elif (x >= 0.2 and x < 0.25):
             #     solution.e = colemak
             # elif (x >= 0.25 and x < 0.3):
             #     solution.e = dvorak
             else:
-                solution.e = rng.permutation(self.length)
+                solution.e = rng.permutation(self.length).astype(dtype)
 
 ## Crossover functions
 
@@ -188,7 +199,9 @@ def crossover_pmx_single_off(indices, s0: Solution, s1: Solution):
     assert s1.e is not None, "Ensure solution s1 is initialized before use."
 
     # Offspring initialization
-    off = np.full(s0.e.size, np.nan)
+    off = np.empty_like(s0.e)
+    in_indices = np.zeros(s0.e.size, dtype=bool)
+    in_indices[indices] = True
 
     # Get parents subsets according to given indices
     subset_p0 = s0.e[indices]
@@ -200,78 +213,87 @@ def crossover_pmx_single_off(indices, s0: Solution, s1: Solution):
     # Replace elements in offspring using subsets
     off[indices] = subset_p0
 
-    for i in range(len(s0.e)):
-        if i not in indices:
-            elem = s1.e[i]
-            while elem in to_replace:
-                elem = to_replace[elem]
-            off[i] = elem
-    
-    # Ensure all values are integers
-    off = off.astype(int)
+    for i in np.flatnonzero(~in_indices):
+        elem = s1.e[i]
+        while elem in to_replace:
+            elem = to_replace[elem]
+        off[i] = elem
+
     assert len(off) == len(np.unique(off)), "Some numbers appear more than once"
 
     return [Solution(off)]
 
-def crossover_pmx_predef_secs(s0: Solution, s1: Solution):
+def crossover_pmx_single_off_batch(masks: np.ndarray, p0: np.ndarray, p1: np.ndarray):
+    """
+    Batched version of crossover_pmx_single_off, for (k, l) matrices of masks and parents.
+    """
+    k, l = p0.shape
+    rows = np.arange(k)[:, None]
+    p0inv = invperm_batch(p0)
+    # Elements taken from p1 that are already present in the section taken from p0
+    # are mapped (repeatedly) to the element of p1 at the same position.
+    off = np.copy(p1)
+    while True:
+        position_in_p0 = p0inv[rows, off]
+        to_map = masks[rows, position_in_p0] & ~masks
+        if not to_map.any():
+            break
+        off = np.where(to_map, p1[rows, position_in_p0], off)
+    off[masks] = p0[masks]
+    return [off]
+
+# Define the keyboard layout as a list for easy indexing.
+KEYBOARD_LAYOUT = list('QWERTYUIOPASDFGHJKLZXCVBNM')
+
+KEYBOARD_SECTIONS = []
+
+## Choose section divider
+# Define the sections left-middle-right.
+KEYBOARD_SECTIONS.append(list('QWERASDFZXCV'))
+KEYBOARD_SECTIONS.append(list('TYGHBN'))
+KEYBOARD_SECTIONS.append(list('UIOPJKLM'))
+
+# Define the sections toprow-middlerow-bottomrow
+# KEYBOARD_SECTIONS.append(list('QWERTYUIOP'))
+# KEYBOARD_SECTIONS.append(list('ASDFGHJKL'))
+# KEYBOARD_SECTIONS.append(list('ZXCVBNM'))
+
+# Define four sections
+# KEYBOARD_SECTIONS.append(list('QWERASDZX'))
+# KEYBOARD_SECTIONS.append(list('TFGCV'))
+# KEYBOARD_SECTIONS.append(list('YHJBN'))
+# KEYBOARD_SECTIONS.append(list('UIOPKLM'))
+
+# Create the sections based on the indices in the keyboard layout.
+for i in range(len(KEYBOARD_SECTIONS)):
+    KEYBOARD_SECTIONS[i] = np.array([KEYBOARD_LAYOUT.index(key) for key in KEYBOARD_SECTIONS[i]])
+
+def crossover_pmx_predef_secs(s0: Solution, s1: Solution, rng: Optional[np.random.Generator] = None):
     # Partially Mapped Crossover with Predifined Sections
     assert s0.e is not None, "Ensure solution s0 is initialized before use."
     assert s1.e is not None, "Ensure solution s1 is initialized before use."
+    rng = rng if rng is not None else _rng
 
-    # Define the keyboard layout as a list for easy indexing.
-    keyboard_layout = list('QWERTYUIOPASDFGHJKLZXCVBNM')
-
-    keyboard_sections = []
-
-    ## Choose section divider
-    # Define the sections left-middle-right.
-    keyboard_sections.append(list('QWERASDFZXCV'))
-    keyboard_sections.append(list('TYGHBN'))
-    keyboard_sections.append(list('UIOPJKLM'))
+    section_idx = rng.choice(len(KEYBOARD_SECTIONS))
+    section = KEYBOARD_SECTIONS[section_idx]
 
-    # Define the sections toprow-middlerow-bottomrow
-    # keyboard_sections.append(list('QWERTYUIOP'))
-    # keyboard_sections.append(list('ASDFGHJKL'))
-    # keyboard_sections.append(list('ZXCVBNM'))
-
-    # Define four sections
-    # keyboard_sections.append(list('QWERASDZX'))
-    # keyboard_sections.append(list('TFGCV'))
-    # keyboard_sections.append(list('YHJBN'))
-    # keyboard_sections.append(list('UIOPKLM'))
-
-    # Create the sections based on the indices in the keyboard layout.
-    for i in range(len(keyboard_sections)):
-        keyboard_sections[i] = np.array([keyboard_layout.index(key) for key in keyboard_sections[i]])
-
-    section_idx = np.random.choice(len(keyboard_sections))
-    section = keyboard_sections[section_idx]
-
-    # Offspring initialization
-    off = np.full(s0.e.size, np.nan)
-
-    # Get parents subsets according to given indices
-    subset_p0 = s0.e[section]
-    subset_p1 = s1.e[section]
-
-    # Map of replaced elements
-    to_replace = {key: value for key, value in zip(subset_p0, subset_p1)}
+    return crossover_pmx_single_off(section, s0, s1)
 
-    # Replace elements in offspring using subsets
-    off[section] = subset_p0
-
-    for i in range(len(s0.e)):
-        if i not in section:
-            elem = s1.e[i]
-            while elem in to_replace:
-                elem = to_replace[elem]
-            off[i] = elem
-    
-    # Ensure all values are integers
-    off = off.astype(int)
-    assert len(off) == len(np.unique(off)), "Some numbers appear more than once"
+def generate_keyboard_section_masks(rng: np.random.Generator, k: int, l: int = len(KEYBOARD_LAYOUT)):
+    """
+    (k, l) matrix of masks, each marking a section picked uniformly from KEYBOARD_SECTIONS, as crossover_pmx_predef_secs does.
+    Use with crossover_pmx_single_off (and its batched version) to obtain the offspring of crossover_pmx_predef_secs.
+    """
+    sections = np.zeros((len(KEYBOARD_SECTIONS), l), dtype=bool)
+    for i, section in enumerate(KEYBOARD_SECTIONS):
+        sections[i, section] = True
+    return sections[rng.integers(0, len(KEYBOARD_SECTIONS), size=k)]
 
-    return [Solution(off)]
+def crossover_pmx_predef_secs_batch(masks: np.ndarray, p0: np.ndarray, p1: np.ndarray):
+    """
+    Batched version of crossover_pmx_predef_secs, where row i of masks marks the section picked for pair i.
+    """
+    return crossover_pmx_single_off_batch(masks, p0, p1)
 
 def crossover_pmx_adjusted_chance(self, indices, s0: Solution, s1: Solution):
         assert s0.e is not None, "Ensure solution s0 is initialized before use."
@@ -291,7 +313,7 @@ def crossover_pmx_adjusted_chance(self, indices, s0: Solution, s1: Solution):
         section = [index for index, value in enumerate(swap_or_not) if value]
 
         # Offspring initialization
-        off = np.full(s0.e.size, np.nan)
+        off = np.empty_like(s0.e)
 
         subset_p0 = s0.e[section]
         subset_p1 = s1.e[section]
@@ -309,47 +331,57 @@ def crossover_pmx_adjusted_chance(self, indices, s0: Solution, s1: Solution):
                     elem = to_replace[elem]
                 off[i] = elem
 
-        # Ensure all values are integers
-        off = off.astype(int)
         assert len(off) == len(np.unique(off)), "Some numbers appear more than once"
 
         return [Solution(off)]
 
 ## Mutation functions
+# Mutated solutions keep track of the swaps performed on the genotype of their parent, such that
+# they can be delta-evaluated (see `swapped_solution`). Unmutated solutions are returned as a copy,
+# and keep their fitness.
 
-def swap_mutation(s0: Solution, mutation_probability):
-    mutated_layout = np.copy(s0.e)
-
+def swap_mutation(s0: Solution, mutation_probability, rng: Optional[np.random.Generator] = None):
+    rng = rng if rng is not None else _rng
     # Perform mutation.
-    if np.random.random() < mutation_probability:
+    if rng.random() < mutation_probability:
+        mutated_layout = np.copy(s0.e)
         # Select two random indices.
-        idx1, idx2 = np.random.choice(len(s0.e), 2, replace=False)
+        idx1, idx2 = rng.choice(len(s0.e), 2, replace=False)
         # Swap the keys at these indices.
         mutated_layout[idx1], mutated_layout[idx2] = s0.e[idx2], s0.e[idx1]
+        return swapped_solution(s0, mutated_layout, [(idx1, idx2)])
 
-    return Solution(mutated_layout)
-
-def scramble_mutation(s0: Solution, mutation_probability):
-    mutated_layout = np.copy(s0.e)
+    return copy_solution(s0)
 
+def scramble_mutation(s0: Solution, mutation_probability, rng: Optional[np.random.Generator] = None):
+    rng = rng if rng is not None else _rng
     # Perform mutation.
-    if np.random.random() < mutation_probability:
+    if rng.random() < mutation_probability:
+        mutated_layout = np.copy(s0.e)
         # Select a random subset of indices.
-        subset_size = np.random.randint(1, len(s0.e))
-        subset_indices = np.random.choice(len(s0.e), size=subset_size, replace=False)
+        subset_size = rng.integers(1, len(s0.e))
+        subset_indices = rng.choice(len(s0.e), size=subset_size, replace=False)
 
-        # Scramble the genes in these positions.
-        np.random.shuffle(mutated_layout[subset_indices])
+        # Scramble the genes in these positions (Fisher-Yates), keeping track of the swaps made.
+        swaps = []
+        for i in range(subset_size - 1, 0, -1):
+            j = rng.integers(0, i + 1)
+            if i != j:
+                a, b = subset_indices[i], subset_indices[j]
+                mutated_layout[a], mutated_layout[b] = mutated_layout[b], mutated_layout[a]
+                swaps.append((a, b))
 
-    return Solution(mutated_layout)
+        return swapped_solution(s0, mutated_layout, swaps)
 
-def insertion_mutation(s0: Solution, mutation_probability):
-    mutated_layout = np.copy(s0.e)
+    return copy_solution(s0)
 
+def insertion_mutation(s0: Solution, mutation_probability, rng: Optional[np.random.Generator] = None):
+    rng = rng if rng is not None else _rng
     # Perform mutation.
-    if np.random.random() < mutation_probability:
+    if rng.random() < mutation_probability:
+        mutated_layout = np.copy(s0.e)
         # Select two random indices.
-        idx1, idx2 = np.random.choice(len(s0.e), 2, replace=False)
+        idx1, idx2 = rng.choice(len(s0.e), 2, replace=False)
         # Insert and shift
         value_to_insert = mutated_layout[idx1]
         mutated_layout = np.delete(mutated_layout, idx1)
@@ -357,7 +389,106 @@ def insertion_mutation(s0: Solution, mutation_probability):
 
         assert len(s0.e) == len(mutated_layout), "The mutation caused a change in the solution size"
 
-    return Solution(mutated_layout)
+        # Moving an element from idx1 to idx2 is equivalent to swapping it along with its neighbours.
+        if idx1 < idx2:
+            swaps = [(k, k + 1) for k in range(idx1, idx2)]
+        else:
+            swaps = [(k, k - 1) for k in range(idx1, idx2, -1)]
+
+        return swapped_solution(s0, mutated_layout, swaps)
+
+    return copy_solution(s0)
+
+## Batch mutation functions
+# These mutate a (k, l) matrix of genotypes in place, mutating each row with probability mutation_probability,
+# in the same way as the corresponding function above. All random decisions are drawn at once from rng.
+# Returns the indices of the rows that were changed (and need to be re-evaluated), and for each of these rows
+# the swaps performed on it, such that mutated solutions can be delta-evaluated (see `swapped_solution`).
+
+def _rows_to_mutate(k: int, mutation_probability, rng: np.random.Generator):
+    return np.flatnonzero(rng.random(k) < mutation_probability)
+
+def _swaps(sources: np.ndarray):
+    """
+    Swaps transforming each row of a (m, l) matrix x into x[sources], i.e. (cycle-wise) the swaps moving
+    the element at position sources[j] to position j.
+    """
+    all_swaps = []
+    for source in sources:
+        # at[j]: the original position of the element currently at j, where[i]: the current position of i.
+        at = np.arange(len(source))
+        where = np.arange(len(source))
+        swaps = []
+        for j, i in enumerate(source):
+            k = where[i]
+            if k != j:
+                swaps.append((j, int(k)))
+                at[j], at[k] = at[k], at[j]
+                where[at[j]], where[at[k]] = j, k
+        all_swaps.append(swaps)
+    return all_swaps
+
+def _two_distinct_indices(m: int, l: int, rng: np.random.Generator):
+    idx1 = rng.integers(0, l, size=m)
+    idx2 = (idx1 + rng.integers(1, l, size=m)) % l
+    return idx1, idx2
+
+def swap_mutation_batch(genotypes: np.ndarray, mutation_probability, rng: np.random.Generator):
+    k, l = genotypes.shape
+    rows = _rows_to_mutate(k, mutation_probability, rng)
+    idx1, idx2 = _two_distinct_indices(len(rows), l, rng)
+    values1 = genotypes[rows, idx1]
+    genotypes[rows, idx1] = genotypes[rows, idx2]
+    genotypes[rows, idx2] = values1
+    return rows, [[(int(a), int(b))] for a, b in zip(idx1, idx2)]
+
+def scramble_mutation_batch(genotypes: np.ndarray, mutation_probability, rng: np.random.Generator):
+    k, l = genotypes.shape
+    rows = _rows_to_mutate(k, mutation_probability, rng)
+    m = len(rows)
+    before = genotypes[rows]
+    positions = np.broadcast_to(np.arange(l), (m, l))
+    # A random subset of subset_size positions per row: those ranked first by random keys.
+    subset_size = rng.integers(1, l, size=m)
+    ranks = np.argsort(np.argsort(rng.random((m, l)), axis=1), axis=1)
+    subset = ranks < subset_size[:, None]
+    # Values at positions in the subset move to the subset positions (in order), in a random order.
+    # Positions outside of the subset are ordered last in both, and as such keep their value.
+    source = np.argsort(np.where(subset, rng.random((m, l)), 1 + positions), axis=1)
+    destination = np.argsort(np.where(subset, 0, 1) * l + positions, axis=1)
+    # Position j of the result gets the value at sources[j].
+    sources = np.empty_like(source)
+    sources[np.arange(m)[:, None], destination] = source
+    genotypes[rows] = before[np.arange(m)[:, None], sources]
+    swaps = _swaps(sources)
+    changed = [i for i, s in enumerate(swaps) if len(s) > 0]
+    return rows[changed], [swaps[i] for i in changed]
+
+def insertion_mutation_batch(genotypes: np.ndarray, mutation_probability, rng: np.random.Generator):
+    k, l = genotypes.shape
+    rows = _rows_to_mutate(k, mutation_probability, rng)
+    idx1, idx2 = _two_distinct_indices(len(rows), l, rng)
+    idx1, idx2 = idx1[:, None], idx2[:, None]
+    # The element at idx1 moves to idx2, the elements in between shift towards idx1.
+    j = np.arange(l)[None, :]
+    forward = idx1 < idx2
+    shifted = np.where(forward, (j >= idx1) & (j < idx2), (j > idx2) & (j <= idx1))
+    source = j + np.where(forward, 1, -1) * shifted
+    source = np.where(j == idx2, idx1, source)
+    genotypes[rows] = genotypes[rows[:, None], source]
+    # As in insertion_mutation: the element is swapped along with its neighbours.
+    swaps = [
+        [(k, k + 1) for k in range(a, b)] if a < b else [(k, k - 1) for k in range(a, b, -1)]
+        for a, b in zip(idx1[:, 0].tolist(), idx2[:, 0].tolist())
+    ]
+    return rows, swaps
+
+# Batched versions of mutation functions, used by ConfigurableGA.
+batch_mutation_functions = {
+    swap_mutation: swap_mutation_batch,
+    scramble_mutation: scramble_mutation_batch,
+    insertion_mutation: insertion_mutation_batch,
+}
 
 ## Data analist
 def visualize_keyboard(solution):
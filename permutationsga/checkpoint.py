@@ -0,0 +1,56 @@
+#
+# Checkpoint files: atomically written .npz files holding the (large) arrays of a run, e.g. the population,
+# and a pickled dictionary with the remaining state, e.g. the state of random number generators.
+#
+# Components of a run (selections, recombinators, problems, ...) that have state implement
+# get_state() -> object & set_state(state). Random number generators are supported directly.
+#
+
+import os
+import pickle
+import numpy as np
+from typing import Dict, Tuple
+
+
+def get_component_state(component):
+    """
+    State of a component, or None if it is stateless.
+    """
+    if isinstance(component, np.random.Generator):
+        return component.bit_generator.state
+    if hasattr(component, "get_state"):
+        return component.get_state()
+    return None
+
+
+def set_component_state(component, state):
+    if state is None:
+        return
+    if isinstance(component, np.random.Generator):
+        component.bit_generator.state = state
+    else:
+        component.set_state(state)
+
+
+def write_checkpoint(path: str, arrays: Dict[str, np.ndarray], state: dict):
+    """
+    Write a checkpoint, atomically: the file at path is either the previous or the new checkpoint.
+    """
+    # Note: stored uncompressed, such that writing is cheap.
+    arrays = dict(arrays, state=np.frombuffer(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path: str) -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Read a checkpoint, returns (arrays, state).
+    """
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files if name != "state"}
+        state = pickle.loads(data["state"].tobytes())
+    return arrays, state
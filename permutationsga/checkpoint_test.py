@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from .ga import (
+    ConfigurableGA,
+    RandomPermutationInitialization,
+    FunctionBasedRecombinator,
+    SequentialSelector,
+    TournamentSelection,
+    crossover_pmx,
+    generate_uniform_indices,
+)
+from .problem import CachedProblem, ElitistTracker, IdenticalDecoder
+from .qap import QAP, read_qaplib
+from new_fns import swap_mutation, set_rng
+
+def setup_ga(population_array: bool):
+    set_rng(np.random.default_rng(seed=7))
+    problem = ElitistTracker(IdenticalDecoder(CachedProblem(QAP(*read_qaplib("./instances/qap/bur26a.dat")))), None)
+    l = problem.get_length()
+    rng = np.random.default_rng(seed=43)
+    recombinator = FunctionBasedRecombinator(
+        lambda: generate_uniform_indices(rng, l, 0.5),
+        crossover_pmx,
+        SequentialSelector(),
+        2 * 32,
+        include_what="population",
+    )
+    ga = ConfigurableGA(
+        42, 32, problem, RandomPermutationInitialization(l), recombinator, TournamentSelection(), swap_mutation,
+        population_array=population_array,
+    )
+    ga.add_to_checkpoint("indices_rng", rng)
+    return problem, ga
+
+def genotypes(ga):
+    if ga.population_array:
+        return ga.population.genotypes
+    return np.stack([s.e for s in ga.population])
+
+@pytest.mark.parametrize("population_array", [False, True])
+def test_resume_is_identical(tmp_path, population_array):
+    tracker, ga = setup_ga(population_array)
+    for _ in range(6):
+        ga.generation()
+
+    path = str(tmp_path / "run.ckpt")
+    _, ga_interrupted = setup_ga(population_array)
+    ga_interrupted.enable_checkpointing(path, every_generations=3)
+    for _ in range(4):
+        ga_interrupted.generation()
+
+    # Resume from the checkpoint after 3 generations, in a fresh setup.
+    tracker_resumed, ga_resumed = setup_ga(population_array)
+    ga_resumed.load_checkpoint(path)
+    assert ga_resumed.num_generations == 3
+    for _ in range(3):
+        ga_resumed.generation()
+
+    np.testing.assert_array_equal(genotypes(ga), genotypes(ga_resumed))
+    assert tracker.num_evaluations == tracker_resumed.num_evaluations
+    assert tracker.cache.hits == tracker_resumed.cache.hits
+    history = tracker.elitist_history.drop(columns="time (s)")
+    history_resumed = tracker_resumed.elitist_history.drop(columns="time (s)")
+    assert history["#evaluations"].tolist() == history_resumed["#evaluations"].tolist()
+    assert history["fitness"].tolist() == history_resumed["fitness"].tolist()
@@ -3,10 +3,26 @@
 #
 
 import numpy as np
-from typing import List, Union
+import time
+from contextlib import nullcontext
+from typing import List, Optional, Union
 import numpy.typing as npt
 
-from .problem import Problem, Solution
+from .problem import Problem, Solution, invperm_batch, permutation_dtype, swapped_solution
+from .population import (
+    PopulationArray,
+    initialize_population,
+    recombine_population,
+    select_population,
+    evaluate_population,
+    evaluate_solutions,
+    improve_population,
+    mutate_population,
+    deduplicate_genotypes,
+)
+from .selection import tournament_selection_indices, truncation_selection_indices
+from .profiling import GenerationProfiler
+from .checkpoint import get_component_state, set_component_state, read_checkpoint, write_checkpoint
 from new_fns import *
 
 class Initialization:
@@ -28,6 +44,9 @@ class RandomUniformInitialization(Initialization):
         for solution in population:
             solution.e = rng.uniform(self.low, self.high, size=self.length)
 
+    def initialize_array(self, rng: np.random.Generator, population_size: int) -> PopulationArray:
+        return PopulationArray(rng.uniform(self.low, self.high, size=(population_size, self.length)))
+
 
 class RandomPermutationInitialization(Initialization):
     """
@@ -36,10 +55,15 @@ class RandomPermutationInitialization(Initialization):
 
     def __init__(self, length: int):
         self.length = length
+        self.dtype = permutation_dtype(length)
 
     def initialize(self, rng: np.random.Generator, population: List[Solution]):
         for solution in population:
-            solution.e = rng.permutation(self.length)
+            solution.e = rng.permutation(self.length).astype(self.dtype)
+
+    def initialize_array(self, rng: np.random.Generator, population_size: int) -> PopulationArray:
+        genotypes = np.tile(np.arange(self.length, dtype=self.dtype), (population_size, 1))
+        return PopulationArray(rng.permuted(genotypes, axis=1))
 
 
 class Selection:
@@ -73,24 +97,9 @@ def tournament_selection(
     :param s: the tournament size
     :param o: the number of solutions to select for each tournament
     """
-    selected: List[Solution] = []
-    idx = 0
-    if not shuffle:
-        p = np.arange(len(population))
-    else:
-        p = rng.permutation(len(population))
-
-    while len(selected) < to_select:
-        # If we are out of indices, generate a new permutation
-        if idx + s >= len(population) and shuffle:
-            p = rng.permutation(len(population))
-            idx = 0
-        #
-        selected += single_tournament([population[i] for i in p[idx : idx + s]], o)
-        idx += s
-    # Ensure the population & selection are exactly the same size.
-    # i.e. remove any extras, if necessary.
-    return selected[:to_select]
+    fitness = np.array([solution.f for solution in population], dtype=np.float64)
+    selected = tournament_selection_indices(rng, fitness, to_select, s, o, shuffle)
+    return [population[i] for i in selected]
 
 
 class TournamentSelection(Selection):
@@ -106,6 +115,33 @@ class TournamentSelection(Selection):
             rng, population, num_to_select, self.s, self.o, self.shuffle
         )
 
+    def select_indices(
+        self, rng: np.random.Generator, fitness: npt.NDArray[np.float64], num_to_select: int
+    ) -> npt.NDArray[np.int_]:
+        return tournament_selection_indices(
+            rng, fitness, num_to_select, self.s, self.o, self.shuffle
+        )
+
+
+class TruncationSelection(Selection):
+    """
+    Select the best solutions.
+
+    Note: if the offspring include the population, (e.g. FunctionBasedRecombinator with include_what="population"),
+    this performs (mu + lambda) selection.
+    """
+
+    def select(
+        self, rng: np.random.Generator, population: List[Solution], num_to_select: int
+    ) -> List[Solution]:
+        fitness = np.array([solution.f for solution in population], dtype=np.float64)
+        return [population[i] for i in self.select_indices(rng, fitness, num_to_select)]
+
+    def select_indices(
+        self, rng: np.random.Generator, fitness: npt.NDArray[np.float64], num_to_select: int
+    ) -> npt.NDArray[np.int_]:
+        return truncation_selection_indices(fitness, num_to_select)
+
 
 class SequentialSelector(Selection):
     def __init__(self, shuffle=True):
@@ -113,11 +149,23 @@ class SequentialSelector(Selection):
         self.ordering = np.zeros(0)
         self.position = 0
 
+    def get_state(self):
+        return {"ordering": np.copy(self.ordering), "position": self.position}
+
+    def set_state(self, state):
+        self.ordering = np.copy(state["ordering"])
+        self.position = state["position"]
+
     def select(
         self, rng: np.random.Generator, population: List[Solution], num_to_select: int
     ) -> List[Solution]:
-        if len(population) != len(self.ordering):
-            self.ordering = np.arange(len(population))
+        return [population[r] for r in self.select_indices(rng, np.zeros(len(population)), num_to_select)]
+
+    def select_indices(
+        self, rng: np.random.Generator, fitness: npt.NDArray[np.float64], num_to_select: int
+    ) -> npt.NDArray[np.int_]:
+        if len(fitness) != len(self.ordering):
+            self.ordering = np.arange(len(fitness))
             if self.shuffle:
                 rng.shuffle(self.ordering)
             self.position = 0
@@ -126,13 +174,13 @@ class SequentialSelector(Selection):
             r = self.ordering[self.position]
             self.position += 1
 
-            if self.position >= len(population):
+            if self.position >= len(fitness):
                 rng.shuffle(self.ordering)
                 self.position = 0
 
-            return population[r]
+            return r
 
-        return [next_sample() for _ in range(num_to_select)]
+        return np.array([next_sample() for _ in range(num_to_select)], dtype=np.int64)
 
 
 class UniformSamplingSelector(Selection):
@@ -144,6 +192,11 @@ class UniformSamplingSelector(Selection):
     ) -> List[Solution]:
         return list(rng.choice(population, size=num_to_select)) # type: ignore
 
+    def select_indices(
+        self, rng: np.random.Generator, fitness: npt.NDArray[np.float64], num_to_select: int
+    ) -> npt.NDArray[np.int_]:
+        return rng.choice(len(fitness), size=num_to_select)
+
 
 class Recombinator:
     def recombine(
@@ -292,6 +345,29 @@ def generate_sequential_wrapping_indices(rng: np.random.Generator, l: int) -> np
     """
     return np.where(generate_sequential_wrapping_mask(rng, l))[0]
 
+#
+# Batched versions of the mask generators above, generating a (k, l) matrix of masks (e.g. one for every pair
+# of parents in a generation) at once. Masks follow the same distribution as those of the scalar versions.
+#
+
+def generate_uniform_masks(rng: np.random.Generator, k: int, l: int, p: float, at_least_one: bool = True) -> npt.NDArray[np.bool_]:
+    masks = rng.random((k, l)) < p
+    if at_least_one:
+        masks[np.arange(k), rng.integers(0, l, size=k, endpoint=False)] = True
+    return masks
+
+def generate_sequential_masks(rng: np.random.Generator, k: int, l: int) -> npt.NDArray[np.bool_]:
+    x = rng.integers(0, l, size=(k, 2), endpoint=False)
+    a, b = x.min(axis=1)[:, None], x.max(axis=1)[:, None]
+    positions = np.arange(l)[None, :]
+    return (positions >= a) & (positions < b)
+
+def generate_sequential_wrapping_masks(rng: np.random.Generator, k: int, l: int) -> npt.NDArray[np.bool_]:
+    x = rng.integers(0, l, size=(k, 2), endpoint=False)
+    a, b = x[:, :1], x[:, 1:]
+    positions = np.arange(l)[None, :]
+    return np.where(b >= a, (positions >= a) & (positions < b), (positions >= a) | (positions < b))
+
 def crossover_pmx(indices, s0: Solution, s1: Solution):
     assert s0.e is not None, "Ensure solution s0 is initialized before use."
     assert s1.e is not None, "Ensure solution s1 is initialized before use."
@@ -330,7 +406,8 @@ def crossover_cx(indices, s0: Solution, s1: Solution):
 
     # Prepare copies, and the inverse to perform lookups on.
     r0 = np.copy(s0.e)
-    r0inv = invperm(r0)
+    # Note: signed, as -1 marks the element that was removed (genotypes may use an unsigned dtype).
+    r0inv = invperm(r0).astype(np.int64)
     r1 = np.copy(s1.e)
 
     # Note: it is potentially better to keep the number of indices low for this operator,
@@ -398,9 +475,86 @@ def crossover_ox_neg(not_indices, s0: Solution, s1: Solution):
     return [Solution(r0), Solution(r1)]
 
 def crossover_ox(indices, s0: Solution, s1: Solution):
-    not_indices = list(set(range(len(s1.e))) - set(indices))
+    # Note: not_indices should be in order, iteration order of a set is not guaranteed to be.
+    not_indices = np.setdiff1d(np.arange(len(s1.e)), indices)
     return crossover_ox_neg(not_indices, s0, s1)
 
+#
+# Batched versions of the crossover operators above.
+# These take (k, l) matrices of parents p0, p1 and a (k, l) boolean mask matrix, and produce the
+# same offspring as the corresponding scalar operator applied to each row, given the indices
+# np.flatnonzero(masks[i]) for row i.
+#
+
+def crossover_pmx_batch(masks: npt.NDArray[np.bool_], p0: np.ndarray, p1: np.ndarray) -> List[np.ndarray]:
+    k, _ = p0.shape
+    r0 = np.copy(p0)
+    r0inv = invperm_batch(r0)
+    r1 = np.copy(p1)
+    r1inv = invperm_batch(r1)
+
+    # Positions are processed in order, as the swaps performed depend on one another.
+    # Each step performs the same swaps as crossover_pmx, for all rows that include this position.
+    for i in np.flatnonzero(masks.any(axis=0)):
+        rows = np.flatnonzero(masks[:, i])
+        o = r0inv[rows, r1[rows, i]]
+        r_o, r_i = r0[rows, o], r0[rows, i]
+        r0[rows, i], r0[rows, o] = r_o, r_i
+        r0inv[rows, r_i], r0inv[rows, r_o] = o, i
+
+        o = r1inv[rows, r_i]
+        r_o, r_i = r1[rows, o], r1[rows, i]
+        r1[rows, i], r1[rows, o] = r_o, r_i
+        r1inv[rows, r_i], r1inv[rows, r_o] = o, i
+
+    return [r0, r1]
+
+
+def crossover_cx_batch(masks: npt.NDArray[np.bool_], p0: np.ndarray, p1: np.ndarray) -> List[np.ndarray]:
+    k, l = p0.shape
+    rows = np.arange(k)[:, None]
+    # Position i is in the same cycle as the position in p0 holding the value p1[i].
+    succ = invperm_batch(p0)[rows, p1].astype(np.intp)
+    # Label each position with the smallest position in its cycle, using pointer doubling.
+    label = np.broadcast_to(np.arange(l), (k, l)).copy()
+    steps = 1
+    while steps < l:
+        label = np.minimum(label, label[rows, succ])
+        succ = succ[rows, succ]
+        steps *= 2
+    # Crossing over a position swaps its entire cycle, crossing it over twice swaps it back.
+    # As such, a cycle is swapped if an odd number of its positions are in the mask.
+    counts = np.zeros((k, l), dtype=np.int64)
+    np.add.at(counts, (np.broadcast_to(rows, (k, l))[masks], label[masks]), 1)
+    swap = (counts[rows, label] % 2) == 1
+    return [np.where(swap, p1, p0), np.where(swap, p0, p1)]
+
+
+def crossover_ox_batch(masks: npt.NDArray[np.bool_], p0: np.ndarray, p1: np.ndarray) -> List[np.ndarray]:
+    k, l = p0.shape
+    rows = np.arange(k)[:, None]
+    positions = np.broadcast_to(np.arange(l), (k, l))
+
+    def reorder(r, inv):
+        # Positions not in the mask receive their values sorted by their position in the other parent,
+        # positions in the mask (sorted after all others, in order) keep their value.
+        key = np.where(masks, l + positions, inv[rows, r])
+        destination = np.argsort(np.where(masks, l + positions, positions), axis=1, kind="stable")
+        result = np.empty_like(r)
+        result[rows, destination] = r[rows, np.argsort(key, axis=1, kind="stable")]
+        return result
+
+    return [reorder(p1, invperm_batch(p0)), reorder(p0, invperm_batch(p1))]
+
+
+# Batched versions of crossover functions, used by FunctionBasedRecombinator when recombining arrays.
+batch_crossover_functions = {
+    crossover_pmx: crossover_pmx_batch,
+    crossover_cx: crossover_cx_batch,
+    crossover_ox: crossover_ox_batch,
+    crossover_pmx_single_off: crossover_pmx_single_off_batch,
+}
+
 
 class FunctionBasedRecombinator(Recombinator):
     """
@@ -415,24 +569,50 @@ class FunctionBasedRecombinator(Recombinator):
         parent_selection: Selection,
         num_offspring: int,
         include_what=None,
+        batch_crossover_function=None,
+        mask_function=None,
     ):
+        """
+        :param batch_crossover_function: batched version of crossover_function, used when recombining
+            a PopulationArray. Defaults to the one listed in batch_crossover_functions, if any.
+        :param mask_function: alternative to indices_function, function k -> (k, l) matrix of masks, providing
+            the indices for k pairs of parents at once (e.g. using generate_uniform_masks).
+        """
+        assert indices_function is None or mask_function is None, "Provide either indices or masks, not both."
         self.indices_function = indices_function
+        self.mask_function = mask_function
         self.crossover_function = crossover_function
+        if batch_crossover_function is None:
+            batch_crossover_function = batch_crossover_functions.get(crossover_function)
+        self.batch_crossover_function = batch_crossover_function
         self.parent_selection = parent_selection
         self.num_offspring = num_offspring
         self.include_what = include_what
 
+    def get_state(self):
+        return get_component_state(self.parent_selection)
+
+    def set_state(self, state):
+        set_component_state(self.parent_selection, state)
+
     def recombine(
         self, rng: np.random.Generator, population: List[Solution]
     ) -> List[Solution]:
         offspring = []
         if self.include_what == "population":
             offspring += population
+        if self.mask_function is not None:
+            # Every pair creates at least one offspring: masks for as many pairs suffice.
+            masks = iter(self.mask_function(max(0, self.num_offspring - len(offspring))))
         while len(offspring) < self.num_offspring:
             parents = self.parent_selection.select(rng, population, 2)
             if self.include_what == "parents":
                 offspring += parents
-            if self.indices_function is not None:
+            if self.mask_function is not None:
+                offspring += self.crossover_function(
+                    np.flatnonzero(next(masks)), parents[0], parents[1]
+                )
+            elif self.indices_function is not None:
                 offspring += self.crossover_function(
                     self.indices_function(), parents[0], parents[1]
                 )
@@ -442,6 +622,54 @@ class FunctionBasedRecombinator(Recombinator):
                 )
         return offspring
 
+    def recombine_array(
+        self, rng: np.random.Generator, population: PopulationArray
+    ) -> PopulationArray:
+        if self.batch_crossover_function is None or (self.indices_function is None and self.mask_function is None):
+            return PopulationArray.from_solutions(self.recombine(rng, population.to_solutions()))
+
+        k, l = population.genotypes.shape
+        # Determine the number of pairs needed, as the scalar version would.
+        num_included = k if self.include_what == "population" else 0
+        per_pair = self.children_per_pair(l) + (2 if self.include_what == "parents" else 0)
+        num_pairs = max(0, -(-(self.num_offspring - num_included) // per_pair))
+
+        # Select all parents at once, and create the masks for all pairs.
+        parents = select_population(self.parent_selection, rng, population, 2 * num_pairs).reshape(num_pairs, 2)
+        if self.mask_function is not None:
+            masks = self.mask_function(num_pairs)
+        else:
+            masks = np.zeros((num_pairs, l), dtype=bool)
+            for i in range(num_pairs):
+                masks[i, self.indices_function()] = True
+
+        children = self.batch_crossover_function(
+            masks, population.genotypes[parents[:, 0]], population.genotypes[parents[:, 1]]
+        )
+        # Interleave (parents and) children per pair, in the order in which the scalar version would add them.
+        blocks = [PopulationArray(c) for c in children]
+        if self.include_what == "parents":
+            blocks = [population.take(parents[:, 0]), population.take(parents[:, 1])] + blocks
+        offspring = PopulationArray(
+            np.stack([b.genotypes for b in blocks], axis=1).reshape(-1, l),
+            np.stack([b.fitness for b in blocks], axis=1).reshape(-1),
+            np.stack([b.evaluated for b in blocks], axis=1).reshape(-1),
+        )
+        if self.include_what == "population":
+            offspring = PopulationArray.concatenate([population, offspring])
+        return offspring
+
+    def children_per_pair(self, l: int) -> int:
+        """
+        Number of children created by the batch crossover function for each pair of parents.
+        """
+        dummy = np.arange(l)[None, :]
+        return len(self.batch_crossover_function(np.zeros((1, l), dtype=bool), dummy, dummy))
+
+
+_no_stage = nullcontext()
+
+DEDUPLICATION_MODES = [None, "reject", "regenerate"]
 
 class ConfigurableGA:
     def __init__(
@@ -452,10 +680,40 @@ class ConfigurableGA:
         initialization: Initialization,
         recombinator: Recombinator,
         selection: Selection,
-        mutation_fn
+        mutation_fn,
+        population_array: bool = False,
+        profiler: Optional[GenerationProfiler] = None,
+        mutation_probability: float = 0.001,
+        local_search=None,
+        batch_mutation_fn=None,
+        deduplication: Optional[str] = None,
     ):
+        """
+        :param population_array: whether to store the population as a PopulationArray, rather than
+            as a List[Solution]. Operators that do not support arrays are used through an adapter.
+        :param profiler: if provided, records the time spent in each stage of every generation.
+        :param mutation_probability: passed to mutation_fn, e.g. the probability of mutating each element.
+        :param local_search: if provided (e.g. a SwapLocalSearch), improves the newly created offspring
+            after evaluation, before selection (i.e. a memetic algorithm).
+        :param batch_mutation_fn: batched version of mutation_fn, mutating all offspring at once (in place)
+            using the rng of the GA, returning the rows changed and the swaps performed on each of them.
+            Defaults to the one listed in batch_mutation_functions, if any.
+        :param deduplication: how to handle offspring with the same genotype as an earlier one (a clone),
+            before evaluation: "reject" (discard them) or "regenerate" (perform random swaps until unique).
+            Clones are only kept if needed to obtain population_size offspring. Regenerated offspring are
+            delta-evaluated from their parent in list mode, and evaluated in full with population_array.
+        """
+        assert deduplication in DEDUPLICATION_MODES, \
+            f"Unknown deduplication mode {deduplication}, expected one of {DEDUPLICATION_MODES}"
+        self.population_size = population_size
+        self.population_array = population_array
         # Create solution containers
-        self.population = [Solution(None) for _ in range(population_size)]
+        # (For a PopulationArray, the genotypes are created upon initialization)
+        self.population: Union[List[Solution], PopulationArray]
+        if population_array:
+            self.population = PopulationArray(np.zeros((population_size, 0), dtype=np.int64))
+        else:
+            self.population = [Solution(None) for _ in range(population_size)]
         # Store variables
         self.problem = problem
         self.initialization = initialization
@@ -467,35 +725,237 @@ class ConfigurableGA:
         self.initialized = False
 
         self.mutation_fn = mutation_fn
+        if batch_mutation_fn is None:
+            batch_mutation_fn = batch_mutation_functions.get(mutation_fn)
+        self.batch_mutation_fn = batch_mutation_fn
+        self.mutation_probability = mutation_probability
+        self.local_search = local_search
+        self.deduplication = deduplication
+        # Number of unique offspring in the last generation, if deduplicating.
+        self.num_unique: Optional[int] = None
+        self.profiler = profiler
+
+        self.num_generations = 0
+        # Additional components (e.g. random number generators used by an indices function) to checkpoint.
+        self.checkpoint_components: dict = {}
+        # Automatic checkpointing, see enable_checkpointing.
+        self.checkpoint_path: Optional[str] = None
+        self.checkpoint_every_generations: Optional[int] = None
+        self.checkpoint_every_seconds: Optional[float] = None
+        self.last_checkpoint_time = time.monotonic()
+
+    def stage(self, name: str):
+        """
+        Context manager timing a stage of the generation, if profiling.
+        """
+        if self.profiler is None:
+            return _no_stage
+        return self.profiler.stage(name)
 
     def initialize(self):
+        if self.population_array:
+            with self.stage("initialize"):
+                self.population = initialize_population(self.initialization, self.rng, self.population_size)
+            with self.stage("evaluate"):
+                evaluate_population(self.problem, self.population)
+            return
+
         # Use initializer to set solution values
-        self.initialization.initialize(self.rng, self.population)
+        with self.stage("initialize"):
+            self.initialization.initialize(self.rng, self.population)
         # Evaluate all initial solutions
-        for solution in self.population:
-            self.problem.evaluate(solution)
+        with self.stage("evaluate"):
+            evaluate_solutions(self.problem, self.population)
+
+    def mutate(self, offspring: List[Solution]) -> List[Solution]:
+        if self.batch_mutation_fn is None:
+            return [self.mutation_fn(solution, self.mutation_probability) for solution in offspring]
+
+        # Note: the genotypes are stacked (i.e. copied), solutions that were not changed are kept as-is.
+        genotypes = np.stack([solution.e for solution in offspring]) # type: ignore
+        changed, swaps = self.batch_mutation_fn(genotypes, self.mutation_probability, self.rng)
+        offspring = list(offspring)
+        # Mutated solutions keep track of the swaps performed, such that they can be delta-evaluated.
+        for i, row_swaps in zip(changed, swaps):
+            offspring[i] = swapped_solution(offspring[i], genotypes[i], row_swaps)
+        return offspring
+
+    def deduplicate(self, offspring: List[Solution]) -> List[Solution]:
+        genotypes = np.stack([solution.e for solution in offspring]) # type: ignore
+        rng = self.rng if self.deduplication == "regenerate" else None
+        unique, clones, swaps = deduplicate_genotypes(genotypes, rng)
+        self.num_unique = len(unique)
+        keep = np.concatenate([unique, clones[:max(0, self.population_size - len(unique))]])
+        return [
+            swapped_solution(offspring[i], genotypes[i], swaps[i]) if i in swaps else offspring[i]
+            for i in keep
+        ]
+
+    def deduplicate_array(self, offspring: PopulationArray) -> PopulationArray:
+        # Note: unlike in list mode, the swaps of regenerated rows are not kept, they are evaluated in full.
+        rng = self.rng if self.deduplication == "regenerate" else None
+        unique, clones, swaps = deduplicate_genotypes(offspring.genotypes, rng)
+        self.num_unique = len(unique)
+        regenerated = np.array(list(swaps.keys()), dtype=np.int64)
+        offspring.fitness[regenerated] = np.inf
+        offspring.evaluated[regenerated] = False
+        return offspring.take(np.concatenate([unique, clones[:max(0, self.population_size - len(unique))]]))
 
     def create_offspring_and_select(self):
-        # Create offspring (potentially)
-        offspring = self.recombinator.recombine(self.rng, self.population)
-        for solution in offspring:
-            if self.mutation_fn is not None:
-                solution = self.mutation_fn(solution, 0.001)
-            self.problem.evaluate(solution)
+        if self.population_array:
+            self.create_offspring_and_select_array()
+            return
 
-        self.population = self.selection.select(self.rng, offspring, len(self.population))
+        # Create offspring (potentially)
+        with self.stage("recombine"):
+            offspring = self.recombinator.recombine(self.rng, self.population)
+        if self.mutation_fn is not None:
+            with self.stage("mutate"):
+                offspring = self.mutate(offspring)
+        if self.deduplication is not None:
+            with self.stage("deduplicate"):
+                offspring = self.deduplicate(offspring)
+        # Offspring that are new, rather than (e.g.) solutions of the population included as offspring.
+        new = [solution for solution in offspring if not solution.evaluated]
+        with self.stage("evaluate"):
+            evaluate_solutions(self.problem, offspring)
+        if self.local_search is not None:
+            with self.stage("local search"):
+                self.local_search.improve_all(new)
+
+        with self.stage("select"):
+            self.population = self.selection.select(self.rng, offspring, len(self.population))
+
+    def create_offspring_and_select_array(self):
+        assert isinstance(self.population, PopulationArray)
+        with self.stage("recombine"):
+            offspring = recombine_population(self.recombinator, self.rng, self.population)
+        if self.mutation_fn is not None:
+            with self.stage("mutate"):
+                if self.batch_mutation_fn is not None:
+                    mutate_population(self.batch_mutation_fn, self.rng, offspring, self.mutation_probability)
+                else:
+                    offspring = PopulationArray.from_solutions(self.mutate(offspring.to_solutions()))
+        if self.deduplication is not None:
+            with self.stage("deduplicate"):
+                offspring = self.deduplicate_array(offspring)
+        new = np.flatnonzero(~offspring.evaluated)
+        with self.stage("evaluate"):
+            evaluate_population(self.problem, offspring)
+        if self.local_search is not None:
+            with self.stage("local search"):
+                improve_population(self.local_search, offspring, new)
+
+        with self.stage("select"):
+            selected = select_population(self.selection, self.rng, offspring, self.population_size)
+            self.population = offspring.take(selected)
 
     def generation(self):
-        if not self.initialized:
-            # First: initialize the population
-            self.initialize()
-            self.initialized = True
-        else:
-            # Perform normal generation
-            self.create_offspring_and_select()
-
-
-import numpy as np
-
+        if self.profiler is not None:
+            self.profiler.begin_generation(self)
+        try:
+            if not self.initialized:
+                # First: initialize the population
+                self.initialize()
+                self.initialized = True
+            else:
+                # Perform normal generation
+                self.create_offspring_and_select()
+        finally:
+            # Note: also record the generation in which the vtr was found (and VTRFound raised).
+            if self.profiler is not None:
+                self.profiler.end_generation(self)
+        self.num_generations += 1
+
+        if self.checkpoint_path is not None and self.checkpoint_due():
+            self.save_checkpoint(self.checkpoint_path)
+
+    def add_to_checkpoint(self, name: str, component):
+        """
+        Include the state of an additional component (with get_state & set_state, or a np.random.Generator)
+        in checkpoints, e.g. the generator used by an indices function.
+        """
+        self.checkpoint_components[name] = component
 
+    def enable_checkpointing(
+        self, path: str, every_generations: Optional[int] = None, every_seconds: Optional[float] = None
+    ):
+        """
+        Save a checkpoint to path after every k generations and/or when t seconds have passed since the last one.
+        """
+        self.checkpoint_path = path
+        self.checkpoint_every_generations = every_generations
+        self.checkpoint_every_seconds = every_seconds
+        self.last_checkpoint_time = time.monotonic()
+
+    def checkpoint_due(self) -> bool:
+        every_generations = self.checkpoint_every_generations
+        if every_generations is not None and self.num_generations % every_generations == 0:
+            return True
+        if self.checkpoint_every_seconds is not None:
+            return time.monotonic() - self.last_checkpoint_time >= self.checkpoint_every_seconds
+        return False
+
+    def _stateful_components(self) -> dict:
+        components = {
+            "rng": self.rng,
+            "new_fns_rng": get_rng(),
+            "initialization": self.initialization,
+            "recombinator": self.recombinator,
+            "selection": self.selection,
+        }
+        if self.local_search is not None:
+            components["local_search"] = self.local_search
+        problem: Optional[Problem] = self.problem
+        depth = 0
+        while problem is not None:
+            components[f"problem{depth}"] = problem
+            problem = getattr(problem, "problem", None)
+            depth += 1
+        components.update(self.checkpoint_components)
+        return components
+
+    def save_checkpoint(self, path: str):
+        """
+        Save the state of the run, such that continuing from load_checkpoint is identical to not interrupting it.
+        """
+        if isinstance(self.population, PopulationArray):
+            population = self.population
+            phenotypes = None
+        else:
+            population = PopulationArray.from_solutions(self.population)
+            phenotypes = [solution.s for solution in self.population]
+        arrays = {
+            "genotypes": population.genotypes,
+            "fitness": population.fitness,
+            "evaluated": population.evaluated,
+        }
+        if phenotypes is not None and all(s is not None for s in phenotypes):
+            arrays["phenotypes"] = np.stack(phenotypes) # type: ignore
+        state = {
+            "initialized": self.initialized,
+            "num_generations": self.num_generations,
+            "components": {name: get_component_state(c) for name, c in self._stateful_components().items()},
+        }
+        write_checkpoint(path, arrays, state)
+        self.last_checkpoint_time = time.monotonic()
+
+    def load_checkpoint(self, path: str):
+        """
+        Continue from a checkpoint, saved by a GA set up in the same way.
+        """
+        arrays, state = read_checkpoint(path)
+        population = PopulationArray(arrays["genotypes"], arrays["fitness"], arrays["evaluated"])
+        if self.population_array:
+            self.population = population
+        else:
+            self.population = population.to_solutions()
+            if "phenotypes" in arrays:
+                for solution, s in zip(self.population, arrays["phenotypes"]):
+                    solution.s = s
+        self.initialized = state["initialized"]
+        self.num_generations = state["num_generations"]
+        components = self._stateful_components()
+        for name, component_state in state["components"].items():
+            set_component_state(components[name], component_state)
 
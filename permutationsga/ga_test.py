@@ -1,6 +1,15 @@
 import numpy as np
 
-from .ga import crossover_cx, crossover_pmx, crossover_ox_neg
+from .ga import (
+    crossover_cx,
+    crossover_pmx,
+    crossover_ox,
+    crossover_ox_neg,
+    crossover_pmx_batch,
+    crossover_cx_batch,
+    crossover_ox_batch,
+)
+from new_fns import crossover_pmx_single_off, crossover_pmx_single_off_batch
 from .problem import Solution
 
 def test_crossover_cx_basic():
@@ -115,3 +124,158 @@ def test_crossover_ox_2():
 
     np.testing.assert_array_equal(r[0].e, np.array([2, 0, 1, 3, 4, 5, 6, 7, 8, 9]))
     np.testing.assert_array_equal(r[1].e, np.array([0, 2, 1, 5, 4, 3, 8, 7, 6, 9]))
+
+def test_crossover_batch_matches_scalar():
+    l = 26
+    k = 64
+    rng = np.random.default_rng(seed=42)
+    p0 = np.stack([rng.permutation(l) for _ in range(k)])
+    p1 = np.stack([rng.permutation(l) for _ in range(k)])
+    masks = rng.random((k, l)) < rng.random((k, 1))
+
+    for crossover, crossover_batch in [
+        (crossover_pmx, crossover_pmx_batch),
+        (crossover_cx, crossover_cx_batch),
+        (crossover_ox, crossover_ox_batch),
+        (crossover_pmx_single_off, crossover_pmx_single_off_batch),
+    ]:
+        r_batch = crossover_batch(masks, p0, p1)
+        for i in range(k):
+            r = crossover(np.flatnonzero(masks[i]), Solution(p0[i]), Solution(p1[i]))
+            assert len(r) == len(r_batch), "Batch crossover should return as many offspring per pair"
+            for j in range(len(r)):
+                np.testing.assert_array_equal(r[j].e, r_batch[j][i])
+
+def test_mutation_batch():
+    from new_fns import swap_mutation_batch, scramble_mutation_batch, insertion_mutation_batch
+    l = 26
+    k = 200
+    rng = np.random.default_rng(seed=42)
+    original = np.stack([rng.permutation(l) for _ in range(k)])
+    for mutation_batch in [swap_mutation_batch, scramble_mutation_batch, insertion_mutation_batch]:
+        genotypes = np.copy(original)
+        changed, swaps = mutation_batch(genotypes, 0.5, rng)
+        # Roughly half of the rows are mutated, all rows remain permutations.
+        assert 50 < len(changed) < 150
+        assert np.all(np.sort(genotypes, axis=1) == np.arange(l))
+        differs = (genotypes != original).any(axis=1)
+        np.testing.assert_array_equal(np.flatnonzero(differs), np.sort(changed))
+        # Performing the swaps on the original yields the mutated row.
+        assert len(swaps) == len(changed)
+        for i, row_swaps in zip(changed, swaps):
+            row = np.copy(original[i])
+            for a, b in row_swaps:
+                row[a], row[b] = row[b], row[a]
+            np.testing.assert_array_equal(row, genotypes[i])
+        if mutation_batch is swap_mutation_batch:
+            assert np.all((genotypes != original).sum(axis=1)[changed] == 2)
+        if mutation_batch is insertion_mutation_batch:
+            # Removing the moved element from both yields the same sequence.
+            for i in changed:
+                moved = np.flatnonzero(genotypes[i] != original[i])
+                assert len(moved) >= 2
+                lo, hi = moved[0], moved[-1]
+                a, b = original[i, lo:hi + 1], genotypes[i, lo:hi + 1]
+                assert np.array_equal(a[1:], b[:-1]) or np.array_equal(a[:-1], b[1:])
+
+def test_mutation_batch_delta_evaluation():
+    from .ga import ConfigurableGA, RandomPermutationInitialization, TournamentSelection
+    from .population import evaluate_solutions
+    from .problem import ElitistTracker, IdenticalDecoder
+    from .qap import QAP, read_qaplib
+    from new_fns import swap_mutation
+    tracker = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"), check_deltas=True)), None)
+    rng = np.random.default_rng(seed=42)
+    ga = ConfigurableGA(
+        42, 8, tracker, RandomPermutationInitialization(26), None, TournamentSelection(), swap_mutation,
+        mutation_probability=1.0,
+    )
+    parents = [Solution(rng.permutation(26)) for _ in range(8)]
+    evaluate_solutions(tracker, parents)
+    # Mutated offspring of evaluated parents keep the parent fitness & swaps: delta evaluation applies.
+    offspring = ga.mutate(parents)
+    assert all(s.parent_f == p.f and len(s.swaps) == 1 for s, p in zip(offspring, parents))
+    evaluate_solutions(tracker, offspring)
+    assert all(s.evaluated for s in offspring)
+
+def test_mask_batch_distribution():
+    from .ga import (
+        generate_uniform_mask, generate_sequential_mask, generate_sequential_wrapping_mask,
+        generate_uniform_masks, generate_sequential_masks, generate_sequential_wrapping_masks,
+    )
+    from new_fns import KEYBOARD_SECTIONS, generate_keyboard_section_masks
+    l = 26
+    k = 4000
+    rng = np.random.default_rng(seed=42)
+    for scalar, batch in [
+        (lambda: generate_uniform_mask(rng, l, 0.2), lambda: generate_uniform_masks(rng, k, l, 0.2)),
+        (lambda: generate_sequential_mask(rng, l), lambda: generate_sequential_masks(rng, k, l)),
+        (lambda: generate_sequential_wrapping_mask(rng, l), lambda: generate_sequential_wrapping_masks(rng, k, l)),
+    ]:
+        masks = batch()
+        assert masks.shape == (k, l) and masks.dtype == bool
+        # The probability of each position being included, and the mean number of positions included, match.
+        expected = np.stack([scalar() for _ in range(k)])
+        np.testing.assert_allclose(masks.mean(axis=0), expected.mean(axis=0), atol=0.05)
+        assert abs(masks.sum(axis=1).mean() - expected.sum(axis=1).mean()) < 0.5
+
+    masks = generate_keyboard_section_masks(rng, k)
+    sections = [set(section) for section in KEYBOARD_SECTIONS]
+    assert all(set(np.flatnonzero(mask)) in sections for mask in masks)
+
+def test_recombinator_mask_function():
+    from .ga import FunctionBasedRecombinator, SequentialSelector, generate_uniform_masks
+    from .population import PopulationArray
+    l = 26
+    rng = np.random.default_rng(seed=42)
+    population = [Solution(rng.permutation(l)) for _ in range(16)]
+    for population_array in [False, True]:
+        recombinator = FunctionBasedRecombinator(
+            None, crossover_pmx, SequentialSelector(), 48, include_what="population",
+            mask_function=lambda k: generate_uniform_masks(rng, k, l, 0.5),
+        )
+        if population_array:
+            offspring = recombinator.recombine_array(rng, PopulationArray.from_solutions(population)).genotypes
+        else:
+            offspring = np.stack([s.e for s in recombinator.recombine(rng, population)])
+        assert len(offspring) == 48
+        assert np.all(np.sort(offspring, axis=1) == np.arange(l))
+
+def test_operators_preserve_compact_dtype():
+    from .ga import RandomPermutationInitialization
+    from .problem import permutation_dtype
+    from new_fns import (
+        crossover_pmx_predef_secs, swap_mutation, scramble_mutation, insertion_mutation, batch_mutation_functions,
+    )
+    assert permutation_dtype(26) == np.uint8 and permutation_dtype(256) == np.uint8
+    assert permutation_dtype(257) == np.uint16
+    rng = np.random.default_rng(seed=42)
+    for l in [26, 300]:
+        population = [Solution(None) for _ in range(8)]
+        RandomPermutationInitialization(l).initialize(rng, population)
+        dtype = population[0].e.dtype
+        assert dtype == permutation_dtype(l)
+        assert RandomPermutationInitialization(l).initialize_array(rng, 4).genotypes.dtype == dtype
+        x, y = population[0], population[1]
+        indices = np.flatnonzero(rng.random(l) < 0.5)
+        offspring = crossover_pmx(indices, x, y) + crossover_cx(indices, x, y) + crossover_ox(indices, x, y)
+        offspring += crossover_pmx_single_off(indices, x, y)
+        if l == 26:
+            offspring += crossover_pmx_predef_secs(x, y, rng)
+        for mutation in [swap_mutation, scramble_mutation, insertion_mutation]:
+            offspring.append(mutation(x, 1.0, rng))
+        for solution in offspring:
+            assert solution.e.dtype == dtype
+            assert np.array_equal(np.sort(solution.e), np.arange(l))
+        genotypes = np.stack([s.e for s in population])
+        masks = rng.random(genotypes[:4].shape) < 0.5
+        for crossover_batch in [crossover_pmx_batch, crossover_cx_batch, crossover_ox_batch, crossover_pmx_single_off_batch]:
+            assert all(r.dtype == dtype for r in crossover_batch(masks, genotypes[:4], genotypes[4:]))
+        for mutation_batch in batch_mutation_functions.values():
+            mutated = np.copy(genotypes)
+            mutation_batch(mutated, 1.0, rng)
+            assert mutated.dtype == dtype
+
+def test_solution_slots():
+    solution = Solution(np.arange(4, dtype=np.uint8))
+    assert not hasattr(solution, "__dict__")
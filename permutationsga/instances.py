@@ -0,0 +1,121 @@
+#
+# Load QAPLIB / TSPLIB instances through a binary cache.
+#
+# The first load of an instance parses the text file and stores each of its matrices as a .npy file, using the smallest
+# integer dtype that holds the values exactly, alongside a .json file containing the sha256 checksum of the source.
+# Later loads memory-map the .npy files (such that processes loading the same instance share pages), as long as
+# the checksum of the source still matches.
+#
+
+import hashlib
+import json
+import os
+import numpy as np
+from typing import Dict, Optional
+
+from .problem import compact_dtype
+from .qap import evaluate_qap, read_qaplib_tokens, read_qaplib_solution
+
+# Bump when the layout of the cache files changes.
+CACHE_FORMAT = 1
+
+
+def file_checksum(filename: str) -> str:
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_path(filename: str, cache_dir: Optional[str], suffix: str) -> str:
+    """
+    Path of a cache file of an instance, by default in a .cache directory next to it.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(filename)), ".cache")
+    return os.path.join(cache_dir, f"{os.path.basename(filename)}.{suffix}")
+
+
+def _write_atomic(path: str, write):
+    # Write to a temporary file first, such that concurrent loaders never see a partially written file.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def load_cached(filename: str, kind: str, parse, cache_dir: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Load the arrays parse(filename) (a dictionary of named arrays) through the cache, memory-mapped (read-only).
+
+    :param kind: type of instance, stored in the metadata, such that parsers do not use one another's cache.
+    """
+    meta_path = cache_path(filename, cache_dir, "json")
+    checksum = file_checksum(filename)
+    expected = {"format": CACHE_FORMAT, "kind": kind, "sha256": checksum}
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if {k: meta.get(k) for k in expected} == expected:
+            return {name: np.load(cache_path(filename, cache_dir, f"{name}.npy"), mmap_mode="r") for name in meta["arrays"]}
+    except (OSError, ValueError, KeyError):
+        # Missing or corrupt cache: rebuild it.
+        pass
+
+    arrays = parse(filename)
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    for name, values in arrays.items():
+        values = values.astype(compact_dtype(values))
+        _write_atomic(cache_path(filename, cache_dir, f"{name}.npy"), lambda f: np.save(f, values))
+    # The metadata is written last: it marks the cache as valid.
+    meta = json.dumps({**expected, "arrays": list(arrays)}).encode()
+    _write_atomic(meta_path, lambda f: f.write(meta))
+    return {name: np.load(cache_path(filename, cache_dir, f"{name}.npy"), mmap_mode="r") for name in arrays}
+
+
+def check_qaplib_solution(filename: str, l: int, A: np.ndarray, B: np.ndarray):
+    """
+    Verify that the solution (.sln) file next to a QAPLIB instance (if any) matches the instance.
+    """
+    sln_filename = os.path.splitext(filename)[0] + ".sln"
+    if not os.path.exists(sln_filename):
+        return
+    sln_l, value, perm = read_qaplib_solution(sln_filename)
+    if sln_l != l:
+        raise ValueError(f"{sln_filename} is for an instance of size {sln_l}, while {filename} has size {l}")
+    f = evaluate_qap(l, A.astype(np.float64), B.astype(np.float64), perm)
+    if not np.isclose(f, value):
+        raise ValueError(f"The solution in {sln_filename} has fitness {f} on {filename}, rather than {value}")
+
+
+def load_qaplib(filename: str, cache_dir: Optional[str] = None, check_solution: bool = True):
+    """
+    Load a QAPLIB instance through the cache, returns (l, A, B), like read_qaplib, but with
+    (read-only, memory-mapped) matrices of the smallest dtype that holds the instance exactly.
+
+    :param check_solution: whether to verify the optimal value in the .sln file next to the instance, if any.
+    """
+    def parse(filename):
+        _, A, B = read_qaplib_tokens(filename)
+        return {"A": A, "B": B}
+
+    arrays = load_cached(filename, "qaplib", parse, cache_dir)
+    A, B = arrays["A"], arrays["B"]
+    l = A.shape[0]
+    if check_solution:
+        check_qaplib_solution(filename, l, A, B)
+    return l, A, B
+
+
+def load_tsplib_distances(filename: str, cache_dir: Optional[str] = None) -> np.ndarray:
+    """
+    Load the (dense) distance matrix of a TSPLIB instance through the cache, (read-only, memory-mapped)
+    with the smallest dtype that holds the distances exactly. Cities are zero-based.
+    """
+    def parse(filename):
+        import tsplib95 as tsp # type: ignore
+        from .tsp import DenseTSP
+        return {"D": DenseTSP.from_tsplib(tsp.load(filename), dense_limit=np.iinfo(np.int64).max).D}
+
+    return load_cached(filename, "tsplib", parse, cache_dir)["D"]
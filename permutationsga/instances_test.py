@@ -0,0 +1,70 @@
+import shutil
+import numpy as np
+import pytest
+
+from .instances import load_qaplib, load_tsplib_distances
+from .tsp import DenseTSP
+from .qap import QAP, evaluate_qap, qap_delta_matrix, read_qaplib
+
+def test_load_qaplib_cache(tmp_path):
+    l, A, B = load_qaplib("./instances/qap/bur26a.dat", cache_dir=str(tmp_path))
+    assert A.dtype == np.uint8 and B.dtype == np.uint16
+    _, A_ref, B_ref = read_qaplib("./instances/qap/bur26a.dat")
+    np.testing.assert_array_equal(A, A_ref)
+    np.testing.assert_array_equal(B, B_ref)
+
+    # Second load: memory-mapped from the cache, with an identical objective.
+    l, A, B = load_qaplib("./instances/qap/bur26a.dat", cache_dir=str(tmp_path))
+    assert isinstance(A, np.memmap)
+    perm = np.random.default_rng(seed=42).permutation(l)
+    problem = QAP(l, A, B)
+    assert problem.A is A and problem.B is B
+    assert problem.evaluate_batch(perm[None, :])[0] == evaluate_qap(l, A_ref, B_ref, perm)
+    # Arithmetic on the compact matrices is widened, rather than wrapping around.
+    swapped = np.copy(perm)
+    swapped[[0, 1]] = swapped[[1, 0]]
+    expected = evaluate_qap(l, A_ref, B_ref, swapped) - evaluate_qap(l, A_ref, B_ref, perm)
+    assert problem.swap_delta(perm, 0, 1) == expected
+    assert qap_delta_matrix(A, B, perm, [0])[0, 1] == expected
+
+def test_load_qaplib_wrapped_rows(tmp_path):
+    # bur26c has matrix rows wrapped across lines, its optimum is verified against bur26c.sln.
+    l, A, B = load_qaplib("./instances/qap/bur26c.dat", cache_dir=str(tmp_path / "cache"))
+    assert l == 26
+
+def test_load_qaplib_detects_changes(tmp_path):
+    shutil.copy("./instances/qap/bur26a.dat", tmp_path / "inst.dat")
+    shutil.copy("./instances/qap/bur26a.sln", tmp_path / "inst.sln")
+    load_qaplib(str(tmp_path / "inst.dat"))
+    # A different instance under the same name: the cache is rebuilt, and no longer matches the solution.
+    shutil.copy("./instances/qap/bur26b.dat", tmp_path / "inst.dat")
+    with pytest.raises(ValueError):
+        load_qaplib(str(tmp_path / "inst.dat"))
+    _, A, _ = load_qaplib(str(tmp_path / "inst.dat"), check_solution=False)
+    np.testing.assert_array_equal(A, read_qaplib("./instances/qap/bur26b.dat")[1])
+
+def test_load_tsplib_distances(tmp_path):
+    (tmp_path / "square.tsp").write_text(
+        "NAME: square\nTYPE: TSP\nDIMENSION: 4\nEDGE_WEIGHT_TYPE: EUC_2D\nNODE_COORD_SECTION\n"
+        "1 0 0\n2 3 0\n3 3 4\n4 0 4\nEOF\n"
+    )
+    D = load_tsplib_distances(str(tmp_path / "square.tsp"))
+    assert D.dtype == np.uint8
+    np.testing.assert_array_equal(D[0], [0, 3, 5, 4])
+
+def test_dense_tsp_keeps_memmap(tmp_path):
+    # Sides of 150 & 200, and diagonals of 250: distances fit in uint8, tour lengths do not.
+    (tmp_path / "rect.tsp").write_text(
+        "NAME: rect\nTYPE: TSP\nDIMENSION: 4\nEDGE_WEIGHT_TYPE: EUC_2D\nNODE_COORD_SECTION\n"
+        "1 0 0\n2 150 0\n3 150 200\n4 0 200\nEOF\n"
+    )
+    load_tsplib_distances(str(tmp_path / "rect.tsp"), cache_dir=str(tmp_path / "cache"))
+    D = load_tsplib_distances(str(tmp_path / "rect.tsp"), cache_dir=str(tmp_path / "cache"))
+    assert isinstance(D, np.memmap) and D.dtype == np.uint8
+    problem = DenseTSP(D=D)
+    assert problem.D is D
+    tour = np.arange(4, dtype=np.uint8)
+    assert problem.tour_length(tour) == 700
+    assert problem.evaluate_batch(tour[None, :])[0] == 700
+    assert problem.swap_delta(tour, 1, 2) == 250 + 200 + 250 + 200 - 700
+    assert problem.two_opt_delta(tour, 0, 2) == 250 + 250 - 150 - 150
@@ -0,0 +1,213 @@
+#
+# Island model: run a GA per process, exchanging the best solutions of each island every few generations.
+#
+
+import multiprocessing
+import threading
+import numpy as np
+import pandas as pd
+from typing import Callable, List, Optional, Sequence, Union
+
+from .parallel import attach_shared_array, create_shared_array
+from .population import PopulationArray
+from .problem import Solution, VTRFound
+from .runner import job_seed_sequence
+import new_fns
+
+TOPOLOGIES = ["ring", "random", "fully_connected"]
+
+
+def migration_sources(topology: str, num_islands: int, epoch: int, seed: int) -> List[List[int]]:
+    """
+    For each island, the islands it receives migrants from in the given migration epoch.
+
+    The random topology is a ring over a random ordering of the islands, different in each epoch.
+    It is derived from (seed, epoch) only, such that all islands agree on it.
+    """
+    assert topology in TOPOLOGIES, f"Unknown topology {topology}, expected one of {TOPOLOGIES}"
+    if topology == "ring":
+        return [[(i - 1) % num_islands] for i in range(num_islands)]
+    if topology == "random":
+        order = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(2, epoch))).permutation(num_islands)
+        sources: List[List[int]] = [[] for _ in range(num_islands)]
+        for j in range(num_islands):
+            sources[order[j]] = [int(order[j - 1])]
+        return sources
+    return [[j for j in range(num_islands) if j != i] for i in range(num_islands)]
+
+
+def population_fitness(ga) -> np.ndarray:
+    if isinstance(ga.population, PopulationArray):
+        return ga.population.fitness
+    return np.array([solution.f for solution in ga.population], dtype=np.float64)
+
+
+def genotype_dtype(ga) -> np.dtype:
+    """
+    The dtype of the genotypes of a (not run) GA, obtained by initializing a single solution.
+    """
+    probe = Solution(None)
+    ga.initialization.initialize(np.random.default_rng(0), [probe])
+    return np.asarray(probe.e).dtype
+
+
+def emigrants(ga, k: int):
+    """
+    Genotypes & fitness of the best k solutions of the population of a GA.
+    """
+    best = np.argsort(population_fitness(ga), kind="stable")[:k]
+    if isinstance(ga.population, PopulationArray):
+        return ga.population.genotypes[best], ga.population.fitness[best]
+    return np.stack([ga.population[i].e for i in best]), population_fitness(ga)[best]
+
+
+def immigrate(ga, genotypes: np.ndarray, fitness: np.ndarray):
+    """
+    Replace the worst solutions of the population of a GA by the (already evaluated) immigrants.
+    """
+    worst = np.argsort(population_fitness(ga), kind="stable")[::-1][:len(genotypes)]
+    if isinstance(ga.population, PopulationArray):
+        ga.population.genotypes[worst] = genotypes
+        ga.population.fitness[worst] = fitness
+        ga.population.evaluated[worst] = True
+        return
+    phenotypes = ga.problem.decode_batch(genotypes)
+    for i, e, s, f in zip(worst, genotypes, phenotypes, fitness):
+        solution = Solution(np.copy(e))
+        solution.s = np.copy(s)
+        solution.f = f
+        solution.evaluated = True
+        ga.population[i] = solution
+
+
+def _run_island(
+    setup_ga: Callable, instance, island: int, island_seed: int, num_generations: int,
+    migration_interval: int, migration_size: int, topology: str, seed: int,
+    buffer_specs, shared_evaluations, barrier, stop, results,
+):
+    genotype_shm, genotype_buffer = attach_shared_array(buffer_specs[0])
+    fitness_shm, fitness_buffer = attach_shared_array(buffer_specs[1])
+    num_islands = len(fitness_buffer)
+
+    new_fns.set_rng(np.random.default_rng(job_seed_sequence(island_seed)))
+    tracker, ga = setup_ga(island_seed, instance)
+    tracker.shared_evaluations = shared_evaluations
+    try:
+        for generation in range(num_generations):
+            if stop.is_set():
+                break
+            ga.generation()
+            if num_islands == 1 or (generation + 1) % migration_interval != 0:
+                continue
+            # Publish the best solutions, wait until all islands have done so, take in migrants,
+            # and wait until all islands have done so before the buffers can be overwritten again.
+            genotype_buffer[island], fitness_buffer[island] = emigrants(ga, migration_size)
+            barrier.wait()
+            sources = migration_sources(topology, num_islands, generation // migration_interval, seed)[island]
+            candidates = np.concatenate([fitness_buffer[j] for j in sources])
+            chosen = np.argsort(candidates, kind="stable")[:migration_size]
+            immigrate(
+                ga,
+                np.concatenate([genotype_buffer[j] for j in sources])[chosen],
+                candidates[chosen],
+            )
+            barrier.wait()
+    except VTRFound:
+        # Let the other islands know they can stop.
+        stop.set()
+        barrier.abort()
+    except threading.BrokenBarrierError:
+        # Another island has stopped.
+        pass
+    except Exception as error:
+        # Stop all islands, and report the error.
+        stop.set()
+        barrier.abort()
+        results.put((island, error))
+        return
+    finally:
+        del genotype_buffer, fitness_buffer
+        genotype_shm.close()
+        fitness_shm.close()
+
+    history = tracker.elitist_history.copy()
+    history["island"] = island
+    results.put((island, history))
+
+
+def run_islands(
+    setup_ga: Union[Callable, Sequence[Callable]],
+    instance,
+    seed: int,
+    num_islands: int,
+    num_generations: int,
+    migration_interval: int = 5,
+    migration_size: int = 1,
+    topology: str = "ring",
+) -> pd.DataFrame:
+    """
+    Run num_islands GAs, each in their own process, for (at most) num_generations generations.
+    Every migration_interval generations, the best migration_size solutions of each island replace
+    the worst solutions of the islands it is connected to in the topology (ring, random, fully_connected).
+    Once an island reaches the value-to-reach, all islands stop.
+
+    :param setup_ga: function (seed, instance) -> (tracker, ga), like for run_experiment, or one per island.
+        Should be picklable, and set up an ElitistTracker.
+    :returns: the combined elitist history across all islands, in which #evaluations counts the evaluations
+        of all islands combined, with an "island" column. Its attrs contain the total number of evaluations.
+    """
+    assert topology in TOPOLOGIES, f"Unknown topology {topology}, expected one of {TOPOLOGIES}"
+    setups = list(setup_ga) if isinstance(setup_ga, Sequence) else [setup_ga] * num_islands
+    assert len(setups) == num_islands, "Expected a setup_ga function for each island."
+    island_seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(num_islands)]
+
+    # Determine the length & dtype of a genotype (e.g. floats for random keys), from a (not run) GA.
+    probe_tracker, probe_ga = setups[0](island_seeds[0], instance)
+    l = probe_tracker.get_length()
+
+    context = multiprocessing.get_context()
+    genotype_shm, _, genotype_spec = create_shared_array((num_islands, migration_size, l), genotype_dtype(probe_ga))
+    fitness_shm, _, fitness_spec = create_shared_array((num_islands, migration_size), np.float64)
+    shared_evaluations = context.Value("q", 0)
+    barrier = context.Barrier(num_islands)
+    stop = context.Event()
+    results = context.Queue()
+
+    processes = [
+        context.Process(target=_run_island, args=(
+            setups[island], instance, island, island_seeds[island], num_generations,
+            migration_interval, migration_size, topology, seed,
+            (genotype_spec, fitness_spec), shared_evaluations, barrier, stop, results,
+        ))
+        for island in range(num_islands)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        # Note: collect the results before joining, as a process only exits once its result was consumed.
+        histories = dict(results.get() for _ in processes)
+        for history in histories.values():
+            if isinstance(history, Exception):
+                raise history
+        for process in processes:
+            process.join()
+    finally:
+        genotype_shm.close()
+        genotype_shm.unlink()
+        fitness_shm.close()
+        fitness_shm.unlink()
+
+    return combine_histories([histories[island] for island in range(num_islands)], shared_evaluations.value)
+
+
+def combine_histories(histories: List[pd.DataFrame], num_evaluations: Optional[int] = None) -> pd.DataFrame:
+    """
+    Combine the elitist histories of islands (with #evaluations counted across islands) into a single one,
+    containing the rows that improve upon the best solution found by any island before.
+    """
+    combined = pd.concat(histories, ignore_index=True).sort_values("#evaluations", kind="stable")
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], combined["fitness"].to_numpy()[:-1]]))
+    combined = combined[combined["fitness"].to_numpy() < best_before].reset_index(drop=True)
+    if num_evaluations is not None:
+        combined.attrs["num_evaluations"] = num_evaluations
+    return combined
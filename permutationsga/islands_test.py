@@ -0,0 +1,78 @@
+import numpy as np
+
+from .ga import (
+    ConfigurableGA,
+    DifferentialEvolutionRecombinator,
+    RandomUniformInitialization,
+    RandomPermutationInitialization,
+    FunctionBasedRecombinator,
+    SequentialSelector,
+    TournamentSelection,
+    crossover_pmx,
+    generate_uniform_indices,
+)
+from .islands import emigrants, genotype_dtype, immigrate, migration_sources, run_islands
+from .problem import ElitistTracker, IdenticalDecoder, RandomKeysDecoder, Solution
+from .qap import QAP, read_qaplib
+
+def setup_ga(seed, instance):
+    problem = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib(f"./instances/qap/bur26{instance}.dat"))), 5426670)
+    l = problem.get_length()
+    rng = np.random.default_rng(seed=seed)
+    recombinator = FunctionBasedRecombinator(
+        lambda: generate_uniform_indices(rng, l, 0.5),
+        crossover_pmx,
+        SequentialSelector(),
+        2 * 16,
+        include_what="population",
+    )
+    ga = ConfigurableGA(seed, 16, problem, RandomPermutationInitialization(l), recombinator, TournamentSelection(), None)
+    return problem, ga
+
+def test_migration_sources():
+    assert migration_sources("ring", 3, 0, 42) == [[2], [0], [1]]
+    assert migration_sources("fully_connected", 3, 0, 42) == [[1, 2], [0, 2], [0, 1]]
+    for epoch in range(5):
+        sources = migration_sources("random", 4, epoch, 42)
+        # A ring over all islands: every island sends to exactly one other island.
+        assert sorted(s[0] for s in sources) == [0, 1, 2, 3]
+        assert all(s[0] != i for i, s in enumerate(sources))
+
+def test_run_islands():
+    history = run_islands(setup_ga, "a", 42, num_islands=3, num_generations=10, migration_interval=2, migration_size=2)
+    assert set(history["island"]) <= {0, 1, 2}
+    assert (np.diff(history["fitness"]) < 0).all()
+    assert (np.diff(history["#evaluations"]) > 0).all()
+    # Every island evaluates its initial population & 9 generations of 16 offspring, unless the vtr was reached.
+    assert history.attrs["num_evaluations"] <= 3 * 10 * 16
+    assert history.attrs["num_evaluations"] >= 3 * 16
+
+def setup_random_keys_ga(seed, instance):
+    problem = ElitistTracker(RandomKeysDecoder(QAP(*read_qaplib(f"./instances/qap/bur26{instance}.dat"))), 5426670)
+    l = problem.get_length()
+    ga = ConfigurableGA(
+        seed, 16, problem, RandomUniformInitialization(l), DifferentialEvolutionRecombinator(0.9, 0.5),
+        TournamentSelection(), None,
+    )
+    return problem, ga
+
+def test_migration_random_keys():
+    # Keys are floats: migrants keep their genotype (and as such, match their fitness).
+    sender_tracker, sender = setup_random_keys_ga(42, "a")
+    receiver_tracker, receiver = setup_random_keys_ga(43, "a")
+    assert genotype_dtype(sender) == np.float64
+    sender.generation()
+    receiver.generation()
+    buffer = np.zeros((2, 26), dtype=genotype_dtype(sender))
+    buffer[:], fitness = emigrants(sender, 2)
+    immigrate(receiver, buffer, fitness)
+    migrants = [s for s in receiver.population if any(np.array_equal(s.e, e) for e in buffer)]
+    assert len(migrants) == 2
+    for migrant in migrants:
+        check = Solution(np.copy(migrant.e))
+        receiver_tracker.evaluate(check)
+        assert check.f == migrant.f
+
+def test_run_islands_random_keys():
+    history = run_islands(setup_random_keys_ga, "a", 42, num_islands=2, num_generations=6, migration_interval=2)
+    assert (np.diff(history["fitness"]) < 0).all()
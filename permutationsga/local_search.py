@@ -0,0 +1,134 @@
+#
+# Local search on offspring (memetic algorithm): 2-swap descent using QAP swap deltas & don't-look bits.
+#
+
+import numpy as np
+from typing import List, Optional
+
+from .problem import ElitistTracker, Problem, Solution, find_problem
+from .qap import QAP, swap_delta_qap
+
+STRATEGIES = ["first", "best"]
+
+
+class SwapLocalSearch:
+    """
+    2-swap descent on the phenotype of (evaluated) solutions of a QAP.
+
+    Positions are visited in a random order. For a position r, the swaps with all other positions are
+    considered one at a time (O(l) per swap): with the "first" strategy, the scan (from r + 1, wrapping) stops at
+    the first improving swap, which is applied, with "best" the best one is applied. Don't-look bits: a position for which no improving swap exists is skipped,
+    until it is involved in a swap that is applied. As swaps change the deltas of other positions as well,
+    the result is (close to, rather than guaranteed to be) a local optimum.
+
+    A swap delta costs O(l), an evaluation O(l^2): l deltas are counted as one evaluation (equivalent) with
+    the ElitistTracker (if any), such that runs with and without local search use comparable budgets.
+
+    :param fraction: probability of improving each offspring.
+    :param budget: maximum number of evaluation-equivalents spent per offspring (None: until a local optimum).
+    """
+
+    def __init__(
+        self,
+        problem: Problem,
+        seed: int,
+        strategy: str = "first",
+        fraction: float = 1.0,
+        budget: Optional[float] = None,
+    ):
+        assert strategy in STRATEGIES, f"Unknown strategy {strategy}, expected one of {STRATEGIES}"
+        qap = find_problem(problem, QAP)
+        assert isinstance(qap, QAP), "Swap local search requires a QAP"
+        self.problem = problem
+        self.tracker = find_problem(problem, ElitistTracker)
+        self.A, self.B = qap.A, qap.B
+        self.l = qap.l
+        self.strategy = strategy
+        self.fraction = fraction
+        self.budget = budget
+        self.rng = np.random.default_rng(seed=seed)
+        # Deltas computed, but not yet counted as an evaluation.
+        self.pending_deltas = 0
+        self.num_deltas = 0
+
+    def get_state(self):
+        return {"rng": self.rng.bit_generator.state, "pending_deltas": self.pending_deltas, "num_deltas": self.num_deltas}
+
+    def set_state(self, state):
+        self.rng.bit_generator.state = state["rng"]
+        self.pending_deltas = state["pending_deltas"]
+        self.num_deltas = state["num_deltas"]
+
+    def descend(self, p: np.ndarray, f):
+        """
+        Improve permutation p (in place) with fitness f, returns (f, number of deltas computed).
+        """
+        l = self.l
+        max_deltas = np.inf if self.budget is None else self.budget * l
+        dont_look = np.zeros(l, dtype=bool)
+        num_deltas = 0
+        while num_deltas < max_deltas and not dont_look.all():
+            for r in self.rng.permutation(l):
+                if dont_look[r]:
+                    continue
+                if num_deltas >= max_deltas:
+                    break
+                # Other positions, in scan order, until the budget runs out: every delta computed is counted.
+                best_q, best_delta = None, 0
+                scanned = 0
+                while scanned < l - 1 and num_deltas < max_deltas:
+                    q = (r + 1 + scanned) % l
+                    delta = swap_delta_qap(self.A, self.B, p, r, q)
+                    num_deltas += 1
+                    scanned += 1
+                    if delta < best_delta:
+                        best_q, best_delta = q, delta
+                        if self.strategy == "first":
+                            break
+                if best_q is None:
+                    dont_look[r] = scanned == l - 1
+                    continue
+                f += best_delta
+                p[r], p[best_q] = p[best_q], p[r]
+                dont_look[r] = dont_look[best_q] = False
+        return f, num_deltas
+
+    def count(self, num_deltas: int) -> int:
+        """
+        Add num_deltas to the deltas computed, returns the number of (whole) evaluation-equivalents this completes.
+        """
+        self.num_deltas += num_deltas
+        self.pending_deltas += num_deltas
+        equivalents = self.pending_deltas // self.l
+        self.pending_deltas -= equivalents * self.l
+        return int(equivalents)
+
+    def improve(self, solution: Solution) -> Solution:
+        """
+        Improve an evaluated solution (in place), registering the result with the tracker.
+        """
+        assert solution.evaluated, "Evaluate solutions before improving them."
+        if solution.s is None:
+            solution.s = self.problem.decode_batch(np.asarray(solution.e)[None, :])[0]
+        p = np.array(solution.s, dtype=np.int64)
+        f, num_deltas = self.descend(p, solution.f)
+        equivalents = self.count(num_deltas)
+        if f < solution.f:
+            solution.e = self.problem.encode(np.copy(p))
+            solution.s = p
+            solution.f = f
+            solution.parent_f = None
+            solution.swaps = None
+        if self.tracker is not None:
+            self.tracker.register(solution, equivalents)
+        return solution
+
+    def improve_all(self, solutions: List[Solution]) -> List[Solution]:
+        """
+        Improve (a fraction of) the solutions.
+        """
+        chosen = self.rng.random(len(solutions)) < self.fraction
+        for solution, improve in zip(solutions, chosen):
+            if improve:
+                self.improve(solution)
+        return solutions
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from .ga import ConfigurableGA, FunctionBasedRecombinator, RandomPermutationInitialization, SequentialSelector, TournamentSelection
+from . import local_search as local_search_module
+from .local_search import SwapLocalSearch
+from .problem import ElitistTracker, IdenticalDecoder, InvPermDecoder, Solution
+from .qap import QAP, qap_delta_matrix, read_qaplib, swap_delta_qap
+from new_fns import crossover_pmx_predef_secs
+
+@pytest.mark.parametrize("strategy", ["first", "best"])
+def test_local_optimum(strategy, monkeypatch):
+    # Count the deltas actually computed.
+    calls = []
+    def counted_swap_delta(*args):
+        calls.append(args[3:])
+        return swap_delta_qap(*args)
+    monkeypatch.setattr(local_search_module, "swap_delta_qap", counted_swap_delta)
+    tracker = ElitistTracker(InvPermDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    local_search = SwapLocalSearch(tracker, 42, strategy=strategy)
+    solution = Solution(np.random.default_rng(seed=43).permutation(26))
+    tracker.evaluate(solution)
+    initial_f = solution.f
+    local_search.improve(solution)
+    assert solution.f < initial_f
+    # Swaps are only reconsidered for positions involved in an applied swap: few improving swaps remain.
+    qap = tracker.problem.problem
+    assert (qap_delta_matrix(qap.A, qap.B, solution.s) < 0).sum() <= 26
+    # Every delta computed is counted, and deltas are counted as evaluation-equivalents.
+    assert local_search.num_deltas == len(calls)
+    assert tracker.num_evaluations == 1 + local_search.num_deltas // 26
+    assert tracker.current_elitist.f == solution.f
+    check = Solution(np.copy(solution.e))
+    tracker.evaluate(check)
+    assert check.f == solution.f
+
+def test_budget():
+    tracker = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    local_search = SwapLocalSearch(tracker, 42, budget=2)
+    solution = Solution(np.random.default_rng(seed=43).permutation(26))
+    tracker.evaluate(solution)
+    local_search.improve(solution)
+    assert local_search.num_deltas == 2 * 26
+    assert tracker.num_evaluations == 3
+
+@pytest.mark.parametrize("population_array", [False, True])
+def test_memetic_ga(population_array):
+    tracker = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    recombinator = FunctionBasedRecombinator(
+        None, crossover_pmx_predef_secs, SequentialSelector(), 2 * 16, include_what="population"
+    )
+    local_search = SwapLocalSearch(tracker, 44, fraction=0.5, budget=4)
+    ga = ConfigurableGA(
+        42, 16, tracker, RandomPermutationInitialization(26), recombinator, TournamentSelection(), None,
+        population_array=population_array, local_search=local_search,
+    )
+    for _ in range(3):
+        ga.generation()
+    # 16 initial evaluations, 16 offspring per generation, and at most 4 evaluation-equivalents per improved offspring.
+    assert 16 + 2 * 16 < tracker.num_evaluations <= 16 + 2 * 16 * 5
+    fitness = ga.population.fitness if population_array else [s.f for s in ga.population]
+    assert min(fitness) == tracker.current_elitist.f
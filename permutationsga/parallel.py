@@ -0,0 +1,177 @@
+#
+# Evaluation of batches of solutions across a persistent pool of worker processes.
+#
+
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+from .problem import Problem, Solution
+
+# Specification of an array in shared memory: (name of the shared memory block, shape, dtype)
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+
+
+def attach_shared_array(spec: ArraySpec) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """
+    Attach to an array in shared memory that was created by another process.
+    """
+    name, shape, dtype = spec
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False) # type: ignore
+    except TypeError:
+        # Python < 3.13 cannot opt out of tracking, which would clean up the block when this process exits,
+        # while its creator still owns it. Skip registration instead.
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def create_shared_array(shape: Tuple[int, ...], dtype) -> Tuple[shared_memory.SharedMemory, np.ndarray, ArraySpec]:
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf), (shm.name, shape, dtype.str)
+
+
+# State of a worker process
+_worker_problem: Optional[Problem] = None
+# Keeps the blocks of the problem attached for as long as the worker lives.
+_worker_problem_blocks = []
+# Attached buffers for solutions & fitness, by name.
+_worker_buffers: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+
+def _init_worker(problem_type, problem_specs: Dict[str, ArraySpec]):
+    global _worker_problem
+    arrays = {}
+    for key, spec in problem_specs.items():
+        shm, arrays[key] = attach_shared_array(spec)
+        _worker_problem_blocks.append(shm)
+    _worker_problem = problem_type.from_shared_arrays(arrays)
+
+
+def _worker_buffers_for(specs):
+    if any(spec[0] not in _worker_buffers for spec in specs):
+        # Buffers have been reallocated: detach from the old ones.
+        for name in list(_worker_buffers.keys()):
+            shm, _ = _worker_buffers.pop(name)
+            shm.close()
+        for spec in specs:
+            _worker_buffers[spec[0]] = attach_shared_array(spec)
+    return [_worker_buffers[spec[0]][1] for spec in specs]
+
+
+def _evaluate_chunk(task: Tuple[ArraySpec, ArraySpec, int, int]):
+    input_spec, output_spec, start, stop = task
+    assert _worker_problem is not None, "Worker was not initialized."
+    solutions, fitness = _worker_buffers_for([input_spec, output_spec])
+    fitness[start:stop] = _worker_problem.evaluate_batch(solutions[start:stop])
+
+
+class ParallelEvaluator(Problem):
+    """
+    Evaluate large batches of (decoded) solutions across a persistent pool of worker processes.
+
+    The data of the problem (see e.g. QAP.shared_arrays) is placed in shared memory once, upon construction.
+    Solutions and fitness values are exchanged through shared buffers too, such that only the bounds of
+    each chunk are sent to the workers. Batches smaller than threshold are evaluated in this process.
+
+    Place between decoder and problem, e.g. ElitistTracker(IdenticalDecoder(ParallelEvaluator(problem)), vtr),
+    and use ConfigurableGA with population_array=True, such that offspring are evaluated as a batch.
+    Call close() (or use as a context manager) to stop the workers and release the shared memory.
+    """
+
+    def __init__(self, problem: Problem, processes: Optional[int] = None, threshold: int = 1024):
+        assert hasattr(problem, "shared_arrays"), "Problem should provide shared_arrays & from_shared_arrays."
+        self.problem = problem
+        self.threshold = threshold
+        self.processes = processes if processes is not None else multiprocessing.cpu_count()
+
+        self._blocks = []
+        problem_specs = {}
+        for key, array in problem.shared_arrays().items(): # type: ignore
+            shm, shared, problem_specs[key] = create_shared_array(array.shape, array.dtype)
+            shared[...] = array
+            del shared
+            self._blocks.append(shm)
+
+        # Buffers for solutions & fitness, (re)allocated as needed.
+        self._capacity = 0
+        self._buffer_blocks = []
+        self._solutions = np.zeros((0, problem.get_length()), dtype=np.int64)
+        self._fitness = np.zeros(0)
+        self._buffer_specs: Tuple[ArraySpec, ...] = ()
+
+        self._pool = multiprocessing.get_context().Pool(
+            self.processes, initializer=_init_worker, initargs=(type(problem), problem_specs)
+        )
+
+    def get_length(self):
+        return self.problem.get_length()
+
+    def evaluate(self, sol: Solution):
+        return self.problem.evaluate(sol)
+
+    def _ensure_capacity(self, n: int):
+        if n <= self._capacity:
+            return
+        self._release_buffers()
+        self._capacity = max(n, 2 * self._capacity)
+        solutions_block, self._solutions, solutions_spec = create_shared_array((self._capacity, self.get_length()), np.int64)
+        fitness_block, self._fitness, fitness_spec = create_shared_array((self._capacity,), np.float64)
+        self._buffer_blocks = [solutions_block, fitness_block]
+        self._buffer_specs = (solutions_spec, fitness_spec)
+
+    def evaluate_batch(self, e: np.ndarray) -> np.ndarray:
+        if len(e) < self.threshold:
+            return self.problem.evaluate_batch(e)
+
+        n = len(e)
+        self._ensure_capacity(n)
+        self._solutions[:n] = e
+
+        # Use a few chunks per worker, to balance the load.
+        bounds = np.linspace(0, n, min(n, 4 * self.processes) + 1).astype(int)
+        tasks = [
+            (self._buffer_specs[0], self._buffer_specs[1], start, stop)
+            for start, stop in zip(bounds[:-1], bounds[1:]) if start < stop
+        ]
+        self._pool.map(_evaluate_chunk, tasks)
+        return np.copy(self._fitness[:n])
+
+    def decode_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.decode_batch(e)
+
+    def _release_buffers(self):
+        # Drop the views on the buffers first, a block cannot be closed while they exist.
+        self._solutions = np.zeros((0, self.get_length()), dtype=np.int64)
+        self._fitness = np.zeros(0)
+        for shm in self._buffer_blocks:
+            shm.close()
+            shm.unlink()
+        self._buffer_blocks = []
+        self._capacity = 0
+
+    def close(self):
+        if self._pool is None:
+            return
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+        self._release_buffers()
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
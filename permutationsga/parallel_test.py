@@ -0,0 +1,16 @@
+import numpy as np
+
+from .parallel import ParallelEvaluator
+from .qap import QAP, read_qaplib
+
+def test_parallel_evaluator_matches_serial():
+    problem = QAP(*read_qaplib("./instances/qap/bur26a.dat"))
+    rng = np.random.default_rng(seed=42)
+    perms = np.stack([rng.permutation(26) for _ in range(100)])
+    perms[3, 0] = perms[3, 1]
+
+    with ParallelEvaluator(problem, processes=2, threshold=10) as evaluator:
+        # Both below and above the threshold, and with reallocation of the buffers.
+        np.testing.assert_array_equal(evaluator.evaluate_batch(perms[:5]), problem.evaluate_batch(perms[:5]))
+        np.testing.assert_array_equal(evaluator.evaluate_batch(perms[:50]), problem.evaluate_batch(perms[:50]))
+        np.testing.assert_array_equal(evaluator.evaluate_batch(perms), problem.evaluate_batch(perms))
@@ -0,0 +1,201 @@
+#
+# Array-backed population representation, and adapters for operators working on List[Solution].
+#
+
+import numpy as np
+import numpy.typing as npt
+from typing import Dict, List, Optional, Tuple
+
+from .problem import Problem, Solution
+
+
+class PopulationArray:
+    """
+    A population stored as a single contiguous (pop, l) matrix of genotypes,
+    with the fitness & evaluation status of each solution in parallel 1-D arrays.
+    """
+
+    def __init__(self, genotypes: np.ndarray, fitness=None, evaluated=None):
+        self.genotypes = genotypes
+        self.fitness: npt.NDArray[np.float64] = np.full(len(genotypes), np.inf) if fitness is None else fitness
+        self.evaluated: npt.NDArray[np.bool_] = np.zeros(len(genotypes), dtype=bool) if evaluated is None else evaluated
+
+    def __len__(self):
+        return len(self.genotypes)
+
+    def take(self, indices: npt.NDArray[np.int_]) -> "PopulationArray":
+        """
+        Create a new population consisting of the solutions at indices (duplicates allowed).
+        """
+        return PopulationArray(self.genotypes[indices], self.fitness[indices], self.evaluated[indices])
+
+    @staticmethod
+    def concatenate(populations: List["PopulationArray"]) -> "PopulationArray":
+        return PopulationArray(
+            np.concatenate([p.genotypes for p in populations]),
+            np.concatenate([p.fitness for p in populations]),
+            np.concatenate([p.evaluated for p in populations]),
+        )
+
+    def to_solutions(self) -> List[Solution]:
+        """
+        Convert to a list of solutions, for use with operators that do not support arrays.
+
+        Note: the genotypes of the resulting solutions are views into this population.
+        """
+        solutions = []
+        for e, f, evaluated in zip(self.genotypes, self.fitness, self.evaluated):
+            solution = Solution(e)
+            solution.f = float(f)
+            solution.evaluated = bool(evaluated)
+            solutions.append(solution)
+        return solutions
+
+    @staticmethod
+    def from_solutions(solutions: List[Solution]) -> "PopulationArray":
+        assert all(s.e is not None for s in solutions), "Ensure all solutions are initialized before use."
+        return PopulationArray(
+            np.stack([s.e for s in solutions]), # type: ignore
+            np.array([s.f for s in solutions], dtype=np.float64),
+            np.array([s.evaluated for s in solutions], dtype=bool),
+        )
+
+
+# The functions below dispatch to the array-based implementation of an operator if it provides one,
+# and fall back to its List[Solution]-based implementation otherwise.
+
+def initialize_population(initialization, rng: np.random.Generator, population_size: int) -> PopulationArray:
+    if hasattr(initialization, "initialize_array"):
+        return initialization.initialize_array(rng, population_size)
+
+    population = [Solution(None) for _ in range(population_size)]
+    initialization.initialize(rng, population)
+    return PopulationArray.from_solutions(population)
+
+
+def recombine_population(recombinator, rng: np.random.Generator, population: PopulationArray) -> PopulationArray:
+    if hasattr(recombinator, "recombine_array"):
+        return recombinator.recombine_array(rng, population)
+
+    return PopulationArray.from_solutions(recombinator.recombine(rng, population.to_solutions()))
+
+
+def select_population(selection, rng: np.random.Generator, population: PopulationArray, num_to_select: int) -> npt.NDArray[np.int_]:
+    """
+    Select num_to_select solutions from population, returns their indices.
+    """
+    if hasattr(selection, "select_indices"):
+        return selection.select_indices(rng, population.fitness, num_to_select)
+
+    solutions = population.to_solutions()
+    index_of = {id(s): i for i, s in enumerate(solutions)}
+    selected = selection.select(rng, solutions, num_to_select)
+    return np.array([index_of[id(s)] for s in selected], dtype=np.int64)
+
+
+def evaluate_population(problem: Problem, population: PopulationArray):
+    """
+    Evaluate all solutions in the population that have not been evaluated yet.
+    """
+    todo = np.flatnonzero(~population.evaluated)
+    if len(todo) == 0:
+        return
+    population.fitness[todo] = problem.evaluate_batch(population.genotypes[todo])
+    population.evaluated[todo] = True
+
+
+def evaluate_solutions(problem: Problem, solutions: List[Solution]):
+    """
+    Evaluate all solutions that have not been evaluated yet: those that can be delta-evaluated one by one,
+    the others as a single batch (decoded at once, see decode_batch).
+
+    The phenotype (s) of batch-evaluated solutions is set as well (decoded once, see evaluate_decode_batch),
+    such that later stages (e.g. local search) do not need to decode them again.
+
+    Note: unlike with evaluate, batch-evaluated solutions that are invalid (fitness np.inf) are marked
+    as evaluated too, like in population array mode.
+    """
+    todo = [solution for solution in solutions if not solution.evaluated]
+    batch = [solution for solution in todo if solution.parent_f is None]
+    if len(batch) > 0:
+        genotypes = np.stack([solution.e for solution in batch]) # type: ignore
+        f, phenotypes = problem.evaluate_decode_batch(genotypes)
+        for solution, fitness, s in zip(batch, f, phenotypes):
+            solution.f = fitness
+            solution.s = s
+            solution.evaluated = True
+    for solution in todo:
+        if not solution.evaluated:
+            problem.evaluate(solution)
+
+
+def mutate_population(batch_mutation_fn, rng: np.random.Generator, population: PopulationArray, mutation_probability):
+    """
+    Mutate the genotypes of the population in place, marking the rows that changed as not evaluated.
+
+    Note: the swaps performed are not kept, changed rows are evaluated in full.
+    """
+    changed, _ = batch_mutation_fn(population.genotypes, mutation_probability, rng)
+    population.fitness[changed] = np.inf
+    population.evaluated[changed] = False
+
+
+def genotype_keys(genotypes: np.ndarray) -> List[bytes]:
+    """
+    A hashable key per genotype (row): its bytes, packed as uint8 for permutations of up to 256 elements.
+    """
+    if genotypes.dtype.kind in "iu" and genotypes.shape[1] <= 256:
+        genotypes = genotypes.astype(np.uint8)
+    else:
+        genotypes = np.ascontiguousarray(genotypes)
+    return [row.tobytes() for row in genotypes]
+
+
+def deduplicate_genotypes(
+    genotypes: np.ndarray, rng: Optional[np.random.Generator] = None, max_attempts: int = 10
+) -> Tuple[npt.NDArray[np.int_], npt.NDArray[np.int_], Dict[int, List[Tuple[int, int]]]]:
+    """
+    Find the unique genotypes (rows), in O(n l) using a set. Later occurrences of a genotype are clones.
+
+    If rng is provided, clones are regenerated (in place) by performing random swaps, until they are unique,
+    for at most max_attempts swaps.
+
+    :returns: indices of the unique rows and of the remaining clones (both in order), and the swaps
+        performed on each regenerated row.
+    """
+    l = genotypes.shape[1]
+    seen = set()
+    unique, clones = [], []
+    swaps: Dict[int, List[Tuple[int, int]]] = {}
+    for i, key in enumerate(genotype_keys(genotypes)):
+        if key in seen and rng is not None and l > 1:
+            row_swaps = []
+            for _ in range(max_attempts):
+                a, b = rng.choice(l, 2, replace=False)
+                genotypes[i, a], genotypes[i, b] = genotypes[i, b], genotypes[i, a]
+                row_swaps.append((int(a), int(b)))
+                key = genotype_keys(genotypes[i:i + 1])[0]
+                if key not in seen:
+                    break
+            swaps[i] = row_swaps
+        if key in seen:
+            clones.append(i)
+            continue
+        seen.add(key)
+        unique.append(i)
+    return np.array(unique, dtype=np.int64), np.array(clones, dtype=np.int64), swaps
+
+
+def improve_population(local_search, population: PopulationArray, indices: npt.NDArray[np.int_]):
+    """
+    Improve the (evaluated) solutions at indices using a local search, in place.
+    """
+    if len(indices) == 0:
+        return
+    if hasattr(local_search, "improve_array"):
+        local_search.improve_array(population, indices)
+        return
+
+    solutions = local_search.improve_all(population.take(indices).to_solutions())
+    population.genotypes[indices] = np.stack([s.e for s in solutions])
+    population.fitness[indices] = [s.f for s in solutions]
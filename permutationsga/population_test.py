@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from .ga import (
+    ConfigurableGA,
+    RandomPermutationInitialization,
+    FunctionBasedRecombinator,
+    SequentialSelector,
+    TournamentSelection,
+    crossover_pmx,
+    generate_uniform_indices,
+)
+from .population import PopulationArray, evaluate_solutions
+from .problem import ElitistTracker, IdenticalDecoder, InvPermDecoder, RandomKeysDecoder, Solution, invperm_batch
+from .qap import QAP, read_qaplib
+from new_fns import crossover_pmx_predef_secs
+
+def run_ga(population_array: bool, generations: int = 5):
+    problem = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    l = problem.get_length()
+    rng = np.random.default_rng(seed=43)
+    recombinator = FunctionBasedRecombinator(
+        lambda: generate_uniform_indices(rng, l, 0.5),
+        crossover_pmx,
+        SequentialSelector(),
+        2 * 64,
+        include_what="population",
+    )
+    ga = ConfigurableGA(
+        42, 64, problem, RandomPermutationInitialization(l), recombinator, TournamentSelection(), None,
+        population_array=population_array,
+    )
+    for _ in range(generations):
+        ga.generation()
+    return problem, ga
+
+def test_population_array_roundtrip():
+    solutions = [Solution(np.arange(5)), Solution(np.arange(5)[::-1])]
+    solutions[1].f = 3.0
+    solutions[1].evaluated = True
+
+    population = PopulationArray.from_solutions(solutions)
+    np.testing.assert_array_equal(population.fitness, [np.inf, 3.0])
+    np.testing.assert_array_equal(population.evaluated, [False, True])
+
+    back = population.to_solutions()
+    np.testing.assert_array_equal(back[1].e, solutions[1].e)
+    assert back[1].f == 3.0 and back[1].evaluated
+
+def test_population_array_mode_matches_list_mode():
+    tracker_list, ga_list = run_ga(False)
+    tracker_array, ga_array = run_ga(True)
+
+    np.testing.assert_array_equal(np.stack([s.e for s in ga_list.population]), ga_array.population.genotypes)
+    np.testing.assert_array_equal([s.f for s in ga_list.population], ga_array.population.fitness)
+    assert tracker_list.num_evaluations == tracker_array.num_evaluations
+    assert tracker_list.current_elitist.f == tracker_array.current_elitist.f
+
+@pytest.mark.parametrize("random_keys", [False, True])
+def test_evaluate_solutions_sets_phenotype(random_keys, monkeypatch):
+    decoder = (RandomKeysDecoder if random_keys else InvPermDecoder)(QAP(*read_qaplib("./instances/qap/bur26a.dat")))
+    problem = ElitistTracker(decoder, None)
+    rng = np.random.default_rng(seed=42)
+    solutions = [Solution(rng.random(26) if random_keys else rng.permutation(26)) for _ in range(4)]
+    expected = [np.argsort(s.e, kind="stable") if random_keys else invperm_batch(s.e[None, :])[0] for s in solutions]
+    # Each solution is decoded once, while being evaluated.
+    def decode_again(e):
+        raise AssertionError("Decoded twice")
+    monkeypatch.setattr(decoder, "decode_batch", decode_again)
+    evaluate_solutions(problem, solutions)
+    for solution, s in zip(solutions, expected):
+        assert solution.evaluated
+        np.testing.assert_array_equal(solution.s, s)
+        check = Solution(np.copy(solution.e))
+        decoder.evaluate(check)
+        assert check.f == solution.f
+    np.testing.assert_array_equal(problem.current_elitist.s, solutions[np.argmin([s.f for s in solutions])].s)
+
+def test_deduplicate_genotypes():
+    from .population import deduplicate_genotypes
+    rng = np.random.default_rng(seed=42)
+    genotypes = np.stack([rng.permutation(10) for _ in range(5)])
+    genotypes = np.concatenate([genotypes, genotypes[[0, 2, 0]]])
+    unique, clones, swaps = deduplicate_genotypes(np.copy(genotypes))
+    np.testing.assert_array_equal(unique, np.arange(5))
+    np.testing.assert_array_equal(clones, [5, 6, 7])
+    assert swaps == {}
+
+    regenerated = np.copy(genotypes)
+    unique, clones, swaps = deduplicate_genotypes(regenerated, rng)
+    assert len(unique) == 8 and len(clones) == 0
+    assert len({row.tobytes() for row in regenerated}) == 8
+    for i, row_swaps in swaps.items():
+        row = np.copy(genotypes[i])
+        for a, b in row_swaps:
+            row[a], row[b] = row[b], row[a]
+        np.testing.assert_array_equal(row, regenerated[i])
+
+@pytest.mark.parametrize("deduplication", ["reject", "regenerate"])
+@pytest.mark.parametrize("population_array", [False, True])
+def test_deduplication(deduplication, population_array):
+    problem = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    l = problem.get_length()
+    recombinator = FunctionBasedRecombinator(
+        None, crossover_pmx_predef_secs, SequentialSelector(), 2 * 32, include_what="population"
+    )
+    ga = ConfigurableGA(
+        42, 32, problem, RandomPermutationInitialization(l), recombinator, TournamentSelection(), None,
+        population_array=population_array, deduplication=deduplication,
+    )
+    for _ in range(10):
+        ga.generation()
+        if isinstance(ga.population, PopulationArray):
+            genotypes = ga.population.genotypes
+        else:
+            genotypes = np.stack([s.e for s in ga.population])
+        assert len(genotypes) == 32
+    assert ga.num_unique is not None and ga.num_unique >= 32
@@ -1,26 +1,82 @@
-from typing import Optional
+from typing import List, Optional, Tuple
+from collections import OrderedDict
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import datetime
+import hashlib
+
+def permutation_dtype(l: int) -> np.dtype:
+    """
+    Smallest (unsigned) integer dtype that can hold a permutation of length l.
+    """
+    if l <= 2**8:
+        return np.dtype(np.uint8)
+    if l <= 2**16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.int64)
 
 class Solution:
     """
     Dataclass for containing the current solution (permutation) & corresponding fitness (if evaluated)
     """
 
+    # Note: slotted, as populations (and archives) can contain many solutions.
+    __slots__ = ("evaluated", "e", "s", "f", "parent_f", "swaps")
+
     def __init__(self, e: Optional[np.ndarray]):
         self.evaluated = False
         self.e = e # encoded format
         self.s: Optional[np.ndarray] = None # actual solution: decoded format (for this assignment: always a permutation)
         self.f = np.inf # fitness
+        # (Optional) fitness of the parent, and the swaps (pairs of positions) that turn the genotype of
+        # the parent into this one. If set, the problem may apply deltas instead of evaluating from scratch.
+        self.parent_f: Optional[float] = None
+        self.swaps: Optional[List[Tuple[int, int]]] = None
 
 def copy_solution(s: Solution) -> Solution:
     r = Solution(s.e)
     r.s = s.s
     r.f = s.f
     r.evaluated = s.evaluated
+    r.parent_f = s.parent_f
+    r.swaps = s.swaps
     return r
 
+def swapped_solution(parent: Solution, e: np.ndarray, swaps: List[Tuple[int, int]]) -> Solution:
+    """
+    Create a solution with genotype e, obtained by applying swaps (in order) to the genotype of parent.
+
+    If the fitness of the parent is known, the child keeps track of it (and the swaps performed)
+    such that it can be delta-evaluated.
+    """
+    r = Solution(e)
+    if parent.evaluated:
+        r.parent_f = parent.f
+        r.swaps = list(swaps)
+    elif parent.parent_f is not None and parent.swaps is not None:
+        # Parent was derived from an evaluated solution itself: chain the swaps.
+        r.parent_f = parent.parent_f
+        r.swaps = parent.swaps + list(swaps)
+    return r
+
+def swaps_through_inverse(inv: np.ndarray, swaps: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Translate swaps of the entries of a permutation to swaps of the positions of its inverse.
+
+    Swapping entries r and q of a permutation p swaps positions p[r] and p[q] of its inverse.
+    :param inv: the inverse of the permutation obtained after performing all swaps
+    :param swaps: the swaps performed, in order.
+    """
+    inv = np.copy(inv)
+    translated = []
+    # Replay the swaps backwards, such that each swap is translated using the state right after it.
+    for r, q in reversed(swaps):
+        translated.append((inv[r], inv[q]))
+        inv[r], inv[q] = inv[q], inv[r]
+    translated.reverse()
+    return translated
+
 
 class Problem:
     def get_length(self):
@@ -29,6 +85,43 @@ class Problem:
     def evaluate(self, solution: Solution):
         return 0.0
 
+    def evaluate_batch(self, e: np.ndarray) -> np.ndarray:
+        """
+        Evaluate a (pop, l) matrix of solutions (one per row), returns the fitness of each row.
+
+        By default, each row is evaluated as a separate solution. Override for a faster implementation.
+        """
+        f = np.empty(len(e))
+        for i in range(len(e)):
+            sol = Solution(e[i])
+            # Set both, such that this works for problems as well as decoders.
+            sol.s = e[i]
+            f[i] = self.evaluate(sol)
+        return f
+
+    def decode_batch(self, e: np.ndarray) -> np.ndarray:
+        """
+        Decode a (pop, l) matrix of solutions (one per row) into the format the problem expects.
+        """
+        return e
+
+    def evaluate_decode_batch(self, e: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate & decode a (pop, l) matrix of solutions, returns (fitness, phenotypes).
+
+        Decoders override this, such that each row is decoded only once.
+        """
+        return self.evaluate_batch(e), self.decode_batch(e)
+
+    def encode(self, s: np.ndarray) -> np.ndarray:
+        """
+        Inverse of decoding: a solution that decodes to s, the format the (innermost) problem expects.
+        """
+        problem = getattr(self, "problem", None)
+        if isinstance(problem, Problem):
+            return problem.encode(s)
+        return np.asarray(s, dtype=permutation_dtype(len(s)))
+
 
 class IdenticalDecoder(Problem):
     """
@@ -46,8 +139,24 @@ class IdenticalDecoder(Problem):
             return sol.s
 
         sol.s = sol.e
+        # Note: swaps on the genotype are swaps on the phenotype as well.
         return self.problem.evaluate(sol)
 
+    def evaluate_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.evaluate_batch(e)
+
+    def decode_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.decode_batch(e)
+
+    def evaluate_decode_batch(self, e: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.problem.evaluate_decode_batch(e)
+
+def is_valid_permutation_batch(l: int, perms: npt.NDArray[np.int_]) -> npt.NDArray[np.bool_]:
+    """
+    Determine for each row of perms whether it is a valid permutation of 0..(l-1).
+    """
+    return (np.sort(perms, axis=1) == np.arange(l)).all(axis=1)
+
 def invperm(permutation):
     """
     Invert a permutation
@@ -58,6 +167,15 @@ def invperm(permutation):
     inv[permutation] = np.arange(len(inv), dtype=inv.dtype)
     return inv
 
+def invperm_batch(permutations: np.ndarray) -> np.ndarray:
+    """
+    Invert each row of a (k, l) matrix of permutations.
+    """
+    k, l = permutations.shape
+    inv = np.empty_like(permutations)
+    inv[np.arange(k)[:, None], permutations] = np.arange(l, dtype=inv.dtype)
+    return inv
+
 class InvPermDecoder(Problem):
     """
     Encoded solution is the inverse permutation of the actual solution.
@@ -75,8 +193,23 @@ class InvPermDecoder(Problem):
             return sol.s
 
         sol.s = invperm(sol.e)
+        if sol.swaps is not None:
+            # As the genotype is the inverse of the phenotype, translation is straightforward.
+            sol.swaps = swaps_through_inverse(sol.e, sol.swaps)
         return self.problem.evaluate(sol)
 
+    def encode(self, s: np.ndarray) -> np.ndarray:
+        return invperm(self.problem.encode(s))
+
+    def decode_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.decode_batch(invperm_batch(e))
+
+    def evaluate_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.evaluate_batch(self.decode_batch(e))
+
+    def evaluate_decode_batch(self, e: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.problem.evaluate_decode_batch(invperm_batch(e))
+
 class RandomKeysDecoder(Problem):
     """
     Solution is encoded in random keys, decode first, then evaluate.
@@ -94,39 +227,276 @@ class RandomKeysDecoder(Problem):
 
         assert sol.e is not None, "Ensure solution sol is initialized before use."
 
-        sol.s = np.argsort(sol.e)
+        # Note: stable, such that ties are broken by position, as in decode_batch.
+        sol.s = np.argsort(sol.e, kind="stable")
+        if sol.swaps is not None:
+            # Swapping two keys swaps their ranks, the inverse of the phenotype.
+            sol.swaps = swaps_through_inverse(invperm(sol.s), sol.swaps)
         return self.problem.evaluate(sol)
 
+    def decode_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.decode_batch(np.argsort(e, axis=1, kind="stable"))
+
+    def encode(self, s: np.ndarray) -> np.ndarray:
+        # Evenly spaced keys, ranked such that sorting them yields the permutation.
+        p = self.problem.encode(s)
+        keys = np.empty(len(p), dtype=np.float64)
+        keys[p] = (np.arange(len(p)) + 0.5) / len(p)
+        return keys
+
+    def evaluate_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.evaluate_batch(self.decode_batch(e))
+
+    def evaluate_decode_batch(self, e: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.problem.evaluate_decode_batch(np.argsort(e, axis=1, kind="stable"))
+
+def compact_dtype(a: np.ndarray) -> np.dtype:
+    """
+    Smallest dtype that can exactly hold all values of a (non-integer arrays keep their dtype).
+    """
+    if a.dtype.kind not in "iu" or a.size == 0:
+        return a.dtype
+    return np.result_type(np.min_scalar_type(a.min()), np.min_scalar_type(a.max()))
+
+class GrowableArray:
+    """
+    Append-only array of rows with a fixed shape, backed by a buffer that doubles in capacity when full.
+    """
+
+    def __init__(self, shape=(), dtype=np.float64, capacity: int = 16):
+        self.buffer = np.empty((capacity,) + tuple(shape), dtype=dtype)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, value):
+        if self.size == len(self.buffer):
+            grown = np.empty((2 * len(self.buffer),) + self.buffer.shape[1:], dtype=self.buffer.dtype)
+            grown[:self.size] = self.buffer[:self.size]
+            self.buffer = grown
+        if isinstance(value, np.ndarray) and self.buffer.dtype.kind in "iu":
+            # Widen the buffer if the value does not fit.
+            dtype = np.result_type(self.buffer.dtype, compact_dtype(value))
+            if dtype != self.buffer.dtype:
+                self.buffer = self.buffer.astype(dtype)
+        self.buffer[self.size] = value
+        self.size += 1
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.buffer[:self.size]
+
+    @staticmethod
+    def from_values(values: np.ndarray) -> "GrowableArray":
+        array = GrowableArray(values.shape[1:], values.dtype, capacity=max(16, len(values)))
+        array.buffer[:len(values)] = values
+        array.size = len(values)
+        return array
+
+def find_problem(problem: Problem, cls) -> Optional[Problem]:
+    """
+    Find the first problem of type cls in a chain of wrapped problems (e.g. trackers, decoders), if any.
+    """
+    current: Optional[Problem] = problem
+    while current is not None:
+        if isinstance(current, cls):
+            return current
+        current = getattr(current, "problem", None)
+    return None
+
+class CachedProblem(Problem):
+    """
+    Remember the fitness of (decoded) solutions, such that solutions that have been seen before are not evaluated again.
+    Once full, the least recently used entries are evicted.
+
+    Place between decoder and problem, e.g. ElitistTracker(IdenticalDecoder(CachedProblem(problem)), vtr).
+    """
+
+    def __init__(self, problem: Problem, capacity: int = 2**16):
+        self.problem = problem
+        self.capacity = capacity
+        self.cache: OrderedDict[bytes, float] = OrderedDict()
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        # For each solution in the last call to evaluate (one) or evaluate_batch (one per row): whether it was a hit.
+        self.last_hits = np.zeros(0, dtype=bool)
+
+    def get_length(self):
+        return self.problem.get_length()
+
+    @staticmethod
+    def key(s: np.ndarray) -> bytes:
+        # Compact (16 byte) hash of the permutation, independent of its dtype.
+        return hashlib.blake2b(np.ascontiguousarray(s, dtype=np.int64).tobytes(), digest_size=16).digest()
+
+    def get_state(self):
+        return {"cache": list(self.cache.items()), "hits": self.hits, "misses": self.misses}
+
+    def set_state(self, state):
+        self.cache = OrderedDict(state["cache"])
+        self.hits = state["hits"]
+        self.misses = state["misses"]
+
+    def store(self, key: bytes, f: float):
+        self.cache[key] = f
+        if len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+
+    def evaluate(self, sol: Solution):
+        if sol.evaluated:
+            return sol.s
+
+        assert sol.s is not None, "Ensure the solution has been decoded, if no decoding is needed, use identity."
+
+        key = self.key(sol.s)
+        f = self.cache.get(key)
+        self.last_hits = np.array([f is not None])
+        if f is None:
+            self.misses += 1
+            f = self.problem.evaluate(sol)
+            self.store(key, f)
+            return f
+
+        self.hits += 1
+        self.cache.move_to_end(key)
+        if f != np.inf:
+            # Note: like problems do, invalid solutions are not marked as evaluated.
+            sol.f = f
+            sol.evaluated = True
+            sol.parent_f = None
+            sol.swaps = None
+        return f
+
+    def evaluate_batch(self, e: np.ndarray) -> np.ndarray:
+        f = np.empty(len(e))
+        hits = np.ones(len(e), dtype=bool)
+        # Only the first occurrence of a solution missing from the cache is evaluated, like it would sequentially.
+        keys = [self.key(s) for s in e]
+        first_occurrence = {}
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                f[i] = cached
+            elif key not in first_occurrence:
+                first_occurrence[key] = i
+                hits[i] = False
+
+        misses = np.flatnonzero(~hits)
+        if len(misses) > 0:
+            f[misses] = self.problem.evaluate_batch(e[misses])
+            for i in misses:
+                self.store(keys[i], f[i])
+        for i in np.flatnonzero(hits):
+            if keys[i] in first_occurrence:
+                f[i] = f[first_occurrence[keys[i]]]
+
+        self.hits += len(e) - len(misses)
+        self.misses += len(misses)
+        self.last_hits = hits
+        return f
+
+    def decode_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.decode_batch(e)
+
 class VTRFound(Exception):
     pass
 
 class ElitistTracker(Problem):
     """
     Keep track of the current best solution & evaluation count & other data.
+
+    If a CachedProblem is used, count_cache_hits determines whether solutions found in the cache
+    count as an evaluation (i.e. count requested evaluations) or not (i.e. count real evaluations).
+
+    If shared_evaluations (a multiprocessing.Value('q')) is provided, evaluations are also added to this
+    counter shared by trackers in several processes, and the history records the shared count instead.
     """
-    def __init__(self, problem: Problem, vtr: Optional[float]):
+    def __init__(self, problem: Problem, vtr: Optional[float], count_cache_hits: bool = True, shared_evaluations=None):
         self.problem = problem
         self.vtr = vtr
+        self.count_cache_hits = count_cache_hits
+        self.shared_evaluations = shared_evaluations
+        self.cache = find_problem(problem, CachedProblem)
         # Keep track of some statistics
         self.num_evaluations = 0
+        self.num_requested_evaluations = 0
         self.time_of_first_evaluation: Optional[datetime.datetime] = None
          
         # Keep track of the current elitist
         self.current_elitist: Optional[Solution] = None
 
-        # Keep track using a dataframe of all changes
-        self.elitist_history = pd.DataFrame({
-            '#evaluations': pd.Series(dtype='int'),
-            'time (s)': pd.Series(dtype='float'),
-            'genotype': pd.Series(dtype='object'), # numpy array
-            'phenotype': pd.Series(dtype='object'), # numpy array
-            'fitness': pd.Series(dtype='float'),
-            'is_vtr': pd.Series(dtype='bool'),
-        })
+        # Keep track of all changes, column by column. Genotypes and phenotypes are stored as rows of a
+        # matrix (with the smallest dtype that fits), created upon the first change.
+        # See `elitist_history` for these changes as a dataframe.
+        self.history_evaluations = GrowableArray(dtype=np.int64)
+        self.history_time = GrowableArray(dtype=np.float64)
+        self.history_genotype: Optional[GrowableArray] = None
+        self.history_phenotype: Optional[GrowableArray] = None
+        self.history_fitness = GrowableArray(dtype=np.float64)
+        self.history_is_vtr = GrowableArray(dtype=bool)
+        # dtypes of the genotype & phenotype, as passed to the tracker.
+        self.genotype_dtype = np.dtype(np.int64)
+        self.phenotype_dtype = np.dtype(np.int64)
+        self._elitist_history_df: Optional[pd.DataFrame] = None
+
+    @property
+    def elitist_history(self) -> pd.DataFrame:
+        """
+        Dataframe containing a row for every change of elitist.
+        """
+        if self._elitist_history_df is None:
+            def as_rows(column: Optional[GrowableArray], dtype):
+                # Note: column is None if there are no rows.
+                if column is None:
+                    return pd.Series(dtype='object')
+                # numpy array per row
+                return pd.Series([row for row in column.values.astype(dtype)], dtype='object')
+
+            self._elitist_history_df = pd.DataFrame({
+                '#evaluations': pd.Series(self.history_evaluations.values, dtype='int'),
+                'time (s)': pd.Series(self.history_time.values, dtype='float'),
+                'genotype': as_rows(self.history_genotype, self.genotype_dtype),
+                'phenotype': as_rows(self.history_phenotype, self.phenotype_dtype),
+                'fitness': pd.Series(self.history_fitness.values, dtype='float'),
+                'is_vtr': pd.Series(self.history_is_vtr.values, dtype='bool'),
+            })
+        return self._elitist_history_df
 
     def get_length(self):
         return self.problem.get_length()
 
+    def get_state(self):
+        columns = [
+            "history_evaluations", "history_time", "history_genotype",
+            "history_phenotype", "history_fitness", "history_is_vtr",
+        ]
+        return {
+            "num_evaluations": self.num_evaluations,
+            "num_requested_evaluations": self.num_requested_evaluations,
+            # Stored relative to now, such that time keeps counting from the moment of resuming.
+            "time_since_first_evaluation": None if self.time_of_first_evaluation is None
+                else datetime.datetime.now() - self.time_of_first_evaluation,
+            "current_elitist": self.current_elitist,
+            "history": {c: None if getattr(self, c) is None else getattr(self, c).values for c in columns},
+            "genotype_dtype": self.genotype_dtype,
+            "phenotype_dtype": self.phenotype_dtype,
+        }
+
+    def set_state(self, state):
+        self.num_evaluations = state["num_evaluations"]
+        self.num_requested_evaluations = state["num_requested_evaluations"]
+        self.time_of_first_evaluation = None if state["time_since_first_evaluation"] is None \
+            else datetime.datetime.now() - state["time_since_first_evaluation"]
+        self.current_elitist = state["current_elitist"]
+        for column, values in state["history"].items():
+            setattr(self, column, None if values is None else GrowableArray.from_values(values))
+        self.genotype_dtype = state["genotype_dtype"]
+        self.phenotype_dtype = state["phenotype_dtype"]
+        self._elitist_history_df = None
+
     def evaluate(self, sol: Solution):
         if sol.evaluated:
             return sol.s
@@ -135,22 +505,139 @@ class ElitistTracker(Problem):
             self.time_of_first_evaluation = datetime.datetime.now()
 
         f = self.problem.evaluate(sol)
-        self.num_evaluations += 1
+        self.num_requested_evaluations += 1
+        evaluation_number = self.count_evaluations(int(self.counts_evaluation(1)[0]))
 
         if self.current_elitist == None or f < self.current_elitist.f:
             self.current_elitist = copy_solution(sol)
             is_vtr = self.vtr != None and sol.f <= self.vtr
-            new_row_df = pd.DataFrame({
-                '#evaluations': [self.num_evaluations],
-                'time (s)': [(datetime.datetime.now() - self.time_of_first_evaluation).total_seconds()],
-                'genotype': [sol.e.copy()], # numpy array
-                'phenotype': [sol.s.copy()], # numpy array
-                'fitness': sol.f,
-                'is_vtr': is_vtr,
-            })
-            self.elitist_history = pd.concat([self.elitist_history, new_row_df])
+            self.record_elitist(evaluation_number, sol.e, sol.s, sol.f, is_vtr)
 
             if is_vtr:
                 raise VTRFound()
 
         return f
+
+    def evaluate_batch(self, e: np.ndarray) -> np.ndarray:
+        """
+        Evaluate a (pop, l) matrix of solutions. Evaluations are counted (and the elitist is tracked)
+        as if the rows were evaluated one by one, in order.
+        """
+        return self.evaluate_decode_batch(e)[0]
+
+    def evaluate_decode_batch(self, e: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Like evaluate_batch, also returning the phenotypes (decoded once, see Problem.evaluate_decode_batch).
+        """
+        if len(e) == 0:
+            return np.empty(0), self.problem.decode_batch(e)
+
+        if self.time_of_first_evaluation == None:
+            self.time_of_first_evaluation = datetime.datetime.now()
+
+        f, phenotypes = self.problem.evaluate_decode_batch(e)
+
+        # Determine which rows improve upon the best solution found before them.
+        best_before = np.minimum.accumulate(np.concatenate([[np.inf], f[:-1]]))
+        if self.current_elitist != None:
+            best_before = np.minimum(best_before, self.current_elitist.f)
+        improving = f < best_before
+        if self.current_elitist == None:
+            improving[0] = True
+        improving = np.flatnonzero(improving)
+
+        # The number of evaluations (relative to the current count) after evaluating each of the rows.
+        evaluation_numbers = np.cumsum(self.counts_evaluation(len(f)))
+
+        # Stop counting at the first solution that reaches the vtr, like sequential evaluation would.
+        num_counted = len(f)
+        is_vtr = np.zeros(len(improving), dtype=bool)
+        if self.vtr != None:
+            is_vtr = f[improving] <= self.vtr
+            if is_vtr.any():
+                last = np.argmax(is_vtr)
+                improving = improving[:last + 1]
+                is_vtr = is_vtr[:last + 1]
+                num_counted = improving[-1] + 1
+
+        num_counted_evaluations = int(evaluation_numbers[num_counted - 1])
+        evaluation_numbers += self.count_evaluations(num_counted_evaluations) - num_counted_evaluations
+
+        if len(improving) > 0:
+            for i, v in zip(improving, is_vtr):
+                self.record_elitist(evaluation_numbers[i], e[i], phenotypes[i], f[i], v)
+            elitist = Solution(np.copy(e[improving[-1]]))
+            elitist.s = np.copy(phenotypes[improving[-1]])
+            elitist.f = f[improving[-1]]
+            elitist.evaluated = True
+            self.current_elitist = elitist
+
+        self.num_requested_evaluations += num_counted
+        if is_vtr.any():
+            raise VTRFound()
+
+        return f, phenotypes
+
+    def count_evaluations(self, n: int) -> int:
+        """
+        Count n evaluations, returns the number of evaluations after doing so (the shared count, if shared).
+        """
+        self.num_evaluations += n
+        if self.shared_evaluations is None:
+            return self.num_evaluations
+        with self.shared_evaluations.get_lock():
+            self.shared_evaluations.value += n
+            return self.shared_evaluations.value
+
+    def register(self, sol: Solution, num_evaluations: int = 1):
+        """
+        Track a solution of which the fitness is already known (e.g. computed by a local search using deltas),
+        counting num_evaluations evaluations for it.
+        """
+        assert sol.evaluated, "Only evaluated solutions can be registered."
+        if self.time_of_first_evaluation == None:
+            self.time_of_first_evaluation = datetime.datetime.now()
+
+        self.num_requested_evaluations += num_evaluations
+        evaluation_number = self.count_evaluations(num_evaluations)
+
+        if self.current_elitist == None or sol.f < self.current_elitist.f:
+            self.current_elitist = copy_solution(sol)
+            is_vtr = self.vtr != None and sol.f <= self.vtr
+            self.record_elitist(evaluation_number, sol.e, sol.s, sol.f, is_vtr)
+
+            if is_vtr:
+                raise VTRFound()
+
+    def counts_evaluation(self, n: int) -> np.ndarray:
+        """
+        For each of the n solutions evaluated last: whether it counts as an evaluation.
+        """
+        if self.count_cache_hits or self.cache is None:
+            return np.ones(n, dtype=bool)
+        assert isinstance(self.cache, CachedProblem)
+        return ~self.cache.last_hits
+
+    def record_elitist(self, num_evaluations: int, e: np.ndarray, s: np.ndarray, f: float, is_vtr: bool):
+        """
+        Append a new elitist to the history.
+        """
+        assert self.time_of_first_evaluation is not None
+        e = np.asarray(e)
+        s = np.asarray(s)
+        if self.history_genotype is None or self.history_phenotype is None:
+            self.genotype_dtype = e.dtype
+            self.phenotype_dtype = s.dtype
+            self.history_genotype = GrowableArray(e.shape, compact_dtype(e))
+            self.history_phenotype = GrowableArray(s.shape, compact_dtype(s))
+        self.history_evaluations.append(num_evaluations)
+        self.history_time.append((datetime.datetime.now() - self.time_of_first_evaluation).total_seconds())
+        self.history_genotype.append(e)
+        self.history_phenotype.append(s)
+        self.history_fitness.append(f)
+        self.history_is_vtr.append(is_vtr)
+        # Invalidate the dataframe, such that it is rebuilt upon next access.
+        self._elitist_history_df = None
+
+    def decode_batch(self, e: np.ndarray) -> np.ndarray:
+        return self.problem.decode_batch(e)
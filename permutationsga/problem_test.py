@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from .problem import CachedProblem, ElitistTracker, IdenticalDecoder, Solution, VTRFound
+from .qap import QAP, read_qaplib
+
+def create_tracker(vtr=None):
+    return ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), vtr)
+
+def test_elitist_history():
+    tracker = create_tracker()
+    assert len(tracker.elitist_history) == 0
+
+    rng = np.random.default_rng(seed=42)
+    for _ in range(200):
+        tracker.evaluate(Solution(rng.permutation(26)))
+
+    history = tracker.elitist_history
+    assert len(history) > 1
+    assert (np.diff(history["fitness"]) < 0).all(), "Every change should be an improvement"
+    assert history["fitness"].iloc[-1] == tracker.current_elitist.f
+    np.testing.assert_array_equal(history["genotype"].iloc[-1], tracker.current_elitist.e)
+    assert history["genotype"].iloc[-1].dtype == np.int64, "Genotypes should be returned as they were passed"
+    assert tracker.history_genotype.buffer.dtype == np.uint8, "Genotypes should be stored compactly"
+
+def test_evaluate_batch_tracks_like_sequential():
+    rng = np.random.default_rng(seed=42)
+    perms = np.stack([rng.permutation(26) for _ in range(200)])
+
+    tracker_sequential = create_tracker()
+    for p in perms:
+        tracker_sequential.evaluate(Solution(p))
+    tracker_batch = create_tracker()
+    tracker_batch.evaluate_batch(perms[:50])
+    tracker_batch.evaluate_batch(perms[50:])
+
+    assert tracker_sequential.num_evaluations == tracker_batch.num_evaluations
+    a = tracker_sequential.elitist_history
+    b = tracker_batch.elitist_history
+    np.testing.assert_array_equal(a["#evaluations"], b["#evaluations"])
+    np.testing.assert_array_equal(a["fitness"], b["fitness"])
+
+def test_evaluate_batch_stops_counting_at_vtr():
+    rng = np.random.default_rng(seed=42)
+    perms = np.stack([rng.permutation(26) for _ in range(100)])
+    tracker = create_tracker()
+    f = tracker.evaluate_batch(perms)
+
+    tracker = create_tracker(vtr=f[:10].min())
+    with pytest.raises(VTRFound):
+        tracker.evaluate_batch(perms)
+    assert tracker.num_evaluations == np.argmin(f[:10]) + 1
+    assert tracker.elitist_history["is_vtr"].iloc[-1]
+
+def test_cached_problem():
+    rng = np.random.default_rng(seed=42)
+    perms = np.stack([rng.permutation(26) for _ in range(20)])
+    # Duplicate every solution
+    perms = np.concatenate([perms, perms[::-1]])
+
+    for count_cache_hits in [True, False]:
+        cache = CachedProblem(QAP(*read_qaplib("./instances/qap/bur26a.dat")), capacity=15)
+        tracker = ElitistTracker(IdenticalDecoder(cache), None, count_cache_hits=count_cache_hits)
+        f_batch = tracker.evaluate_batch(perms)
+        f = [tracker.evaluate(Solution(p)) for p in perms]
+
+        np.testing.assert_array_equal(f, f_batch)
+        assert cache.hits + cache.misses == 80
+        assert len(cache.cache) == 15, "Cache should not exceed its capacity"
+        assert tracker.num_requested_evaluations == 80
+        assert tracker.num_evaluations == (80 if count_cache_hits else cache.misses)
+
+def test_batch_decoding_matches_per_solution():
+    from .problem import InvPermDecoder, RandomKeysDecoder
+    rng = np.random.default_rng(seed=42)
+    qap = QAP(*read_qaplib("./instances/qap/bur26a.dat"))
+    perms = np.stack([rng.permutation(26) for _ in range(50)]).astype(np.uint8)
+    # Keys with many ties, which should be broken in the same way.
+    keys = rng.integers(0, 5, size=(50, 26)).astype(np.float64)
+    for decoder, genotypes in [(InvPermDecoder(qap), perms), (RandomKeysDecoder(qap), keys)]:
+        phenotypes = decoder.decode_batch(genotypes)
+        f = decoder.evaluate_batch(genotypes)
+        for i in range(len(genotypes)):
+            sol = Solution(genotypes[i])
+            decoder.evaluate(sol)
+            np.testing.assert_array_equal(sol.s, phenotypes[i])
+            assert sol.f == f[i]
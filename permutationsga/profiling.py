@@ -0,0 +1,150 @@
+#
+# Opt-in per-generation profiling of a GA: wall time per stage, evaluation counts & fitness statistics.
+#
+
+import json
+import time
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+
+from .problem import CachedProblem, ElitistTracker, find_problem
+
+
+class MemorySink:
+    """
+    Keep all records in memory.
+    """
+
+    def __init__(self):
+        self.records: List[dict] = []
+
+    def write(self, record: dict):
+        self.records.append(record)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(self.records)
+
+    def close(self):
+        pass
+
+
+class JSONLinesSink:
+    """
+    Write each record as a line of JSON to a file.
+    """
+
+    def __init__(self, path: str, mode: str = "w"):
+        self.file = open(path, mode)
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class CallbackSink:
+    """
+    Pass each record to a function.
+    """
+
+    def __init__(self, callback: Callable[[dict], None]):
+        self.callback = callback
+
+    def write(self, record: dict):
+        self.callback(record)
+
+    def close(self):
+        pass
+
+
+class _Stage:
+    def __init__(self, profiler: "GenerationProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stage_times = self.profiler.stage_times
+        stage_times[self.name] = stage_times.get(self.name, 0.0) + elapsed
+        return False
+
+
+class GenerationProfiler:
+    """
+    Record, for every generation of a ConfigurableGA, the wall time spent in each stage
+    (initialize, recombine, mutate, evaluate, select), the number of evaluations, cache hits
+    (if a CachedProblem is used) and the best & mean fitness of the population.
+
+    Records are flat dictionaries, passed to the sink (MemorySink by default) at the end of each generation.
+    Evaluations are counted through the ElitistTracker of the problem, if there is one.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = MemorySink() if sink is None else sink
+        self.generation = 0
+        self.stage_times: Dict[str, float] = {}
+        self._tracker: Optional[ElitistTracker] = None
+        self._cache: Optional[CachedProblem] = None
+        self._problem = None
+
+    def stage(self, name: str) -> _Stage:
+        """
+        Context manager adding the time spent within it to the given stage.
+        """
+        return _Stage(self, name)
+
+    def _counters(self):
+        evaluations = self._tracker.num_evaluations if self._tracker is not None else 0
+        requested = self._tracker.num_requested_evaluations if self._tracker is not None else 0
+        hits = self._cache.hits if self._cache is not None else 0
+        misses = self._cache.misses if self._cache is not None else 0
+        return evaluations, requested, hits, misses
+
+    def begin_generation(self, ga):
+        if ga.problem is not self._problem:
+            self._problem = ga.problem
+            self._tracker = find_problem(ga.problem, ElitistTracker)
+            self._cache = find_problem(ga.problem, CachedProblem)
+        self.stage_times = {}
+        self._start_counters = self._counters()
+        self._start = time.perf_counter()
+
+    def end_generation(self, ga):
+        total = time.perf_counter() - self._start
+        counters = self._counters()
+        evaluations, requested, hits, misses = (c - s for c, s in zip(counters, self._start_counters))
+
+        if hasattr(ga.population, "fitness"):
+            fitness = ga.population.fitness
+        else:
+            fitness = np.array([solution.f for solution in ga.population], dtype=np.float64)
+        fitness = fitness[np.isfinite(fitness)] if len(fitness) > 0 else fitness
+
+        record = {
+            "generation": self.generation,
+            "time (s)": total,
+        }
+        for name, elapsed in self.stage_times.items():
+            record[f"time {name} (s)"] = elapsed
+        record["#evaluations"] = evaluations
+        record["#evaluations total"] = counters[0]
+        record["#requested evaluations"] = requested
+        if self._cache is not None:
+            record["cache hits"] = hits
+            record["cache misses"] = misses
+        if getattr(ga, "num_unique", None) is not None:
+            record["#unique offspring"] = ga.num_unique
+        record["best fitness"] = float(fitness.min()) if len(fitness) > 0 else None
+        record["mean fitness"] = float(fitness.mean()) if len(fitness) > 0 else None
+
+        self.sink.write(record)
+        self.generation += 1
+
+    def close(self):
+        self.sink.close()
@@ -0,0 +1,62 @@
+import json
+import numpy as np
+
+from .ga import (
+    ConfigurableGA,
+    RandomPermutationInitialization,
+    FunctionBasedRecombinator,
+    SequentialSelector,
+    TournamentSelection,
+    crossover_pmx,
+    generate_uniform_indices,
+)
+from .problem import ElitistTracker, IdenticalDecoder, CachedProblem
+from .profiling import GenerationProfiler, JSONLinesSink
+from .qap import QAP, read_qaplib
+from new_fns import swap_mutation
+
+def make_ga(profiler):
+    problem = ElitistTracker(IdenticalDecoder(CachedProblem(QAP(*read_qaplib("./instances/qap/bur26a.dat")))), None)
+    l = problem.get_length()
+    rng = np.random.default_rng(seed=43)
+    recombinator = FunctionBasedRecombinator(
+        lambda: generate_uniform_indices(rng, l, 0.5),
+        crossover_pmx,
+        SequentialSelector(),
+        2 * 32,
+        include_what="population",
+    )
+    ga = ConfigurableGA(
+        42, 32, problem, RandomPermutationInitialization(l), recombinator, TournamentSelection(), swap_mutation,
+        profiler=profiler,
+    )
+    return problem, ga
+
+def test_profiler_records_every_generation(tmp_path):
+    path = tmp_path / "profile.jsonl"
+    profiler = GenerationProfiler(JSONLinesSink(str(path)))
+    problem, ga = make_ga(profiler)
+    for _ in range(4):
+        ga.generation()
+    profiler.close()
+
+    records = [json.loads(line) for line in open(path)]
+    assert [r["generation"] for r in records] == [0, 1, 2, 3]
+    assert "time initialize (s)" in records[0]
+    for stage in ["recombine", "mutate", "evaluate", "select"]:
+        assert records[1][f"time {stage} (s)"] >= 0
+    assert sum(r["#evaluations"] for r in records) == problem.num_evaluations
+    assert records[-1]["#evaluations total"] == problem.num_evaluations
+    assert all(r["cache hits"] + r["cache misses"] == r["#requested evaluations"] for r in records)
+    assert records[-1]["best fitness"] <= records[-1]["mean fitness"]
+
+def test_profiler_does_not_change_the_run():
+    _, ga_plain = make_ga(None)
+    profiler = GenerationProfiler()
+    _, ga_profiled = make_ga(profiler)
+    for _ in range(3):
+        ga_plain.generation()
+        ga_profiled.generation()
+
+    assert [s.f for s in ga_plain.population] == [s.f for s in ga_profiled.population]
+    assert len(profiler.sink.to_dataframe()) == 3
@@ -1,51 +1,209 @@
+from typing import List, Tuple
 import numpy as np
 import numpy.typing as npt
-from .problem import Problem, Solution
+from .problem import Problem, Solution, is_valid_permutation_batch
 
 
+def widen(x):
+    """
+    Integer arrays (e.g. matrices loaded using the smallest dtype that fits) as int64, such that products
+    & differences do not overflow. Used on gathered slices, such that the matrices themselves stay compact
+    (and, if memory-mapped, shared between processes).
+    """
+    return x.astype(np.int64) if x.dtype.kind in "iub" else x
+
+def wide_dtype(*arrays) -> np.dtype:
+    """
+    Result dtype of arithmetic on widened arrays, see widen.
+    """
+    return np.result_type(*(np.int64 if a.dtype.kind in "iub" else a.dtype for a in arrays))
+
 def evaluate_qap(l: int, A: np.matrix, B: np.matrix, s: npt.NDArray[np.int_]):
-    f = sum(sum(A[i, j] * B[s[i], s[j]] for i in range(l)) for j in range(l))
+    # Gather B into the order given by s, such that Bs[i, j] = B[s[i], s[j]].
+    Bs = widen(B[np.ix_(s, s)])
+    f = (A * Bs).sum()
+    return f
+
+def evaluate_qap_batch(l: int, A: np.matrix, B: np.matrix, perms: npt.NDArray[np.int_], chunk_size: int = 2**24):
+    """
+    Evaluate a (pop, l) matrix of permutations, one permutation per row.
+
+    Rows are processed in chunks such that the gathered (chunk, l, l) tensor contains
+    at most (approximately) chunk_size elements.
+    """
+    f = np.empty(len(perms), dtype=wide_dtype(A, B))
+    rows_per_chunk = max(1, chunk_size // (l * l))
+    for start in range(0, len(perms), rows_per_chunk):
+        p = perms[start:start + rows_per_chunk]
+        # Bs[k, i, j] = B[p[k, i], p[k, j]]
+        Bs = widen(B[p[:, :, None], p[:, None, :]])
+        f[start:start + rows_per_chunk] = np.einsum("ij,kij->k", A, Bs)
     return f
 
+def swap_delta_qap(A: np.matrix, B: np.matrix, s: npt.NDArray[np.int_], r: int, q: int):
+    """
+    Compute the change in objective when swapping positions r and q of permutation s, in O(l).
+    """
+    sr, sq = s[r], s[q]
+    # Contribution of all pairs (k, r), (k, q), (r, k) and (q, k)
+    a1 = widen(A[:, r]) - A[:, q]
+    b1 = (widen(B[:, sq]) - B[:, sr])[s]
+    a2 = widen(A[r, :]) - A[q, :]
+    b2 = (widen(B[sq, :]) - B[sr, :])[s]
+    d = a1 @ b1 + a2 @ b2
+    # The above includes k in {r, q}, which should be accounted for separately.
+    d -= a1[r] * b1[r] + a1[q] * b1[q] + a2[r] * b2[r] + a2[q] * b2[q]
+    # Pairs consisting of r and q only.
+    return (
+        d
+        + (widen(A[r, r]) - A[q, q]) * (widen(B[sq, sq]) - B[sr, sr])
+        + (widen(A[r, q]) - A[q, r]) * (widen(B[sq, sr]) - B[sr, sq])
+    )
+
+def qap_delta_matrix(A: np.ndarray, B: np.ndarray, p: npt.NDArray[np.int_], rows=None, chunk_size: int = 2**22) -> np.ndarray:
+    """
+    Change in objective when swapping positions r and q of permutation p, for every r in rows (default: all)
+    and every q, i.e. a (len(rows), n) matrix. Computed in O(n) per swap, vectorized.
+    """
+    n = len(p)
+    A = widen(A)
+    # Bp[i, j] = B[p[i], p[j]]
+    Bp = widen(B[np.ix_(p, p)])
+    rows = np.arange(n) if rows is None else np.asarray(rows)
+    deltas = np.empty((len(rows), n), dtype=wide_dtype(A, Bp))
+    rows_per_chunk = max(1, chunk_size // (n * n))
+    q = np.arange(n)
+    for start in range(0, len(rows), rows_per_chunk):
+        r = rows[start:start + rows_per_chunk]
+        m = np.arange(len(r))
+        # t[i, q, k]: the change in contribution of the pairs (k, r) & (k, q), and (r, k) & (q, k).
+        t = (A.T[r][:, None, :] - A.T[None, :, :]) * (Bp.T[None, :, :] - Bp.T[r][:, None, :])
+        t += (A[r][:, None, :] - A[None, :, :]) * (Bp[None, :, :] - Bp[r][:, None, :])
+        # Which includes k in {r, q}: these pairs are accounted for separately.
+        d = t.sum(axis=2) - t[m, :, r] - t[:, q, q]
+        d += (A[r, r][:, None] - A[q, q][None, :]) * (Bp[q, q][None, :] - Bp[r, r][:, None])
+        d += (A[r] - A[:, r].T) * (Bp[:, r].T - Bp[r])
+        d[m, r] = 0
+        deltas[start:start + rows_per_chunk] = d
+    return deltas
+
 class QAP(Problem):
-    def __init__(self, l: int, A: np.matrix, B: np.matrix):
+    def __init__(self, l: int, A: np.matrix, B: np.matrix, check_deltas: bool = False):
         assert A.shape[0] == l, "QAP matrices must have the right size"
         assert A.shape[1] == l, "QAP matrices must have the right size"
         assert B.shape[0] == l, "QAP matrices must have the right size"
         assert B.shape[1] == l, "QAP matrices must have the right size"
         self.l = l
+        # Note: matrices are kept as passed (e.g. compact & memory-mapped, see instances.load_qaplib),
+        # arithmetic widens them where needed (see widen).
         self.A = A
         self.B = B
+        # Delta evaluation costs O(l) per swap, evaluating from scratch O(l^2):
+        # beyond this number of swaps, evaluate from scratch instead.
+        self.max_delta_swaps = max(1, l // 16)
+        # Debug mode: verify every delta evaluation against a full evaluation.
+        self.check_deltas = check_deltas
 
     def get_length(self):
         return self.l
 
+    def shared_arrays(self):
+        """
+        Arrays defining this problem, see ParallelEvaluator.
+        """
+        return {"A": self.A, "B": self.B}
+
+    @classmethod
+    def from_shared_arrays(cls, arrays):
+        return cls(len(arrays["A"]), arrays["A"], arrays["B"])
+
+    def swap_delta(self, perm: npt.NDArray[np.int_], r: int, s: int):
+        """
+        Change in objective value when swapping positions r and s of (decoded) permutation perm.
+        """
+        return swap_delta_qap(self.A, self.B, perm, r, s)
+
+    def evaluate_swaps(self, perm: npt.NDArray[np.int_], parent_f: float, swaps: List[Tuple[int, int]]):
+        """
+        Evaluate perm, given the fitness of a parent from which perm was obtained by performing swaps.
+        """
+        # Reconstruct the parent by undoing the swaps
+        p = np.copy(perm)
+        for r, q in reversed(swaps):
+            p[r], p[q] = p[q], p[r]
+        # Then apply them one by one, accumulating the deltas.
+        f = parent_f
+        for r, q in swaps:
+            f += self.swap_delta(p, r, q)
+            p[r], p[q] = p[q], p[r]
+        return f
+
     def evaluate(self, sol: Solution):
         if sol.evaluated:
             return sol.s
 
         assert sol.s is not None, "Ensure the solution has been decoded, if no decoding is needed, use identity."
 
-        if len(np.unique(sol.s)) != len(sol.s):
+        if sol.parent_f is not None and sol.swaps is not None and len(sol.swaps) <= self.max_delta_swaps:
+            # Derived from a (valid, evaluated) parent through swaps: use delta evaluation.
+            f = self.evaluate_swaps(sol.s, sol.parent_f, sol.swaps)
+            if self.check_deltas:
+                f_full = evaluate_qap(self.l, self.A, self.B, sol.s)
+                assert np.isclose(f, f_full), f"Delta evaluation ({f}) does not match full evaluation ({f_full})"
+        elif len(np.unique(sol.s)) != len(sol.s):
             # Solution is not a valid permutation
             return np.inf
-
-        f = evaluate_qap(self.l, self.A, self.B, sol.s)
+        else:
+            f = evaluate_qap(self.l, self.A, self.B, sol.s)
         sol.f = f
         sol.evaluated = True
+        sol.parent_f = None
+        sol.swaps = None
+        return f
+
+    def evaluate_batch(self, perms: npt.NDArray[np.int_]) -> npt.NDArray[np.float64]:
+        """
+        Evaluate a (pop, l) matrix of (decoded) permutations at once.
+
+        Returns the fitness of each row, rows that are not a valid permutation get np.inf.
+        """
+        assert perms.ndim == 2 and perms.shape[1] == self.l, "Expected a (pop, l) matrix of permutations."
+
+        f = np.full(len(perms), np.inf)
+        valid = is_valid_permutation_batch(self.l, perms)
+        f[valid] = evaluate_qap_batch(self.l, self.A, self.B, perms[valid])
         return f
 
 
+def read_qaplib_tokens(filename):
+    """
+    Read a QAPLIB instance as integers (or floats, if not integer), returns (l, A, B).
+
+    Parses the file as a stream of numbers, as rows of large instances are wrapped across lines.
+    """
+    with open(filename, "r") as f:
+        tokens = f.read().split()
+    l = int(tokens[0])
+    assert len(tokens) == 1 + 2 * l * l, f"Expected {1 + 2 * l * l} numbers in {filename}, found {len(tokens)}"
+    try:
+        values = np.array(tokens[1:], dtype=np.int64)
+    except ValueError:
+        values = np.array(tokens[1:], dtype=np.float64)
+    A = values[:l * l].reshape(l, l)
+    B = values[l * l:].reshape(l, l)
+    return l, A, B
+
 def read_qaplib(filename):
+    l, A, B = read_qaplib_tokens(filename)
+    return l, A.astype(np.float64), B.astype(np.float64)
+
+def read_qaplib_solution(filename):
+    """
+    Read a QAPLIB solution (.sln) file, returns (l, optimal value, permutation (zero-based)).
+    """
     with open(filename, "r") as f:
-        # Read first line: dimensionality
-        l = int(f.readline())
-        # Skip empty line
-        f.readline()
-        # Load first matrix
-        A = np.loadtxt((f.readline() for _ in range(l)))
-        # Skip empty line
-        f.readline()
-        # Load second matrix
-        B = np.loadtxt((f.readline() for _ in range(l)))
-        return l, A, B
+        tokens = f.read().split()
+    l = int(tokens[0])
+    value = float(tokens[1])
+    perm = np.array(tokens[2:2 + l], dtype=np.int64) - 1
+    return l, value, perm
@@ -0,0 +1,57 @@
+import numpy as np
+
+from .qap import QAP, evaluate_qap, read_qaplib
+from .problem import Solution, IdenticalDecoder, InvPermDecoder
+
+def evaluate_qap_reference(l, A, B, s):
+    return sum(sum(A[i, j] * B[s[i], s[j]] for i in range(l)) for j in range(l))
+
+def test_evaluate_qap_matches_reference():
+    l, A, B = read_qaplib("./instances/qap/bur26a.dat")
+    rng = np.random.default_rng(seed=42)
+    for _ in range(10):
+        s = rng.permutation(l)
+        assert evaluate_qap(l, A, B, s) == evaluate_qap_reference(l, A, B, s)
+
+def test_evaluate_batch_matches_evaluate():
+    l, A, B = read_qaplib("./instances/qap/bur26b.dat")
+    problem = QAP(l, A, B)
+    rng = np.random.default_rng(seed=42)
+    perms = np.stack([rng.permutation(l) for _ in range(32)])
+    # Make one of the rows an invalid permutation
+    perms[5, 0] = perms[5, 1]
+
+    f = problem.evaluate_batch(perms)
+
+    assert f[5] == np.inf, "Invalid permutations should be assigned a fitness of np.inf"
+    for i, s in enumerate(perms):
+        sol = Solution(s)
+        sol.s = s
+        assert problem.evaluate(sol) == f[i]
+
+def test_swap_delta_matches_full_evaluation():
+    l, A, B = read_qaplib("./instances/qap/bur26a.dat")
+    problem = QAP(l, A, B)
+    rng = np.random.default_rng(seed=42)
+    for _ in range(50):
+        s = rng.permutation(l)
+        r, q = rng.choice(l, 2, replace=False)
+        t = np.copy(s)
+        t[r], t[q] = t[q], t[r]
+        assert problem.swap_delta(s, r, q) == evaluate_qap(l, A, B, t) - evaluate_qap(l, A, B, s)
+
+def test_delta_evaluation_of_mutated_solutions():
+    from new_fns import swap_mutation, insertion_mutation
+    l, A, B = read_qaplib("./instances/qap/bur26b.dat")
+    problem = QAP(l, A, B, check_deltas=True)
+    problem.max_delta_swaps = l
+    rng = np.random.default_rng(seed=42)
+    for mutation_fn in [swap_mutation, insertion_mutation]:
+        for decoder in [IdenticalDecoder(problem), InvPermDecoder(problem)]:
+            parent = Solution(rng.permutation(l))
+            decoder.evaluate(parent)
+            child = mutation_fn(parent, 1.0)
+            assert child.parent_f == parent.f and child.swaps is not None
+            # check_deltas asserts that the delta evaluation matches the full evaluation
+            decoder.evaluate(child)
+            assert child.evaluated
@@ -0,0 +1,209 @@
+#
+# Stagnation detection & restarts with a growing population (IPOP).
+#
+
+import numpy as np
+import pandas as pd
+from typing import Callable, List, Optional
+
+from .population import PopulationArray
+from .problem import ElitistTracker, VTRFound
+
+
+class PositionCounts:
+    """
+    For a population of permutations: for every position, how many individuals have each value there.
+
+    Can be updated incrementally (add / remove an individual, O(l)), e.g. for a steady-state GA,
+    or be recomputed for a full population (O(n l)).
+    """
+
+    def __init__(self, l: int):
+        self.l = l
+        self.counts = np.zeros((l, l), dtype=np.int64)
+        self.size = 0
+
+    @staticmethod
+    def from_genotypes(genotypes: np.ndarray) -> "PositionCounts":
+        n, l = genotypes.shape
+        counts = PositionCounts(l)
+        flat = (np.arange(l) * l + genotypes).ravel()
+        counts.counts = np.bincount(flat, minlength=l * l).reshape(l, l)
+        counts.size = n
+        return counts
+
+    def add(self, genotype: np.ndarray):
+        self.counts[np.arange(self.l), genotype] += 1
+        self.size += 1
+
+    def remove(self, genotype: np.ndarray):
+        self.counts[np.arange(self.l), genotype] -= 1
+        self.size -= 1
+
+    def agreement(self) -> float:
+        """
+        Probability that two distinct random individuals have the same value at a random position.
+        """
+        if self.size < 2:
+            return 1.0
+        pairs = (self.counts * (self.counts - 1)).sum()
+        return float(pairs / (self.l * self.size * (self.size - 1)))
+
+    def diversity(self) -> float:
+        return 1.0 - self.agreement()
+
+
+def population_permutations(ga) -> np.ndarray:
+    """
+    The genotypes of the population of a GA, as permutations (i.e. decoded, if they are not permutations).
+    """
+    if isinstance(ga.population, PopulationArray):
+        genotypes = ga.population.genotypes
+    else:
+        genotypes = np.stack([solution.e for solution in ga.population])
+    if genotypes.dtype.kind == "f":
+        # e.g. random keys
+        genotypes = ga.problem.decode_batch(genotypes)
+    return genotypes
+
+
+def population_best(ga) -> float:
+    if isinstance(ga.population, PopulationArray):
+        return float(ga.population.fitness.min())
+    return float(min(solution.f for solution in ga.population))
+
+
+class StagnationCriterion:
+    """
+    Stagnated if the best fitness of the population has not improved for max_stall_generations generations,
+    or if the (position) diversity of the population dropped below min_diversity.
+    """
+
+    def __init__(self, max_stall_generations: Optional[int] = 10, min_diversity: Optional[float] = 0.01):
+        self.max_stall_generations = max_stall_generations
+        self.min_diversity = min_diversity
+        self.reset()
+
+    def reset(self):
+        self.best = np.inf
+        self.stall = 0
+
+    def update(self, best: float, diversity: float) -> Optional[str]:
+        """
+        Update with the statistics of a generation, returns the reason for stagnation (if stagnated).
+        """
+        if best < self.best:
+            self.best = best
+            self.stall = 0
+        else:
+            self.stall += 1
+        if self.max_stall_generations is not None and self.stall >= self.max_stall_generations:
+            return f"no improvement for {self.stall} generations"
+        if self.min_diversity is not None and diversity < self.min_diversity:
+            return f"diversity {diversity:.4f} below {self.min_diversity}"
+        return None
+
+
+class IPOPRestartPolicy:
+    """
+    Restart upon stagnation, multiplying the population size by factor (up to max_population_size).
+
+    A restart policy provides should_restart(best, diversity) -> Optional[str] (the reason to restart)
+    and next_population_size(population_size) -> int.
+    """
+
+    def __init__(
+        self,
+        criterion: Optional[StagnationCriterion] = None,
+        factor: float = 2.0,
+        max_population_size: Optional[int] = None,
+    ):
+        self.criterion = StagnationCriterion() if criterion is None else criterion
+        self.factor = factor
+        self.max_population_size = max_population_size
+
+    def should_restart(self, best: float, diversity: float) -> Optional[str]:
+        reason = self.criterion.update(best, diversity)
+        if reason is not None:
+            self.criterion.reset()
+        return reason
+
+    def next_population_size(self, population_size: int) -> int:
+        size = int(round(population_size * self.factor))
+        if self.max_population_size is not None:
+            size = min(size, self.max_population_size)
+        return size
+
+
+class RestartingGA:
+    """
+    Run a GA, restarting it (with a new population, of the size given by the restart policy) upon stagnation.
+
+    The GAs are created by create_ga(seed, population_size) -> ga, and should all use the same tracker,
+    such that the elitist and evaluation count carry over across restarts.
+    Every restart is logged, see restart_log.
+    """
+
+    def __init__(
+        self,
+        create_ga: Callable,
+        tracker: ElitistTracker,
+        seed: int,
+        population_size: int,
+        policy=None,
+    ):
+        self.create_ga = create_ga
+        self.tracker = tracker
+        self.policy = IPOPRestartPolicy() if policy is None else policy
+        # Seeds of the GAs of later restarts are derived from the seed.
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.population_size = population_size
+        self.ga = create_ga(seed, population_size)
+        self.num_restarts = 0
+        self.num_generations = 0
+        self.log: List[dict] = []
+        self.start_run()
+
+    def start_run(self):
+        self.run_start_generation = self.num_generations
+        self.run_start_evaluations = self.tracker.num_evaluations
+
+    def end_run(self, reason: Optional[str]):
+        self.log.append({
+            "run": self.num_restarts,
+            "population size": self.population_size,
+            "first generation": self.run_start_generation,
+            "generations": self.num_generations - self.run_start_generation,
+            "#evaluations": self.tracker.num_evaluations - self.run_start_evaluations,
+            "best fitness": population_best(self.ga) if self.ga.initialized else np.inf,
+            "elitist fitness": self.tracker.current_elitist.f if self.tracker.current_elitist is not None else np.inf,
+            "reason": reason,
+        })
+
+    @property
+    def restart_log(self) -> pd.DataFrame:
+        """
+        A row per (completed) run: its population size, the generations & evaluations used, and why it ended.
+        """
+        return pd.DataFrame(self.log)
+
+    def restart(self, reason: str):
+        self.end_run(reason)
+        self.num_restarts += 1
+        self.population_size = self.policy.next_population_size(self.population_size)
+        seed = int(self.seed_sequence.spawn(1)[0].generate_state(1)[0])
+        self.ga = self.create_ga(seed, self.population_size)
+        self.start_run()
+
+    def generation(self):
+        try:
+            self.ga.generation()
+        except VTRFound:
+            self.num_generations += 1
+            self.end_run("value-to-reach found")
+            raise
+        self.num_generations += 1
+        diversity = PositionCounts.from_genotypes(population_permutations(self.ga)).diversity()
+        reason = self.policy.should_restart(population_best(self.ga), diversity)
+        if reason is not None:
+            self.restart(reason)
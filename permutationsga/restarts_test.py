@@ -0,0 +1,60 @@
+import numpy as np
+
+from .ga import (
+    ConfigurableGA,
+    RandomPermutationInitialization,
+    FunctionBasedRecombinator,
+    SequentialSelector,
+    TournamentSelection,
+    crossover_pmx,
+    generate_uniform_indices,
+)
+from .problem import ElitistTracker, IdenticalDecoder
+from .qap import QAP, read_qaplib
+from .restarts import IPOPRestartPolicy, PositionCounts, RestartingGA, StagnationCriterion
+
+def test_position_counts():
+    rng = np.random.default_rng(seed=42)
+    genotypes = np.stack([rng.permutation(6) for _ in range(5)])
+    counts = PositionCounts(6)
+    for g in genotypes:
+        counts.add(g)
+    np.testing.assert_array_equal(counts.counts, PositionCounts.from_genotypes(genotypes).counts)
+    counts.remove(genotypes[0])
+    np.testing.assert_array_equal(counts.counts, PositionCounts.from_genotypes(genotypes[1:]).counts)
+
+    # Agreement: fraction of (ordered, distinct) pairs of individuals & positions with equal values.
+    pairs = [(genotypes[i] == genotypes[j]).mean() for i in range(5) for j in range(5) if i != j]
+    assert np.isclose(PositionCounts.from_genotypes(genotypes).agreement(), np.mean(pairs))
+    assert PositionCounts.from_genotypes(np.tile(genotypes[0], (4, 1))).diversity() == 0.0
+
+def test_restarting_ga():
+    tracker = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    l = tracker.get_length()
+
+    def create_ga(seed, population_size):
+        rng = np.random.default_rng(seed=seed)
+        recombinator = FunctionBasedRecombinator(
+            lambda: generate_uniform_indices(rng, l, 0.5),
+            crossover_pmx,
+            SequentialSelector(),
+            2 * population_size,
+            include_what="population",
+        )
+        return ConfigurableGA(
+            seed, population_size, tracker, RandomPermutationInitialization(l), recombinator, TournamentSelection(), None
+        )
+
+    policy = IPOPRestartPolicy(StagnationCriterion(max_stall_generations=2, min_diversity=None), factor=2)
+    ga = RestartingGA(create_ga, tracker, 42, 8, policy)
+    for _ in range(40):
+        ga.generation()
+
+    log = ga.restart_log
+    assert ga.num_restarts >= 2 and len(log) == ga.num_restarts
+    assert list(log["population size"]) == [8 * 2**i for i in range(len(log))]
+    assert (log["reason"] == "no improvement for 2 generations").all()
+    # The elitist is kept across restarts.
+    assert (np.diff(log["elitist fitness"]) <= 0).all()
+    assert log["#evaluations"].sum() <= tracker.num_evaluations
+    assert ga.population_size == 8 * 2**ga.num_restarts
@@ -0,0 +1,75 @@
+#
+# Run (instance, seed) jobs of an experiment in parallel, using a pool of processes.
+#
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+from tqdm import tqdm # progress bar
+
+from .problem import VTRFound
+import new_fns
+
+
+def job_seed_sequence(seed: int) -> np.random.SeedSequence:
+    """
+    Seed sequence for the random number generator of new_fns used in a job with the given seed.
+
+    Derived from the seed alone, such that results do not depend on the order in which jobs
+    are run or the number of workers. Spawned, such that it is independent of the generator
+    of the GA itself, seeded with the same seed.
+    """
+    return np.random.SeedSequence(seed, spawn_key=(0,))
+
+
+def run_job(setup_ga: Callable, instance, seed: int, num_generations: int) -> pd.DataFrame:
+    """
+    Run a single job: setup_ga(seed, instance) should return (tracker, ga).
+    Returns the elitist history, with the seed & instance appended.
+    """
+    new_fns.set_rng(np.random.default_rng(job_seed_sequence(seed)))
+
+    tracker, ga = setup_ga(seed, instance)
+    try:
+        # run a few generations
+        for _ in range(num_generations):
+            ga.generation()
+    except VTRFound:
+        pass
+    # copy the elitist run data
+    run_data = tracker.elitist_history.copy()
+    # append metadata (e.g. seed, configuration, ..., anything that makes a run unique)
+    run_data["seed"] = seed
+    run_data["instance"] = instance
+    return run_data
+
+
+def run_experiment(
+    setup_ga: Callable,
+    jobs: Sequence[Tuple[object, int]],
+    num_generations: int,
+    processes: Optional[int] = None,
+    progress: bool = True,
+) -> pd.DataFrame:
+    """
+    Run the (instance, seed) jobs across a pool of processes.
+
+    :param setup_ga: function (seed, instance) -> (tracker, ga), should be picklable, i.e. defined at the top
+        level of a module (and scripts should guard their experiment using `if __name__ == "__main__":`).
+    :param num_generations: number of generations to run for each job.
+    :param processes: number of worker processes, defaults to the number of cores. If 1, runs in this process.
+    :returns: the concatenated elitist histories of all jobs (in order of jobs), with "seed" and "instance" columns.
+    """
+    dfs: List[pd.DataFrame] = []
+    if processes == 1:
+        for instance, seed in tqdm(jobs, disable=not progress):
+            dfs.append(run_job(setup_ga, instance, seed, num_generations))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(run_job, setup_ga, instance, seed, num_generations)
+                for instance, seed in jobs
+            ]
+            dfs = [future.result() for future in tqdm(futures, disable=not progress)]
+    return pd.concat(dfs, ignore_index=True)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from .ga import (
+    ConfigurableGA,
+    RandomPermutationInitialization,
+    FunctionBasedRecombinator,
+    SequentialSelector,
+    TournamentSelection,
+)
+from .problem import ElitistTracker, IdenticalDecoder
+from .qap import QAP, read_qaplib
+from .runner import run_experiment
+from new_fns import crossover_pmx_predef_secs, swap_mutation
+
+def setup_ga(seed: int, inst):
+    problem_tracker = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib(f"./instances/qap/bur26{inst}.dat"))), None)
+    l = problem_tracker.get_length()
+    recombinator = FunctionBasedRecombinator(
+        None, crossover_pmx_predef_secs, SequentialSelector(), 2 * 32, include_what="population"
+    )
+    ga = ConfigurableGA(
+        seed, 32, problem_tracker, RandomPermutationInitialization(l), recombinator, TournamentSelection(), swap_mutation
+    )
+    return problem_tracker, ga
+
+def test_run_experiment_independent_of_processes():
+    jobs = [(inst, seed) for inst in ["a", "b"] for seed in [42, 43]]
+    serial = run_experiment(setup_ga, jobs, 5, processes=1, progress=False)
+    parallel = run_experiment(setup_ga, jobs, 5, processes=2, progress=False)
+
+    assert set(serial["instance"]) == {"a", "b"}
+    columns = ["#evaluations", "fitness", "seed", "instance"]
+    assert serial[columns].equals(parallel[columns])
+    np.testing.assert_array_equal(np.stack(serial["genotype"]), np.stack(parallel["genotype"]))
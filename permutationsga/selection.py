@@ -0,0 +1,92 @@
+#
+# Vectorized selection kernels, operating on an array of fitness values and returning indices.
+#
+
+import numpy as np
+import numpy.typing as npt
+
+
+def tournament_selection_indices(
+    rng: np.random.Generator,
+    fitness: npt.NDArray[np.float64],
+    to_select: int,
+    s: int = 4,
+    o: int = 1,
+    shuffle: bool = True,
+) -> npt.NDArray[np.int_]:
+    """
+    Tournament selection (minimization), selecting the o best of each tournament of size s.
+
+    Draws the same permutations and holds the same tournaments as `tournament_selection` in ga.py:
+    with shuffle, tournaments are consecutive non-overlapping blocks of a random permutation of the
+    population, and a new permutation is drawn once a block would reach the end of the current one.
+
+    :param rng: the random number generator to use
+    :param fitness: fitness of the solutions to select from
+    :param to_select: number of solutions to select
+    :param s: the tournament size
+    :param o: the number of solutions to select for each tournament
+    """
+    n = len(fitness)
+    num_tournaments = -(-to_select // o)
+
+    if shuffle:
+        if s >= n:
+            # Every tournament consists of the entire population (in a new random order)
+            perms = [rng.permutation(n) for _ in range(num_tournaments + 1)][1:]
+            tournaments = np.stack(perms)
+        else:
+            # Each permutation provides the blocks [i * s, (i + 1) * s) for i * s + s < n
+            blocks_per_permutation = -(-(n - s) // s)
+            num_permutations = -(-num_tournaments // blocks_per_permutation)
+            perms = np.stack([rng.permutation(n) for _ in range(num_permutations)])
+            tournaments = perms[:, :blocks_per_permutation * s].reshape(-1, s)[:num_tournaments]
+        return select_from_tournaments(fitness, tournaments, o)[:to_select]
+
+    # Without shuffling, tournaments are consecutive blocks of the population, the last one may be partial.
+    assert num_tournaments <= -(-n // s), "Not enough solutions to select from without shuffling."
+    padded = np.full(num_tournaments * s, -1)
+    padded[:min(n, num_tournaments * s)] = np.arange(min(n, num_tournaments * s))
+    tournaments = padded.reshape(num_tournaments, s)
+    return select_from_tournaments(fitness, tournaments, o)[:to_select]
+
+
+def select_from_tournaments(
+    fitness: npt.NDArray[np.float64], tournaments: npt.NDArray[np.int_], o: int = 1
+) -> npt.NDArray[np.int_]:
+    """
+    Select the o best of each tournament (a row of indices, -1 denotes an empty slot).
+
+    Ties are broken in favor of the solution that occurs first in the tournament.
+    """
+    empty = tournaments < 0
+    f = np.where(empty, np.inf, fitness[tournaments])
+    if o == 1 and not empty.any():
+        # Note: argmin returns the first occurrence in case of ties.
+        return tournaments[np.arange(len(tournaments)), np.argmin(f, axis=1)]
+    # Sort empty slots last, while keeping the order of equally fit solutions.
+    order = np.lexsort((np.broadcast_to(np.arange(tournaments.shape[1]), f.shape), empty, f), axis=1)[:, :o]
+    rows = np.arange(len(tournaments))[:, None]
+    selected = tournaments[rows, order]
+    return selected[selected >= 0]
+
+
+def truncation_selection_indices(fitness: npt.NDArray[np.float64], to_select: int) -> npt.NDArray[np.int_]:
+    """
+    Select the to_select best solutions (minimization), in order of increasing fitness.
+    """
+    if to_select >= len(fitness):
+        return np.argsort(fitness, kind="stable")
+    best = np.argpartition(fitness, to_select - 1)[:to_select]
+    return best[np.argsort(fitness[best], kind="stable")]
+
+
+def mu_plus_lambda_selection_indices(
+    parent_fitness: npt.NDArray[np.float64], offspring_fitness: npt.NDArray[np.float64], mu: int
+) -> npt.NDArray[np.int_]:
+    """
+    (mu + lambda) selection: select the mu best of parents and offspring combined.
+
+    Returns indices into the concatenation of parents and offspring.
+    """
+    return truncation_selection_indices(np.concatenate([parent_fitness, offspring_fitness]), mu)
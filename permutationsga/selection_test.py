@@ -0,0 +1,51 @@
+import numpy as np
+
+from .ga import single_tournament, tournament_selection
+from .problem import Solution
+from .selection import truncation_selection_indices, mu_plus_lambda_selection_indices
+
+def tournament_selection_reference(rng, population, to_select, s=4, o=1, shuffle=True):
+    # Original, loop-based, implementation of tournament selection.
+    selected = []
+    idx = 0
+    if not shuffle:
+        p = np.arange(len(population))
+    else:
+        p = rng.permutation(len(population))
+
+    while len(selected) < to_select:
+        if idx + s >= len(population) and shuffle:
+            p = rng.permutation(len(population))
+            idx = 0
+        selected += single_tournament([population[i] for i in p[idx : idx + s]], o)
+        idx += s
+    return selected[:to_select]
+
+def test_tournament_selection_matches_reference():
+    for n, to_select, s, o, shuffle in [
+        (64, 64, 4, 1, True),
+        (128, 64, 4, 1, True),
+        (50, 50, 3, 2, True),
+        (10, 20, 4, 1, True),
+        (3, 5, 4, 1, True),
+        (64, 16, 4, 1, False),
+        (62, 32, 4, 2, False),
+    ]:
+        population = [Solution(None) for _ in range(n)]
+        # Include plenty of ties, which should be broken in the same way.
+        fitness = np.random.default_rng(seed=n).integers(0, 10, size=n)
+        for solution, f in zip(population, fitness):
+            solution.f = f
+
+        rng_a = np.random.default_rng(seed=42)
+        rng_b = np.random.default_rng(seed=42)
+        a = tournament_selection(rng_a, population, to_select, s, o, shuffle)
+        b = tournament_selection_reference(rng_b, population, to_select, s, o, shuffle)
+
+        assert [id(x) for x in a] == [id(x) for x in b]
+        assert rng_a.random() == rng_b.random(), "The same random numbers should have been drawn"
+
+def test_truncation_selection():
+    fitness = np.array([5.0, 1.0, 3.0, 0.0, 4.0])
+    np.testing.assert_array_equal(truncation_selection_indices(fitness, 3), [3, 1, 2])
+    np.testing.assert_array_equal(mu_plus_lambda_selection_indices(fitness[:2], fitness[2:], 2), [3, 1])
@@ -0,0 +1,106 @@
+#
+# Steady-state GA: offspring replace individuals one by one, rather than a full population at a time.
+#
+
+import heapq
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from .ga import ConfigurableGA, Initialization, Recombinator
+from .problem import Problem, Solution
+from .profiling import GenerationProfiler
+
+REPLACEMENT_POLICIES = ["worst", "oldest", "tournament"]
+
+
+class SteadyStateGA(ConfigurableGA):
+    """
+    Steady-state GA: each step creates a few offspring (as many as the recombinator creates, which should
+    not include the population itself), evaluates them and inserts them into the population one by one,
+    replacing an individual chosen by the replacement policy:
+    - "worst": the worst individual, if the offspring is better. Uses a heap, i.e. O(log n) per offspring.
+    - "oldest": the individual that has been in the population the longest.
+    - "tournament": the worst of tournament_size randomly chosen individuals.
+
+    A generation consists of as many steps as needed to create population_size offspring.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        population_size: int,
+        problem: Problem,
+        initialization: Initialization,
+        recombinator: Recombinator,
+        mutation_fn,
+        replacement: str = "worst",
+        tournament_size: int = 4,
+        profiler: Optional[GenerationProfiler] = None,
+        mutation_probability: float = 0.001,
+        local_search=None,
+    ):
+        assert replacement in REPLACEMENT_POLICIES, \
+            f"Unknown replacement policy {replacement}, expected one of {REPLACEMENT_POLICIES}"
+        assert getattr(recombinator, "include_what", None) != "population", \
+            "Offspring of a steady-state GA should not include the population"
+        super().__init__(
+            seed, population_size, problem, initialization, recombinator, None, mutation_fn,
+            profiler=profiler, mutation_probability=mutation_probability, local_search=local_search,
+        )
+        self.replacement = replacement
+        self.tournament_size = min(tournament_size, population_size)
+        # Max-heap (by fitness) of (-f, index), for the worst policy, rebuilt from the population when None.
+        self.heap: Optional[List[Tuple[float, int]]] = None
+        # Indices of the population, from oldest to newest, for the oldest policy.
+        self.age_order: Deque[int] = deque(range(population_size))
+        self.checkpoint_components["steady_state"] = self
+
+    def get_state(self):
+        # Note: the heap is rebuilt from the population.
+        return {"age_order": list(self.age_order)}
+
+    def set_state(self, state):
+        self.age_order = deque(state["age_order"])
+        self.heap = None
+
+    def insert(self, solution: Solution):
+        """
+        Insert an (evaluated) solution into the population, according to the replacement policy.
+        """
+        population: List[Solution] = self.population # type: ignore
+        if self.replacement == "worst":
+            if self.heap is None:
+                self.heap = [(-s.f, i) for i, s in enumerate(population)]
+                heapq.heapify(self.heap)
+            neg_f, i = self.heap[0]
+            if solution.f < -neg_f:
+                population[i] = solution
+                heapq.heapreplace(self.heap, (-solution.f, i))
+        elif self.replacement == "oldest":
+            i = self.age_order.popleft()
+            population[i] = solution
+            self.age_order.append(i)
+        else:
+            candidates = self.rng.choice(len(population), size=self.tournament_size, replace=False)
+            i = max(candidates, key=lambda c: population[c].f)
+            population[i] = solution
+
+    def create_offspring_and_select(self):
+        assert not self.population_array, "The steady-state GA works on a List[Solution] population"
+        num_created = 0
+        while num_created < self.population_size:
+            with self.stage("recombine"):
+                offspring = self.recombinator.recombine(self.rng, self.population)
+            if self.mutation_fn is not None:
+                with self.stage("mutate"):
+                    offspring = self.mutate(offspring)
+            with self.stage("evaluate"):
+                for solution in offspring:
+                    self.problem.evaluate(solution)
+            if self.local_search is not None:
+                with self.stage("local search"):
+                    self.local_search.improve_all(offspring)
+            with self.stage("select"):
+                for solution in offspring:
+                    self.insert(solution)
+            num_created += len(offspring)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from .ga import (
+    RandomPermutationInitialization,
+    FunctionBasedRecombinator,
+    TournamentSelection,
+    crossover_pmx,
+    generate_uniform_indices,
+)
+from .problem import ElitistTracker, IdenticalDecoder
+from .qap import QAP, read_qaplib
+from .steady_state import SteadyStateGA
+
+def setup_ga(replacement: str):
+    problem = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    l = problem.get_length()
+    rng = np.random.default_rng(seed=43)
+    recombinator = FunctionBasedRecombinator(
+        lambda: generate_uniform_indices(rng, l, 0.5), crossover_pmx, TournamentSelection(), 2
+    )
+    ga = SteadyStateGA(42, 32, problem, RandomPermutationInitialization(l), recombinator, None, replacement=replacement)
+    return problem, ga
+
+@pytest.mark.parametrize("replacement", ["worst", "oldest", "tournament"])
+def test_steady_state(replacement):
+    problem, ga = setup_ga(replacement)
+    ga.generation()
+    initial = [s.f for s in ga.population]
+    initial_solutions = list(ga.population)
+    for _ in range(5):
+        ga.generation()
+    assert len(ga.population) == 32
+    # Initial population + 5 generations of 32 offspring.
+    assert problem.num_evaluations == 6 * 32
+    fitness = [s.f for s in ga.population]
+    if replacement == "worst":
+        # Never replaces a solution by a worse one.
+        assert np.all(np.sort(fitness) <= np.sort(initial)) and min(fitness) == problem.current_elitist.f
+        worst = max(range(32), key=lambda i: fitness[i])
+        assert ga.heap is not None and ga.heap[0] == (-fitness[worst], worst)
+    if replacement == "oldest":
+        # Every initial solution has been replaced.
+        assert not any(s is t for s in ga.population for t in initial_solutions)
+        assert sorted(ga.age_order) == list(range(32))
@@ -0,0 +1,290 @@
+#
+# Parameter sweeps over GA configurations, using racing to stop evaluating configurations that are
+# (statistically) worse than the best one, in the style of irace.
+#
+
+import functools
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from scipy import stats # type: ignore
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .ga import (
+    ConfigurableGA,
+    FunctionBasedRecombinator,
+    RandomPermutationInitialization,
+    SequentialSelector,
+    TournamentSelection,
+    crossover_pmx,
+    generate_uniform_indices,
+)
+from .instances import load_qaplib
+from .local_search import SwapLocalSearch
+from .problem import ElitistTracker, IdenticalDecoder
+from .qap import QAP, read_qaplib_solution
+from .runner import run_job
+from new_fns import crossover_pmx_predef_secs
+
+
+class Uniform:
+    """
+    A continuous knob for random_configurations, sampled uniformly (or log-uniformly) from [low, high].
+    """
+
+    def __init__(self, low: float, high: float, log: bool = False):
+        self.low = low
+        self.high = high
+        self.log = log
+
+    def sample(self, rng: np.random.Generator) -> float:
+        if self.log:
+            return float(np.exp(rng.uniform(np.log(self.low), np.log(self.high))))
+        return float(rng.uniform(self.low, self.high))
+
+
+def grid(space: Dict[str, list]) -> List[dict]:
+    """
+    All combinations of the values of each knob.
+    """
+    return [dict(zip(space.keys(), values)) for values in itertools.product(*space.values())]
+
+
+def random_configurations(space: Dict[str, object], n: int, seed: int) -> List[dict]:
+    """
+    n configurations, sampling each knob uniformly from its list of values (or its Uniform range).
+    """
+    rng = np.random.default_rng(seed=seed)
+    configurations = []
+    for _ in range(n):
+        configuration = {}
+        for knob, values in space.items():
+            if isinstance(values, Uniform):
+                configuration[knob] = values.sample(rng)
+            else:
+                configuration[knob] = values[rng.integers(len(values))] # type: ignore
+        configurations.append(configuration)
+    return configurations
+
+
+def describe(configuration: dict) -> str:
+    """
+    Readable description of a configuration, using the names of functions and classes.
+    """
+    return ", ".join(f"{knob}={getattr(value, '__name__', repr(value))}" for knob, value in configuration.items())
+
+
+# Crossover functions that determine the indices to exchange themselves.
+CROSSOVERS_WITHOUT_INDICES = {crossover_pmx_predef_secs}
+
+
+def setup_configured_ga(configuration: dict, seed: int, instance: str):
+    """
+    Set up a GA for a QAPLIB instance (path of the .dat file), from the knobs of a configuration:
+    crossover, mutation, mutation_probability, population_size, selection (class), initialization (class)
+    & local_search (None, or the strategy of a SwapLocalSearch, with local_search_fraction & local_search_budget).
+    The value-to-reach is the optimum listed in the .sln file of the instance, if any.
+    """
+    sln = os.path.splitext(instance)[0] + ".sln"
+    vtr = read_qaplib_solution(sln)[1] if os.path.exists(sln) else None
+    tracker = ElitistTracker(IdenticalDecoder(QAP(*load_qaplib(instance))), vtr)
+    l = tracker.get_length()
+    population_size = configuration.get("population_size", 2**10)
+
+    crossover = configuration.get("crossover", crossover_pmx)
+    indices_gen = None
+    if crossover not in CROSSOVERS_WITHOUT_INDICES:
+        indices_rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(3,)))
+        indices_gen = lambda: generate_uniform_indices(indices_rng, l, 0.5)
+    recombinator = FunctionBasedRecombinator(
+        indices_gen,
+        crossover,
+        SequentialSelector(),
+        population_size * 2,
+        include_what="population",
+    )
+    local_search = None
+    if configuration.get("local_search") is not None:
+        local_search = SwapLocalSearch(
+            tracker,
+            int(np.random.SeedSequence(seed, spawn_key=(4,)).generate_state(1)[0]),
+            strategy=configuration["local_search"],
+            fraction=configuration.get("local_search_fraction", 1.0),
+            budget=configuration.get("local_search_budget", None),
+        )
+    ga = ConfigurableGA(
+        seed,
+        population_size,
+        tracker,
+        configuration.get("initialization", RandomPermutationInitialization)(l),
+        recombinator,
+        configuration.get("selection", TournamentSelection)(),
+        configuration.get("mutation", None),
+        mutation_probability=configuration.get("mutation_probability", 0.001),
+        local_search=local_search,
+    )
+    return tracker, ga
+
+
+def best_fitness(history: pd.DataFrame) -> float:
+    return float(history["fitness"].min())
+
+
+def racing_eliminations(scores: np.ndarray, alpha: float) -> List[int]:
+    """
+    Given a (blocks, configurations) matrix of scores (lower is better), determine the configurations
+    that are significantly worse than the best one.
+
+    With more than two configurations: a Friedman test, followed by Conover's post-hoc comparison with the
+    configuration of the lowest rank sum. With two configurations: a paired t-test.
+    """
+    b, k = scores.shape
+    if k < 2 or b < 2:
+        return []
+    if k == 2:
+        if np.all(scores[:, 0] == scores[:, 1]):
+            return []
+        p = stats.ttest_rel(scores[:, 0], scores[:, 1]).pvalue
+        if not p < alpha:
+            return []
+        return [int(np.argmax(scores.mean(axis=0)))]
+
+    ranks = stats.rankdata(scores, axis=1)
+    rank_sums = ranks.sum(axis=0)
+    A = (ranks ** 2).sum()
+    denominator = (b - 1) * (k - 1)
+    variance = 2 * (b * A - (rank_sums ** 2).sum()) / denominator
+    if variance <= 0:
+        # Identical rankings in every block: as significant as can be.
+        worse = rank_sums > rank_sums.min()
+        return list(np.flatnonzero(worse))
+    if not stats.friedmanchisquare(*scores.T).pvalue < alpha:
+        return []
+    critical = stats.t.ppf(1 - alpha / 2, denominator) * np.sqrt(variance)
+    return list(np.flatnonzero(rank_sums - rank_sums.min() > critical))
+
+
+class Race:
+    """
+    Race configurations across a sequence of blocks, i.e. (instance, seed) pairs: run all surviving
+    configurations on the next block(s), and, from first_test blocks onwards, eliminate those that are
+    significantly worse than the best one (see racing_eliminations).
+
+    Scores of completed runs are appended to a CSV file at path (if provided) after each round,
+    a race with the same configurations & blocks continues from there.
+
+    :param setup_ga: function (configuration, seed, instance) -> (tracker, ga), picklable.
+    :param score: function of the elitist history of a run -> score, lower is better.
+    :param blocks_per_round: number of blocks to run before each test, increase to use more processes.
+    """
+
+    def __init__(
+        self,
+        configurations: List[dict],
+        blocks: Sequence[Tuple[object, int]],
+        num_generations: int,
+        setup_ga: Callable = setup_configured_ga,
+        score: Callable[[pd.DataFrame], float] = best_fitness,
+        path: Optional[str] = None,
+        first_test: int = 5,
+        alpha: float = 0.05,
+        blocks_per_round: int = 1,
+        processes: Optional[int] = None,
+    ):
+        self.configurations = configurations
+        self.blocks = list(blocks)
+        self.num_generations = num_generations
+        self.setup_ga = setup_ga
+        self.score = score
+        self.path = path
+        self.first_test = first_test
+        self.alpha = alpha
+        self.blocks_per_round = blocks_per_round
+        self.processes = processes
+
+        self.alive = list(range(len(configurations)))
+        # (configuration, block) -> score
+        self.scores: Dict[Tuple[int, int], float] = {}
+        self.eliminations: List[dict] = []
+        self.load()
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        for row in pd.read_csv(self.path).itertuples(index=False):
+            assert row.description == describe(self.configurations[row.configuration]), \
+                f"{self.path} belongs to a race with different configurations"
+            self.scores[(int(row.configuration), int(row.block))] = float(row.score)
+
+    def persist(self, rows: List[dict]):
+        if self.path is None or len(rows) == 0:
+            return
+        pd.DataFrame(rows).to_csv(self.path, mode="a", header=not os.path.exists(self.path), index=False)
+
+    def run_round(self, blocks: List[int]):
+        pending = [(c, b) for b in blocks for c in self.alive if (c, b) not in self.scores]
+        jobs = [
+            (functools.partial(self.setup_ga, self.configurations[c]), self.blocks[b][0], self.blocks[b][1])
+            for c, b in pending
+        ]
+        if self.processes == 1:
+            histories = [run_job(setup, instance, seed, self.num_generations) for setup, instance, seed in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                futures = [
+                    pool.submit(run_job, setup, instance, seed, self.num_generations)
+                    for setup, instance, seed in jobs
+                ]
+                histories = [future.result() for future in futures]
+
+        rows = []
+        for (c, b), history in zip(pending, histories):
+            self.scores[(c, b)] = self.score(history)
+            rows.append({
+                "configuration": c,
+                "block": b,
+                "instance": self.blocks[b][0],
+                "seed": self.blocks[b][1],
+                "score": self.scores[(c, b)],
+                "description": describe(self.configurations[c]),
+            })
+        self.persist(rows)
+
+    def test(self, num_blocks: int):
+        scores = np.array([[self.scores[(c, b)] for c in self.alive] for b in range(num_blocks)])
+        for i in sorted(racing_eliminations(scores, self.alpha), reverse=True):
+            self.eliminations.append({"configuration": self.alive[i], "blocks": num_blocks})
+            del self.alive[i]
+
+    def run(self) -> pd.DataFrame:
+        """
+        Run the race, returns a summary per configuration, best (by mean score across the blocks
+        run by the surviving configurations) first.
+        """
+        num_blocks = 0
+        while num_blocks < len(self.blocks) and len(self.alive) > 1:
+            round_blocks = list(range(num_blocks, min(num_blocks + self.blocks_per_round, len(self.blocks))))
+            self.run_round(round_blocks)
+            num_blocks = round_blocks[-1] + 1
+            if num_blocks >= self.first_test:
+                self.test(num_blocks)
+        return self.summary()
+
+    def summary(self) -> pd.DataFrame:
+        eliminated_after = {e["configuration"]: e["blocks"] for e in self.eliminations}
+        rows = []
+        for c, configuration in enumerate(self.configurations):
+            scores = [score for (sc, _), score in self.scores.items() if sc == c]
+            rows.append({
+                "configuration": c,
+                "description": describe(configuration),
+                "alive": c in self.alive,
+                "eliminated after": eliminated_after.get(c),
+                "blocks": len(scores),
+                "mean score": np.mean(scores) if len(scores) > 0 else np.nan,
+            })
+        summary = pd.DataFrame(rows)
+        summary = summary.sort_values(["alive", "blocks", "mean score"], ascending=[False, False, True])
+        return summary.reset_index(drop=True)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from .ga import crossover_pmx, crossover_ox
+from .sweep import Race, grid, racing_eliminations, random_configurations, Uniform
+from new_fns import swap_mutation
+
+def test_configurations():
+    configurations = grid({"crossover": [crossover_pmx, crossover_ox], "population_size": [8, 16, 32]})
+    assert len(configurations) == 6
+    assert configurations[1] == {"crossover": crossover_pmx, "population_size": 16}
+
+    sampled = random_configurations({"population_size": [8, 16], "mutation_probability": Uniform(1e-3, 1e-1, log=True)}, 10, 42)
+    assert all(1e-3 <= c["mutation_probability"] <= 1e-1 for c in sampled)
+
+def test_racing_eliminations():
+    rng = np.random.default_rng(seed=42)
+    # Configuration 2 is clearly worse, 0 and 1 are indistinguishable.
+    scores = rng.normal(size=(10, 3)) + np.array([0.0, 0.0, 10.0])
+    assert racing_eliminations(scores, 0.05) == [2]
+    assert racing_eliminations(scores[:, :2], 0.05) == []
+    assert racing_eliminations(scores[:, 1:], 0.05) == [1]
+
+def test_race_resumes(tmp_path):
+    configurations = grid({"population_size": [4, 64], "mutation": [swap_mutation], "mutation_probability": [0.05]})
+    blocks = [("./instances/qap/bur26a.dat", seed) for seed in range(6)]
+    path = str(tmp_path / "race.csv")
+
+    race = Race(configurations, blocks, num_generations=3, path=path, first_test=3, processes=1)
+    summary = race.run()
+    # The small population is worse on every block, and is eliminated.
+    assert list(summary["configuration"]) == [1, 0]
+    assert list(summary["alive"]) == [True, False]
+    assert [e["configuration"] for e in race.eliminations] == [0]
+
+    resumed = Race(configurations, blocks, num_generations=3, path=path, first_test=3, processes=1)
+    assert resumed.scores == race.scores
+    resumed.run()
+    assert resumed.eliminations == race.eliminations
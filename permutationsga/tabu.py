@@ -0,0 +1,181 @@
+#
+# Robust Tabu Search (Taillard, 1991) for the QAP.
+#
+# Keeps the change in objective of every possible swap in an (n, n) matrix, which is updated in O(n^2) per move.
+#
+
+import numpy as np
+import numpy.typing as npt
+from typing import Optional, Tuple
+
+from .problem import ElitistTracker, Problem, Solution, find_problem
+from .qap import QAP, qap_delta_matrix, widen
+
+
+class RobustTabuSearch:
+    """
+    Robust Tabu Search for the QAP (Taillard, 1991).
+
+    Every iteration performs the best swap that is not tabu: a swap is tabu if it would place both
+    elements at positions they left within the last `tenure` iterations. The tenure is drawn uniformly from
+    [tenure_range[0] n, tenure_range[1] n] every 2 (max tenure) iterations. Aspiration criteria:
+    a tabu swap is allowed if it improves upon the best solution found, and a swap placing both elements at
+    positions they have not occupied for aspiration iterations (default: 5 n^2) is forced.
+
+    The problem is a (chain of) problems containing a QAP, e.g. ElitistTracker(IdenticalDecoder(QAP(...))):
+    the search operates on the phenotype, improvements are registered with the ElitistTracker (if any),
+    counting evaluations_per_iteration evaluations for every iteration.
+
+    Can be used standalone (like a GA: `generation` performs iterations_per_generation iterations)
+    or as an improvement operator on GA offspring (as mutation_fn, see __call__).
+    """
+
+    def __init__(
+        self,
+        problem: Problem,
+        seed: int,
+        tenure_range: Tuple[float, float] = (0.9, 1.1),
+        aspiration: Optional[int] = None,
+        evaluations_per_iteration: int = 1,
+        iterations_per_generation: int = 100,
+        improve_iterations: int = 100,
+    ):
+        qap = find_problem(problem, QAP)
+        assert isinstance(qap, QAP), "Robust Tabu Search requires a QAP"
+        self.problem = problem
+        self.tracker = find_problem(problem, ElitistTracker)
+        self.A, self.B = qap.A, qap.B
+        self.n = qap.l
+        self.rng = np.random.default_rng(seed=seed)
+        self.tenure_min = max(1, int(tenure_range[0] * self.n))
+        self.tenure_max = max(self.tenure_min, int(np.ceil(tenure_range[1] * self.n)))
+        self.aspiration = 5 * self.n * self.n if aspiration is None else aspiration
+        self.evaluations_per_iteration = evaluations_per_iteration
+        self.iterations_per_generation = iterations_per_generation
+        self.improve_iterations = improve_iterations
+        # Search state, see start.
+        self.p: Optional[np.ndarray] = None
+        self.initialized = False
+
+    def start(self, p: npt.NDArray[np.int_], f: Optional[float] = None):
+        """
+        Start a search from (phenotype) p, with fitness f (if known).
+        """
+        self.p = np.array(p, dtype=np.int64)
+        self.delta = qap_delta_matrix(self.A, self.B, self.p)
+        if f is None:
+            f = (self.A * widen(self.B[np.ix_(self.p, self.p)])).sum()
+        self.f = f
+        self.best_p = np.copy(self.p)
+        self.best_f = f
+        # tabu[i, v]: iteration until which placing value v at position i is tabu.
+        # Initially distinct and in the past, such that moves are only forced once the search has run for a while.
+        self.tabu = -1 - np.arange(self.n * self.n, dtype=np.int64).reshape(self.n, self.n)
+        self.iteration = 0
+        self.tenure = self.tenure_min
+        self.initialized = True
+
+    def choose_move(self) -> Tuple[int, int]:
+        assert self.p is not None
+        it = self.iteration
+        upper = np.triu(np.ones((self.n, self.n), dtype=bool), k=1)
+        # until[r, s] = tabu[r, p[s]]: until when placing the value at s at position r is tabu.
+        until = self.tabu[:, self.p]
+        tabu = (until > it) & (until.T > it)
+        authorized = upper & (~tabu | (self.f + self.delta < self.best_f))
+        aspired = upper & (until < it - self.aspiration) & (until.T < it - self.aspiration)
+        candidates = aspired if aspired.any() else authorized if authorized.any() else upper
+        masked = np.where(candidates, self.delta, np.inf if self.delta.dtype.kind == "f" else np.iinfo(self.delta.dtype).max)
+        r, s = np.unravel_index(np.argmin(masked), masked.shape)
+        return int(r), int(s)
+
+    def apply_move(self, r: int, s: int):
+        """
+        Swap positions r and s, updating the delta matrix in O(n^2).
+        """
+        assert self.p is not None
+        p = self.p
+        self.f += self.delta[r, s]
+        p[r], p[s] = p[s], p[r]
+        A, B = self.A, self.B
+        # Taillard's update for swaps (u, v) not involving r or s.
+        a = widen(A[r, :]) - A[s, :]
+        b = widen(B[p[s], p]) - B[p[r], p]
+        a2 = widen(A[:, r]) - A[:, s]
+        b2 = widen(B[p, p[s]]) - B[p, p[r]]
+        self.delta += np.subtract.outer(a, a) * np.subtract.outer(b, b)
+        self.delta += np.subtract.outer(a2, a2) * np.subtract.outer(b2, b2)
+        # Swaps involving r or s are recomputed.
+        rows = qap_delta_matrix(A, B, p, [r, s])
+        self.delta[[r, s], :] = rows
+        self.delta[:, [r, s]] = rows.T
+
+    def step(self, iterations: int):
+        """
+        Perform a number of iterations.
+        """
+        assert self.p is not None, "Start the search first."
+        for _ in range(iterations):
+            if self.iteration % (2 * self.tenure_max) == 0:
+                self.tenure = int(self.rng.integers(self.tenure_min, self.tenure_max + 1))
+            r, s = self.choose_move()
+            # Moving back to the positions left is tabu.
+            self.tabu[r, self.p[r]] = self.iteration + self.tenure
+            self.tabu[s, self.p[s]] = self.iteration + self.tenure
+            self.apply_move(r, s)
+            self.iteration += 1
+
+            improved = self.f < self.best_f
+            if improved:
+                self.best_f = self.f
+                self.best_p[:] = self.p
+            self.count(improved)
+
+    def count(self, improved: bool):
+        """
+        Count the evaluations of an iteration, registering the current solution if it improved.
+        """
+        if self.tracker is None:
+            return
+        if improved:
+            self.tracker.register(self.solution(self.p, self.f), self.evaluations_per_iteration)
+        else:
+            self.tracker.num_requested_evaluations += self.evaluations_per_iteration
+            self.tracker.count_evaluations(self.evaluations_per_iteration)
+
+    def solution(self, p: np.ndarray, f) -> Solution:
+        sol = Solution(self.problem.encode(np.copy(p)))
+        sol.s = np.copy(p)
+        sol.f = f
+        sol.evaluated = True
+        return sol
+
+    @property
+    def best(self) -> Solution:
+        return self.solution(self.best_p, self.best_f)
+
+    def generation(self):
+        if not self.initialized:
+            p = self.rng.permutation(self.n)
+            self.start(p)
+            if self.tracker is not None:
+                self.tracker.register(self.solution(p, self.f))
+            return
+        self.step(self.iterations_per_generation)
+
+    def __call__(self, solution: Solution, mutation_probability=None) -> Solution:
+        """
+        Improve a solution, returns the best solution found (evaluated) within improve_iterations iterations.
+        Can be used as mutation_fn of a GA.
+        """
+        assert solution.e is not None
+        if solution.evaluated:
+            # Already evaluated (and counted): only decode, if needed.
+            s = solution.s if solution.s is not None else self.problem.decode_batch(np.asarray(solution.e)[None, :])[0]
+            self.start(s, solution.f)
+        else:
+            self.start(self.problem.decode_batch(np.asarray(solution.e)[None, :])[0])
+            if self.tracker is not None:
+                self.tracker.register(self.solution(self.p, self.f)) # type: ignore
+        self.step(self.improve_iterations)
+        return self.best
@@ -0,0 +1,65 @@
+import numpy as np
+
+from .problem import ElitistTracker, IdenticalDecoder, InvPermDecoder, Solution
+from .qap import QAP, qap_delta_matrix, read_qaplib, swap_delta_qap
+from .tabu import RobustTabuSearch
+
+def test_delta_matrix():
+    rng = np.random.default_rng(seed=42)
+    n = 12
+    A = rng.integers(0, 10, size=(n, n))
+    B = rng.integers(0, 10, size=(n, n))
+    p = rng.permutation(n)
+    delta = qap_delta_matrix(A, B, p, chunk_size=n * n * 5)
+    for r in range(n):
+        for q in range(n):
+            assert delta[r, q] == swap_delta_qap(A, B, p, r, q)
+
+def test_delta_matrix_updates():
+    problem = QAP(*read_qaplib("./instances/qap/bur26a.dat"))
+    search = RobustTabuSearch(IdenticalDecoder(problem), 42)
+    search.start(np.random.default_rng(seed=43).permutation(problem.l))
+    search.step(50)
+    # The incrementally updated deltas & fitness match those computed from scratch.
+    assert np.array_equal(search.delta, qap_delta_matrix(problem.A, problem.B, search.p))
+    sol = Solution(np.copy(search.p))
+    IdenticalDecoder(problem).evaluate(sol)
+    assert sol.f == search.f
+
+def test_tabu_search_bur26a():
+    tracker = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    search = RobustTabuSearch(tracker, 42, iterations_per_generation=500)
+    for _ in range(5):
+        search.generation()
+    # Within 0.1% of the optimum (5426670).
+    assert tracker.current_elitist.f <= 5426670 * 1.001
+    assert tracker.current_elitist.f == search.best_f
+    assert tracker.num_evaluations == 1 + 4 * 500
+
+def test_tabu_search_improvement_operator():
+    tracker = ElitistTracker(InvPermDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    search = RobustTabuSearch(tracker, 42, improve_iterations=50)
+    offspring = Solution(np.random.default_rng(seed=43).permutation(26))
+    tracker.evaluate(offspring)
+    improved = search(offspring, None)
+    assert improved.f < offspring.f
+    # The genotype of the improved solution decodes to its phenotype.
+    assert improved.evaluated and np.array_equal(tracker.decode_batch(improved.e[None, :])[0], improved.s)
+    check = Solution(np.copy(improved.e))
+    tracker.evaluate(check)
+    assert check.f == improved.f
+
+def test_tabu_search_mutation_counts_once():
+    from .ga import ConfigurableGA, FunctionBasedRecombinator, RandomPermutationInitialization, SequentialSelector, TournamentSelection
+    from new_fns import crossover_pmx_predef_secs
+    tracker = ElitistTracker(IdenticalDecoder(QAP(*read_qaplib("./instances/qap/bur26a.dat"))), None)
+    search = RobustTabuSearch(tracker, 43, improve_iterations=0)
+    recombinator = FunctionBasedRecombinator(
+        None, crossover_pmx_predef_secs, SequentialSelector(), 2 * 16, include_what="population"
+    )
+    ga = ConfigurableGA(42, 16, tracker, RandomPermutationInitialization(26), recombinator, TournamentSelection(), search)
+    for _ in range(3):
+        ga.generation()
+    # Parents included in the offspring were evaluated (batched) before: they are not counted again.
+    assert all(solution.s is not None for solution in ga.population)
+    assert tracker.num_evaluations == 16 + 2 * 16
@@ -1,9 +1,12 @@
 import numpy as np
+import numpy.typing as npt
+from typing import List, Optional, Tuple
 
 # Documentation see https://tsplib95.readthedocs.io/en/stable/
 import tsplib95 as tsp # type: ignore
 
-from .problem import Problem, Solution
+from .problem import Problem, Solution, is_valid_permutation_batch
+from .qap import widen
 
 
 class TSP(Problem):
@@ -28,8 +31,207 @@ class TSP(Problem):
 
         # Note, TSPLIB95 uses 1-based Permutations / indexing, while numpy (and we) use zero based (indexed) permutations.
         # Convert by adding one to all the elements.
-        f = self.problem.trace_tours([sol.s + 1])[0]
+        # (Widened first, such that a compact dtype, e.g. uint8, cannot overflow.)
+        f = self.problem.trace_tours([sol.s.astype(np.int64) + 1])[0]
         # Set & return fitness
         sol.f = f
         sol.evaluated = True
         return f
+
+
+# Edge weight types for which distances can be computed from coordinates.
+COORDINATE_WEIGHT_TYPES = ["EUC_2D", "EUC_3D", "CEIL_2D", "MAN_2D", "MAN_3D", "MAX_2D", "MAX_3D", "ATT", "GEO"]
+
+
+def _nint(x):
+    return np.floor(x + 0.5)
+
+def _geo_radians(x):
+    # TSPLIB: the integer part are degrees, the fractional part minutes. Note TSPLIB uses PI = 3.141592.
+    degrees = np.trunc(x)
+    return 3.141592 * (degrees + 5.0 * (x - degrees) / 3.0) / 180.0
+
+def coordinate_distances(weight_type: str, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Distances between the (..., dim) coordinates a and b (broadcast), using the rounding rules of TSPLIB.
+    """
+    delta = a - b
+    if weight_type in ("EUC_2D", "EUC_3D"):
+        return _nint(np.sqrt((delta * delta).sum(axis=-1)))
+    if weight_type == "CEIL_2D":
+        return np.ceil(np.sqrt((delta * delta).sum(axis=-1)))
+    if weight_type in ("MAN_2D", "MAN_3D"):
+        return _nint(np.abs(delta).sum(axis=-1))
+    if weight_type in ("MAX_2D", "MAX_3D"):
+        return np.maximum.reduce(_nint(np.abs(delta)), axis=-1)
+    if weight_type == "ATT":
+        r = np.sqrt((delta * delta).sum(axis=-1) / 10.0)
+        t = _nint(r)
+        return np.where(t < r, t + 1, t)
+    if weight_type == "GEO":
+        lat_a, lng_a = _geo_radians(a[..., 0]), _geo_radians(a[..., 1])
+        lat_b, lng_b = _geo_radians(b[..., 0]), _geo_radians(b[..., 1])
+        q1 = np.cos(lng_a - lng_b)
+        q2 = np.cos(lat_a - lat_b)
+        q3 = np.cos(lat_a + lat_b)
+        d = np.trunc(6378.388 * np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)) + 1.0)
+        # The distance of a city to itself is zero.
+        return np.where((delta == 0).all(axis=-1), 0.0, d)
+    raise ValueError(f"Unsupported edge weight type: {weight_type}")
+
+
+class DenseTSP(Problem):
+    """
+    Symmetric TSP, evaluated using a dense (n, n) distance matrix.
+
+    For very large instances (more than dense_limit cities), distances are instead computed
+    from the coordinates when needed.
+    """
+
+    def __init__(
+        self,
+        D: Optional[np.ndarray] = None,
+        coords: Optional[np.ndarray] = None,
+        weight_type: str = "EUC_2D",
+        dense_limit: int = 5000,
+    ):
+        assert D is not None or coords is not None, "Either a distance matrix or coordinates are required"
+        self.weight_type = weight_type
+        self.coords = None if coords is None else np.asarray(coords, dtype=np.float64)
+        if D is None and len(self.coords) <= dense_limit:
+            # Note: distances are integers, following TSPLIB.
+            D = coordinate_distances(weight_type, self.coords[:, None, :], self.coords[None, :, :]).astype(np.int64)
+        # Note: distances are kept as passed (e.g. compact & memory-mapped, see load_tsplib_distances),
+        # the distances gathered are widened, such that sums & differences do not overflow (see distance).
+        self.D = D
+        self.n = len(self.D) if self.D is not None else len(self.coords)
+        # Swap deltas cost O(1) each, but applying them costs O(n) (see evaluate_swaps).
+        self.max_delta_swaps = max(1, self.n // 8)
+
+    @classmethod
+    def from_tsplib(cls, problem: tsp.models.Problem, **kwargs):
+        """
+        Create from a tsplib95 problem: from its coordinates if possible, otherwise from its (explicit) weights.
+        """
+        nodes = list(problem.get_nodes())
+        if problem.edge_weight_type in COORDINATE_WEIGHT_TYPES and problem.node_coords:
+            coords = np.array([problem.node_coords[node] for node in nodes])
+            return cls(coords=coords, weight_type=problem.edge_weight_type, **kwargs)
+        return cls(D=np.array([[problem.get_weight(a, b) for b in nodes] for a in nodes]), **kwargs)
+
+    def get_length(self):
+        return self.n
+
+    def shared_arrays(self):
+        """
+        Arrays defining this problem, see ParallelEvaluator.
+        """
+        if self.D is not None:
+            return {"D": self.D}
+        return {"coords": self.coords, "weight_type": np.array([COORDINATE_WEIGHT_TYPES.index(self.weight_type)])}
+
+    @classmethod
+    def from_shared_arrays(cls, arrays):
+        if "D" in arrays:
+            return cls(D=arrays["D"])
+        return cls(coords=arrays["coords"], weight_type=COORDINATE_WEIGHT_TYPES[int(arrays["weight_type"][0])], dense_limit=0)
+
+    def distance(self, a, b):
+        """
+        Distance(s) between cities a and b (integers or arrays of cities), widened (see qap.widen).
+        """
+        if self.D is not None:
+            return widen(self.D[a, b])
+        return coordinate_distances(self.weight_type, self.coords[a], self.coords[b])
+
+    def tour_length(self, tour: npt.NDArray[np.int_]):
+        return self.distance(tour, np.roll(tour, -1)).sum()
+
+    def tour_length_batch(self, tours: npt.NDArray[np.int_], chunk_size: int = 2**22) -> np.ndarray:
+        """
+        Length of each tour (row) of a (pop, n) matrix, in chunks of at most (approximately) chunk_size edges.
+        """
+        lengths = np.empty(len(tours), dtype=np.float64)
+        rows_per_chunk = max(1, chunk_size // max(1, self.n))
+        for start in range(0, len(tours), rows_per_chunk):
+            t = tours[start:start + rows_per_chunk]
+            lengths[start:start + rows_per_chunk] = self.distance(t, np.roll(t, -1, axis=1)).sum(axis=1)
+        return lengths
+
+    def two_opt_delta(self, tour: npt.NDArray[np.int_], i: int, j: int):
+        """
+        Change in tour length when reversing tour[i + 1:j + 1] (for i < j), i.e. replacing the edges
+        (tour[i], tour[i + 1]) and (tour[j], tour[j + 1]) by (tour[i], tour[j]) and (tour[i + 1], tour[j + 1]).
+        """
+        a, b = tour[i], tour[i + 1]
+        c, d = tour[j], tour[(j + 1) % self.n]
+        return self.distance(a, c) + self.distance(b, d) - self.distance(a, b) - self.distance(c, d)
+
+    def or_opt_delta(self, tour: npt.NDArray[np.int_], i: int, k: int, j: int, reverse: bool = False):
+        """
+        Change in tour length when moving the segment tour[i:i + k] in between tour[j] and tour[j + 1]
+        (optionally reversed), where j is outside of the segment (and not i - 1).
+        """
+        n = self.n
+        prev, first, last, after = tour[(i - 1) % n], tour[i], tour[(i + k - 1) % n], tour[(i + k) % n]
+        c, d = tour[j], tour[(j + 1) % n]
+        removed = self.distance(prev, after) - self.distance(prev, first) - self.distance(last, after)
+        if reverse:
+            first, last = last, first
+        return removed + self.distance(c, first) + self.distance(last, d) - self.distance(c, d)
+
+    def swap_delta(self, tour: npt.NDArray[np.int_], r: int, q: int):
+        """
+        Change in tour length when swapping the cities at positions r and q.
+        """
+        n = self.n
+        if r == q:
+            return 0
+        def at(p):
+            return tour[q] if p == r else tour[r] if p == q else tour[p]
+        # Edges (by starting position) that change.
+        edges = {(r - 1) % n, r, (q - 1) % n, q}
+        return sum(self.distance(at(p), at((p + 1) % n)) - self.distance(tour[p], tour[(p + 1) % n]) for p in edges)
+
+    def evaluate_swaps(self, tour: npt.NDArray[np.int_], parent_f: float, swaps: List[Tuple[int, int]]):
+        """
+        Evaluate tour, given the fitness of a parent from which tour was obtained by performing swaps.
+        """
+        p = np.copy(tour)
+        for r, q in reversed(swaps):
+            p[r], p[q] = p[q], p[r]
+        f = parent_f
+        for r, q in swaps:
+            f += self.swap_delta(p, r, q)
+            p[r], p[q] = p[q], p[r]
+        return f
+
+    def evaluate(self, sol: Solution):
+        if sol.evaluated:
+            return sol.s
+
+        assert sol.s is not None, "Ensure the solution has been decoded, if no decoding is needed, use identity."
+
+        if sol.parent_f is not None and sol.swaps is not None and len(sol.swaps) <= self.max_delta_swaps:
+            f = self.evaluate_swaps(sol.s, sol.parent_f, sol.swaps)
+        elif len(np.unique(sol.s)) != len(sol.s):
+            # Solution is not a valid permutation
+            return np.inf
+        else:
+            f = self.tour_length(sol.s)
+        sol.f = f
+        sol.evaluated = True
+        sol.parent_f = None
+        sol.swaps = None
+        return f
+
+    def evaluate_batch(self, tours: npt.NDArray[np.int_]) -> npt.NDArray[np.float64]:
+        """
+        Evaluate a (pop, n) matrix of (decoded) tours at once, rows that are not a valid permutation get np.inf.
+        """
+        assert tours.ndim == 2 and tours.shape[1] == self.n, "Expected a (pop, n) matrix of tours."
+
+        f = np.full(len(tours), np.inf)
+        valid = is_valid_permutation_batch(self.n, tours)
+        f[valid] = self.tour_length_batch(tours[valid])
+        return f
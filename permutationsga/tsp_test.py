@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import tsplib95 as tsp # type: ignore
+
+from .problem import Solution
+from .tsp import TSP, DenseTSP, coordinate_distances
+
+def random_instance(n: int, weight_type: str = "EUC_2D", seed: int = 42):
+    rng = np.random.default_rng(seed=seed)
+    coords = np.round(rng.random((n, 2)) * 1000, 1)
+    if weight_type == "GEO":
+        coords = np.round(rng.random((n, 2)) * 90, 2)
+    lines = [f"NAME: random\nTYPE: TSP\nDIMENSION: {n}\nEDGE_WEIGHT_TYPE: {weight_type}\nNODE_COORD_SECTION"]
+    lines += [f"{i + 1} {x} {y}" for i, (x, y) in enumerate(coords)]
+    return tsp.parse("\n".join(lines) + "\nEOF\n")
+
+@pytest.mark.parametrize("weight_type", ["EUC_2D", "CEIL_2D", "MAN_2D", "MAX_2D", "ATT"])
+def test_distances_match_tsplib95(weight_type):
+    problem = random_instance(30, weight_type)
+    dense = DenseTSP.from_tsplib(problem)
+    expected = np.array([[problem.get_weight(a, b) for b in range(1, 31)] for a in range(1, 31)])
+    np.testing.assert_array_equal(dense.D, expected)
+
+def test_evaluate_matches_tsp():
+    problem = random_instance(40)
+    reference = TSP(problem)
+    dense = DenseTSP.from_tsplib(problem)
+    on_the_fly = DenseTSP.from_tsplib(problem, dense_limit=0)
+    assert on_the_fly.D is None
+
+    rng = np.random.default_rng(seed=1)
+    tours = np.stack([rng.permutation(40) for _ in range(8)])
+    tours[3, 0] = tours[3, 1]
+    expected = []
+    for tour in tours:
+        sol = Solution(tour)
+        sol.s = tour
+        expected.append(reference.evaluate(sol))
+    np.testing.assert_array_equal(dense.evaluate_batch(tours), expected)
+    np.testing.assert_array_equal(on_the_fly.evaluate_batch(tours), expected)
+
+def test_move_deltas():
+    dense = DenseTSP.from_tsplib(random_instance(25))
+    rng = np.random.default_rng(seed=2)
+    n = dense.n
+    for _ in range(200):
+        tour = rng.permutation(n)
+        f = dense.tour_length(tour)
+
+        i, j = np.sort(rng.choice(n, 2, replace=False))
+        moved = np.concatenate([tour[:i + 1], tour[i + 1:j + 1][::-1], tour[j + 1:]])
+        assert dense.two_opt_delta(tour, i, j) == dense.tour_length(moved) - f
+
+        i, k = rng.integers(n), rng.integers(1, 4)
+        segment = tour[np.arange(i, i + k) % n]
+        rest = np.roll(tour, -(i + k))[:n - k]
+        # Insert after a city outside of the segment, other than the one before it.
+        c = rng.integers(0, n - k - 1)
+        j = int(np.flatnonzero(tour == rest[c])[0])
+        for reverse in [False, True]:
+            inserted = segment[::-1] if reverse else segment
+            moved = np.concatenate([rest[:c + 1], inserted, rest[c + 1:]])
+            assert dense.or_opt_delta(tour, i, k, j, reverse) == dense.tour_length(moved) - f
+
+        r, q = rng.integers(n, size=2)
+        swapped = np.copy(tour)
+        swapped[r], swapped[q] = swapped[q], swapped[r]
+        assert dense.swap_delta(tour, r, q) == dense.tour_length(swapped) - f
+
+def test_geo_distance():
+    # Cities 1 & 2 of ulysses16, which are at distance 509.
+    a = np.array([38.24, 20.42])
+    b = np.array([39.57, 26.15])
+    assert coordinate_distances("GEO", a, b) == 509
+    assert coordinate_distances("GEO", a, a) == 0